@@ -1,5 +1,5 @@
 """
-Administrative CLI for SECRET_KEY management.
+Administrative CLI for SECRET_KEY management and load testing.
 """
 
 from __future__ import annotations
@@ -7,9 +7,11 @@ from __future__ import annotations
 import asyncio
 import base64
 import hashlib
+import json
 import os
 from pathlib import Path
 import sqlite3
+import tempfile
 
 import click
 from cryptography.fernet import Fernet, InvalidToken
@@ -74,6 +76,22 @@ def _iter_encrypted_rows(conn: sqlite3.Connection) -> list[tuple[int, str, str]]
     return [(row[0], row[1], row[2]) for row in cursor.fetchall()]
 
 
+def _use_database(db_path: Path) -> None:
+    """Point the app at `db_path`; must run before `models.database` is imported."""
+    from config import settings
+
+    url = f"sqlite+aiosqlite:///{db_path.resolve()}"
+    os.environ["DATABASE_URL"] = url
+    settings.database_url = url
+
+
+def _is_configured_database(db_path: Path) -> bool:
+    from config import settings
+
+    configured = settings.database_url.replace("sqlite+aiosqlite:///", "").replace("+aiosqlite", "")
+    return Path(configured).resolve() == db_path.resolve()
+
+
 @click.group()
 def cli() -> None:
     """Isaac admin CLI."""
@@ -170,5 +188,188 @@ def audit_encryption(db_path: Path, secret_path: Path) -> None:
     click.echo("Encryption audit OK")
 
 
+@cli.command("seed-synthetic")
+@click.option("--db-path", type=click.Path(path_type=Path), required=True, help="Scratch database to create.")
+@click.option("--scale", type=click.Choice(["tiny", "small", "medium", "farm"]), default="small", show_default=True)
+@click.option("--seed", type=int, default=42, show_default=True, help="Random seed for reproducible data.")
+@click.option("--force", is_flag=True, help="Replace an existing scratch database.")
+def seed_synthetic(db_path: Path, scale: str, seed: int, force: bool) -> None:
+    """Fill a scratch database with synthetic farm data."""
+    from synthetic import SCALES, seed_database
+
+    if _is_configured_database(db_path):
+        raise click.ClickException("Refusing to seed the configured production database")
+    if db_path.exists():
+        if not force:
+            raise click.ClickException(f"{db_path} already exists (use --force to replace it)")
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    _use_database(db_path)
+
+    async def run() -> dict[str, int]:
+        from models.database import init_db, async_session
+
+        await init_db()
+        async with async_session() as db:
+            return await seed_database(db, SCALES[scale], seed=seed)
+
+    counts = asyncio.run(run())
+    for table, count in counts.items():
+        click.echo(f"{table:>18}: {count:,}")
+    click.echo(f"Seeded {db_path} at scale '{scale}'")
+
+
+@cli.command("load-test")
+@click.option("--db-path", type=click.Path(path_type=Path, exists=True), required=True, help="Seeded scratch database.")
+@click.option("--duration", type=float, default=30.0, show_default=True, help="Seconds to run.")
+@click.option("--concurrency", type=int, default=8, show_default=True, help="Concurrent in-process clients.")
+@click.option("--write-ratio", type=click.FloatRange(0.0, 1.0), default=0.1, show_default=True)
+@click.option("--seed", type=int, default=42, show_default=True)
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON.")
+def load_test(db_path: Path, duration: float, concurrency: int, write_ratio: float, seed: int, as_json: bool) -> None:
+    """Drive the app in-process against a scratch database and report latency."""
+    if _is_configured_database(db_path):
+        raise click.ClickException("Refusing to load test the configured production database")
+    _use_database(db_path)
+
+    from loadtest import prepare_app, run_load
+    from main import app
+
+    prepare_app(app)
+    report = asyncio.run(run_load(app, duration=duration, concurrency=concurrency, write_ratio=write_ratio, seed=seed))
+    summary = report.summary()
+
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+        return
+
+    click.echo(
+        f"{summary['requests']:,} requests in {summary['duration_s']}s "
+        f"({summary['throughput_rps']} req/s, {summary['errors']} errors)"
+    )
+    click.echo(f"{'endpoint':<18} {'reqs':>7} {'errs':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in summary["endpoints"].items():
+        click.echo(
+            f"{name:<18} {stats['requests']:>7} {stats['errors']:>5} "
+            f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}"
+        )
+    click.echo(f"{'all':<18} {summary['requests']:>7} {summary['errors']:>5} "
+               f"{summary['p50_ms']:>9} {summary['p95_ms']:>9} {summary['p99_ms']:>9}")
+    for name, stats in summary["endpoints"].items():
+        if stats["error_statuses"]:
+            counts = ", ".join(f"{status}: {count}" for status, count in stats["error_statuses"].items())
+            click.echo(f"{name} errors by status: {counts}")
+
+
+@cli.command("bench")
+@click.option("--runs", type=int, default=15, show_default=True, help="Timed runs per handler.")
+@click.option("--baseline", "baseline_path", type=click.Path(path_type=Path), default=None,
+              help="Baseline JSON (defaults to perf_baseline.json next to this file).")
+@click.option("--update-baseline", is_flag=True, help="Record these results as the new baseline.")
+def bench(runs: int, baseline_path: Path | None, update_baseline: bool) -> None:
+    """Check hot handlers against SQL statement and latency budgets."""
+    from benchmarks import BASELINE_FILE, check_budgets, load_baseline, write_baseline
+
+    baseline_path = baseline_path or BASELINE_FILE
+    with tempfile.TemporaryDirectory(prefix="isaac-bench-") as scratch:
+        _use_database(Path(scratch) / "bench.db")
+
+        from benchmarks import run_benchmarks, seed_fixture
+
+        async def run():
+            await seed_fixture()
+            return await run_benchmarks(runs=runs)
+
+        results = asyncio.run(run())
+
+    click.echo(f"{'handler':<28} {'stmts':>6} {'median ms':>10} {'ratio':>7}")
+    for r in results:
+        click.echo(f"{r.name:<28} {r.statements:>6} {r.median_ms:>10} {r.ratio:>7}")
+
+    if update_baseline:
+        write_baseline(results, baseline_path)
+        click.echo(f"Baseline written to {baseline_path}")
+        return
+
+    failures = check_budgets(results, load_baseline(baseline_path))
+    if failures:
+        raise click.ClickException("Performance budget exceeded:\n  " + "\n  ".join(failures))
+    click.echo("Performance budgets OK")
+
+
+@cli.command("rebuild-search-index")
+@click.option("--db-path", type=click.Path(path_type=Path, exists=True), required=True)
+def rebuild_search_index(db_path: Path) -> None:
+    """Drop and rebuild the full-text search index and its triggers."""
+    _use_database(db_path)
+
+    async def run() -> None:
+        from models.database import engine
+        from services.search_index import ensure_search_index
+
+        async with engine.begin() as conn:
+            await ensure_search_index(conn, force=True)
+
+    asyncio.run(run())
+    click.echo(f"Search index rebuilt in {db_path}")
+
+
+@cli.command("rebuild-finance-aggregates")
+@click.option("--db-path", type=click.Path(path_type=Path, exists=True), required=True)
+def rebuild_finance_aggregates(db_path: Path) -> None:
+    """Recompute the monthly budget/expense/sales/order aggregates from the ledgers."""
+    _use_database(db_path)
+
+    async def run() -> dict[str, int]:
+        from models.database import Base, engine
+        from models.finance_aggregate import FinanceAggregateState, FinanceMonthlyAggregate
+        from services.finance_aggregates import rebuild
+
+        tables = [FinanceMonthlyAggregate.__table__, FinanceAggregateState.__table__]
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=tables))
+            return await conn.run_sync(rebuild)
+
+    counts = asyncio.run(run())
+    for source, rows in counts.items():
+        click.echo(f"  {source}: {rows:,} aggregate rows")
+    click.echo(f"Finance aggregates rebuilt in {db_path}")
+
+
+@cli.command("pull-db")
+@click.option("--source", required=True, help="Production database file, or production base URL (http...).")
+@click.option("--db-path", type=click.Path(path_type=Path), required=True, help="Dev database to update.")
+@click.option("--token", envvar="DB_SYNC_TOKEN", default="", help="Sync token when --source is a URL.")
+@click.option("--state-dir", type=click.Path(path_type=Path, file_okay=False), default=None,
+              help="Where the mirror (and local snapshot) live; defaults to the database's directory.")
+def pull_db(source: str, db_path: Path, token: str, state_dir: Path | None) -> None:
+    """Incrementally pull a production database into a dev database (page-level delta)."""
+    from config import settings
+    from services import db_delta
+
+    if _is_configured_database(db_path) and not settings.is_dev_instance:
+        raise click.ClickException("Refusing to overwrite the configured database outside a dev instance")
+    state_dir = state_dir or db_path.parent
+    state_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        if source.startswith(("http://", "https://")):
+            remote = db_delta.HttpSource(source, token)
+            try:
+                stats = db_delta.pull(remote, db_path, state_dir / ".prod-mirror.db")
+            finally:
+                remote.close()
+        else:
+            if Path(source).resolve() == db_path.resolve():
+                raise click.ClickException("--source and --db-path are the same file")
+            stats = db_delta.pull_local(Path(source), db_path, state_dir)
+    except db_delta.DeltaError as e:
+        raise click.ClickException(str(e))
+    click.echo(
+        f"Transferred {stats['pages_transferred']:,} of {stats['page_count']:,} pages "
+        f"({stats['page_bytes']:,} bytes) in {stats['seconds']}s"
+    )
+
+
 if __name__ == "__main__":
     cli()
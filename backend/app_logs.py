@@ -0,0 +1,46 @@
+"""
+Application Log API Routes
+Tail and search the backend's log files, including rotated ones, without loading them whole
+"""
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from routers.auth import require_admin
+from services import log_query
+from services.blocking_io import io_pool
+
+
+router = APIRouter(prefix="/logs", tags=["Logs"])
+
+
+@router.get("/")
+async def query_app_logs(
+    log_file: Literal["app", "debug"] = Query("app"),
+    lines: int = Query(100, ge=1, le=log_query.MAX_LINES),
+    level: Optional[str] = Query(None, description="Exact level, e.g. ERROR"),
+    search: Optional[str] = Query(None, max_length=200),
+    since: Optional[datetime] = Query(None, description="Server-local time, as written in the log"),
+    until: Optional[datetime] = Query(None),
+    user=Depends(require_admin),
+):
+    """Get the last `lines` matching log entries, oldest first.
+
+    Level and time filters use each file's block index and skip blocks that can't match;
+    text-only searches read backwards and stop early, capped at MAX_SCAN_BYTES (`truncated`).
+    """
+    if level and level.upper() not in log_query.LEVELS:
+        raise HTTPException(status_code=400, detail=f"Unknown level: {level}")
+    if since and until and until < since:
+        raise HTTPException(status_code=400, detail="until must not be before since")
+    return await io_pool.run(
+        log_query.query_logs,
+        log_file,
+        lines,
+        level,
+        search,
+        since.replace(tzinfo=None) if since else None,
+        until.replace(tzinfo=None) if until else None,
+    )
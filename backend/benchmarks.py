@@ -0,0 +1,208 @@
+"""
+Performance budgets for hot dashboard handlers.
+Seeds a fixed-scale synthetic fixture, runs each handler against it, and compares SQL
+statement counts and relative latency with the committed baseline in perf_baseline.json.
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import event, func, select
+
+BASELINE_FILE = Path(__file__).parent / "perf_baseline.json"
+
+FIXTURE_SCALE = "small"
+FIXTURE_SEED = 1234
+# Fixed reference time so the fixture (and therefore every query plan) is identical run to run
+FIXTURE_NOW = datetime(2026, 1, 15, 12, 0, 0)
+
+# A handler may take this many times its baseline latency ratio before failing
+LATENCY_TOLERANCE = 2.0
+
+FIXED_FORECAST = [
+    {"name": "Tonight", "low": 34, "high": None, "forecast": "Clear and cold"},
+    {"name": "Thursday", "low": 38, "high": 61, "forecast": "Sunny"},
+    {"name": "Thursday Night", "low": 31, "high": None, "forecast": "Frost likely"},
+    {"name": "Friday", "low": 40, "high": 66, "forecast": "Sunny"},
+]
+
+
+@dataclass(frozen=True)
+class BenchCase:
+    name: str
+    run: Callable[[Any], Awaitable[Any]]
+
+
+@dataclass
+class BenchResult:
+    name: str
+    statements: int
+    median_ms: float
+    ratio: float  # median_ms relative to the calibration query on the same machine
+
+
+def _cases() -> list[BenchCase]:
+    import dashboard
+    from services.ephemeris import ephemeris
+
+    today = FIXTURE_NOW.date()
+    return [
+        BenchCase("get_dashboard", lambda db: dashboard.get_dashboard(db=db)),
+        BenchCase("get_quick_stats", lambda db: dashboard.get_quick_stats(db=db)),
+        BenchCase(
+            "get_calendar_month",
+            lambda db: dashboard.get_calendar_month(year=today.year, month=today.month, db=db),
+        ),
+        BenchCase("get_cold_protection_needed", lambda db: dashboard.get_cold_protection_needed(db=db)),
+        BenchCase("get_storage_stats", lambda db: dashboard.get_storage_stats(db=db)),
+        BenchCase("dashboard_batch_local", lambda db: _batch_local()),
+        BenchCase("sun_moon", lambda db: ephemeris.sun_moon(db)),
+    ]
+
+
+async def _batch_local() -> list[dict]:
+    """The in-process half of GET /dashboard/batch: every local widget, concurrently"""
+    import asyncio
+
+    import dashboard
+
+    token = dashboard._batch_cache.set({})
+    try:
+        return await asyncio.gather(*[dashboard._run_local(name, None) for name in dashboard.LOCAL_WIDGETS])
+    finally:
+        dashboard._batch_cache.reset(token)
+
+
+@contextmanager
+def count_statements(engine):
+    """Count SQL statements sent through `engine` while the block runs"""
+    counter = {"statements": 0}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", on_execute)
+
+
+@contextmanager
+def fixed_forecast():
+    """Serve a canned NWS forecast so cold-protection and freeze handlers never hit the network"""
+    import dashboard
+
+    async def forecast_simple(*args, **kwargs):
+        return FIXED_FORECAST
+
+    original = dashboard.forecast_service.get_forecast_simple
+    dashboard.forecast_service.get_forecast_simple = forecast_simple
+    try:
+        yield
+    finally:
+        dashboard.forecast_service.get_forecast_simple = original
+
+
+async def seed_fixture() -> dict[str, int]:
+    from models.database import init_db, async_session
+    from synthetic import SCALES, seed_database
+
+    await init_db()
+    async with async_session() as db:
+        return await seed_database(db, SCALES[FIXTURE_SCALE], seed=FIXTURE_SEED, now=FIXTURE_NOW)
+
+
+async def _timed(session_factory, run: Callable[[Any], Awaitable[Any]]) -> float:
+    # Fresh session per run so the identity map never answers from memory
+    async with session_factory() as db:
+        started = time.perf_counter()
+        await run(db)
+        return (time.perf_counter() - started) * 1000
+
+
+async def _calibration_query(db) -> None:
+    from models.tasks import Task
+
+    await db.execute(select(func.count()).select_from(Task))
+
+
+async def run_benchmarks(runs: int = 15, warmup: int = 2) -> list[BenchResult]:
+    """Measure every case against the already-seeded fixture database"""
+    from models.database import async_session, engine
+
+    results = []
+    with fixed_forecast():
+        for _ in range(warmup):
+            await _timed(async_session, _calibration_query)
+        calibration_ms = statistics.median(
+            [await _timed(async_session, _calibration_query) for _ in range(runs)]
+        )
+
+        for case in _cases():
+            for _ in range(warmup):
+                await _timed(async_session, case.run)
+            with count_statements(engine) as counter:
+                await _timed(async_session, case.run)
+            timings = [await _timed(async_session, case.run) for _ in range(runs)]
+            median_ms = statistics.median(timings)
+            results.append(BenchResult(
+                name=case.name,
+                statements=counter["statements"],
+                median_ms=round(median_ms, 3),
+                ratio=round(median_ms / calibration_ms, 2) if calibration_ms > 0 else 0.0,
+            ))
+    return results
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> dict:
+    if not path.exists():
+        return {"handlers": {}}
+    return json.loads(path.read_text())
+
+
+def write_baseline(results: list[BenchResult], path: Path = BASELINE_FILE) -> None:
+    baseline = {
+        "scale": FIXTURE_SCALE,
+        "seed": FIXTURE_SEED,
+        "latency_tolerance": LATENCY_TOLERANCE,
+        "handlers": {
+            r.name: {"max_statements": r.statements, "latency_ratio": r.ratio}
+            for r in results
+        },
+    }
+    path.write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+def check_budgets(results: list[BenchResult], baseline: dict) -> list[str]:
+    """Return one message per broken budget; empty means the build passes"""
+    failures = []
+    tolerance = baseline.get("latency_tolerance", LATENCY_TOLERANCE)
+    for result in results:
+        budget: Optional[dict] = baseline.get("handlers", {}).get(result.name)
+        if budget is None:
+            failures.append(f"{result.name}: no baseline recorded (run with --update-baseline)")
+            continue
+        if budget.get("max_statements") is None:
+            failures.append(f"{result.name}: no statement budget recorded (run with --update-baseline)")
+        elif result.statements > budget["max_statements"]:
+            failures.append(
+                f"{result.name}: {result.statements} SQL statements, budget is {budget['max_statements']}"
+            )
+        ratio_budget = budget.get("latency_ratio")
+        if ratio_budget is None:
+            failures.append(f"{result.name}: no latency baseline recorded (run with --update-baseline)")
+        elif result.ratio > ratio_budget * tolerance:
+            failures.append(
+                f"{result.name}: latency ratio {result.ratio} exceeds {ratio_budget} x {tolerance}"
+            )
+    return failures
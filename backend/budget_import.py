@@ -0,0 +1,75 @@
+"""
+Budget Statement Import API Routes
+Upload a PDF statement and follow its per-page extraction as server-sent events, then
+insert the confirmed transactions in one bulk insert
+"""
+
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import async_session, get_db
+from routers.auth import require_admin
+from services import statement_import
+
+
+router = APIRouter(prefix="/budget/import/statement", tags=["Budget"])
+
+
+class StatementTransaction(BaseModel):
+    date: str
+    description: str = Field(..., max_length=500)
+    original_description: Optional[str] = Field(None, max_length=500)
+    amount: float
+    transaction_type: str
+    import_hash: Optional[str] = Field(None, max_length=64)
+    category_id: Optional[int] = None
+
+
+class StatementCommit(BaseModel):
+    account_id: int
+    transactions: list[StatementTransaction] = Field(..., max_length=5000)
+
+
+@router.post("/parse/")
+async def parse_statement(
+    file: UploadFile = File(...),
+    account_id: int = Query(..., description="Account the statement belongs to"),
+    statement_year: Optional[int] = Query(None, description="Used when the statement doesn't state its period"),
+    user=Depends(require_admin),
+):
+    """Parse a Chase PDF statement, streaming `started`, per-page `progress`, then `done` or `error`.
+
+    The `done` event carries the same preview as /budget/import/chase/: transactions with
+    suggested categories, `import_hash` and `is_duplicate`. A statement uploaded before
+    skips extraction (`cached: true`) but is categorized and checked for duplicates again.
+    """
+    data = await file.read(statement_import.MAX_FILE_SIZE + 1)
+
+    async def events():
+        # Own session: the stream outlives the request's dependencies
+        async with async_session() as db:
+            async for event in statement_import.parse_statement(db, data, account_id, statement_year):
+                yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/commit/")
+async def commit_statement(
+    body: StatementCommit,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(require_admin),
+):
+    """Insert confirmed preview rows with one executemany, skipping import_hashes already in the account"""
+    return await statement_import.insert_transactions(
+        db, body.account_id, [t.model_dump() for t in body.transactions],
+    )
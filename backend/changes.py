@@ -0,0 +1,44 @@
+"""
+Change Feed API Routes
+Delta sync for the kiosk and mobile clients: only what changed since the last sequence
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import get_db
+from routers.auth import require_auth
+from services import change_feed
+
+
+router = APIRouter(prefix="/changes", tags=["Changes"])
+
+
+@router.get("/")
+async def get_changes(
+    since: int = Query(0, description="Last seq the client has applied; 0 for a full snapshot"),
+    limit: int = Query(change_feed.DEFAULT_LIMIT, ge=1, le=change_feed.MAX_LIMIT),
+    entities: Optional[str] = Query(None, description="Comma-separated subset, e.g. plants,tasks"),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(require_auth),
+):
+    """Get upserts and tombstones after `since`.
+
+    Apply `changes`, store `seq`, and call again while `has_more` is true. Collections
+    listed in `resets` were bulk-edited and must be refetched in full; `reset: true`
+    means `since` is older than the retained history and the client must start over
+    from since=0.
+    """
+    wanted = {e.strip() for e in entities.split(",") if e.strip()} if entities else None
+    return await change_feed.changes_since(db, since, limit=limit, entities=wanted)
+
+
+@router.get("/head")
+async def get_change_head(db: AsyncSession = Depends(get_db), user=Depends(require_auth)):
+    """Get the current sequence number and the tracked collections"""
+    return {
+        "seq": await change_feed.head(db),
+        "entities": sorted(change_feed.TRACKED.values()),
+    }
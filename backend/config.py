@@ -30,6 +30,8 @@ class Settings(BaseSettings):
     # Server
     host: str = "0.0.0.0"
     port: int = 8000
+    workers: int = 1  # >1 enables scheduler leader election and shared rate-limit state
+    rate_limit_enabled: bool = True  # Disabled by the in-process load test harness
 
     # Timezone & Location
     timezone: str = "America/New_York"
@@ -41,6 +43,11 @@ class Settings(BaseSettings):
     awn_api_key: Optional[str] = Field(default=None, description="Ambient Weather API Key")
     awn_app_key: Optional[str] = Field(default=None, description="Ambient Weather Application Key")
     weather_poll_interval: int = 300  # seconds (5 minutes)
+    awn_api_base_url: str = "https://rt.ambientweather.net"  # point at a local stub for testing
+    weather_adaptive_polling: bool = False  # replaces the fixed-interval scheduler poll
+    weather_poll_min_interval: int = 60  # near frost / high wind / rapid change
+    weather_poll_max_interval: int = 900  # stable conditions
+    weather_poll_job_id: str = "weather_poll"  # fixed-interval scheduler job the adaptive poller replaces
 
     # Email Settings (Protonmail)
     smtp_host: str = "smtp.protonmail.ch"
@@ -56,6 +63,21 @@ class Settings(BaseSettings):
     caldav_username: Optional[str] = Field(default=None, description="CalDAV username")
     caldav_password: Optional[str] = Field(default=None, description="CalDAV password")
     caldav_calendar_name: str = Field(default="Isaac Tasks", description="Calendar name for tasks")
+    caldav_incremental_sync: bool = False  # ctag/sync-token/ETag sync instead of full comparison
+    caldav_sync_job_id: str = "calendar_sync"  # full-comparison scheduler job the incremental sync replaces
+
+    # Care-schedule reminders
+    care_horizon_enabled: bool = False  # incremental generator replaces the full-scan care reminder job
+    care_horizon_days: int = 30  # reminders are materialized this far ahead
+    care_horizon_interval: int = 15  # minutes between incremental passes
+    care_reminder_job_id: str = "care_reminders"  # full-scan scheduler job the horizon generator replaces
+
+    # Incremental pull-from-production (page-level delta)
+    db_sync_token: str = ""  # production: shared secret that enables /db-sync; empty disables it
+    prod_sync_url: str = ""  # dev: base URL of the production backend to pull from
+
+    # Photo and receipt thumbnails
+    image_derivative_interval: int = 30  # minutes between backfill passes over upload directories
 
     # Alert Thresholds
     frost_warning_temp: float = 35.0  # Fahrenheit
@@ -3,25 +3,60 @@ Dashboard API Routes
 Consolidated data for the dashboard view
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc, or_, and_
 from typing import List, Optional
 from datetime import datetime, date, timedelta
+from contextvars import ContextVar
+import asyncio
+import time
+import orjson
+from loguru import logger
 from pydantic import BaseModel
 
-from models.database import get_db
+from finance_summary import MONTH_RE
+from models.database import async_session, get_db
 from models.plants import Plant
 from models.livestock import Animal, AnimalType
 from models.tasks import Task, TaskCategory, TaskType
 from models.weather import WeatherReading, WeatherAlert
+from routers.auth import require_auth
+from services import finance_aggregates
 from services.weather import WeatherService, NWSForecastService
+from services.settings_cache import settings_cache
+from services.calendar_buckets import calendar_buckets, content_hash, month_bounds, MAX_RANGE_DAYS
+from services.ephemeris import ephemeris
+from services.storage_monitor import storage_monitor, ISAAC_LOGS_DIR
+from services.blocking_io import io_pool
+from config import settings
 
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 weather_service = WeatherService()
 forecast_service = NWSForecastService()
 
+# Set by /dashboard/batch so concurrently running widgets share one latest reading and forecast
+_batch_cache: ContextVar[Optional[dict]] = ContextVar("dashboard_batch_cache", default=None)
+
+
+async def _shared(key: str, factory):
+    """Run `factory` once per batch; outside a batch just run it"""
+    cache = _batch_cache.get()
+    if cache is None:
+        return await factory()
+    if key not in cache:
+        cache[key] = asyncio.ensure_future(factory())
+    return await asyncio.shield(cache[key])
+
+
+async def _latest_reading(db: AsyncSession):
+    return await _shared("latest_reading", lambda: weather_service.get_latest_reading(db))
+
+
+async def _forecast():
+    return await _shared("forecast", forecast_service.get_forecast_simple)
+
 
 # Response Schemas
 class DashboardWeather(BaseModel):
@@ -83,6 +118,7 @@ class DashboardResponse(BaseModel):
     alerts: List[DashboardAlert]
     stats: DashboardStats
     upcoming_events: List[CalendarEvent]
+    sun_moon: Optional[dict] = None  # today's sun/moon widget values, from the ephemeris table
 
 
 @router.get("/", response_model=DashboardResponse)
@@ -91,7 +127,7 @@ async def get_dashboard(db: AsyncSession = Depends(get_db)):
 
     # Get current weather
     weather_data = None
-    reading = await weather_service.get_latest_reading(db)
+    reading = await _latest_reading(db)
     if reading:
         summary = weather_service.get_weather_summary(reading)
 
@@ -266,6 +302,7 @@ async def get_dashboard(db: AsyncSession = Depends(get_db)):
         alerts=alert_list,
         stats=stats,
         upcoming_events=upcoming_events,
+        sun_moon=await ephemeris.sun_moon(db),
     )
 
 
@@ -300,7 +337,7 @@ async def get_quick_stats(db: AsyncSession = Depends(get_db)):
     )
 
     # Latest weather
-    reading = await weather_service.get_latest_reading(db)
+    reading = await _latest_reading(db)
 
     return {
         "tasks_pending": tasks_pending.scalar() or 0,
@@ -355,6 +392,55 @@ async def get_calendar_month(
     }
 
 
+@router.get("/calendar/range")
+async def get_calendar_range(
+    start: date,
+    end: date,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """Get per-day event buckets (recurring occurrences expanded) for every month touching [start, end].
+
+    Each month carries its own ETag. Send the ETags you already hold in If-None-Match:
+    unchanged months come back as {"not_modified": true} without days, and if nothing
+    changed at all the response is a bare 304.
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+
+    buckets = await calendar_buckets.get_months(db, start, end)
+    known = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+    overall = content_hash({f"{y}-{m:02d}": b["etag"] for (y, m), b in buckets.items()})
+    headers = {"ETag": overall, "Cache-Control": "private, no-cache"}
+    if overall in known:
+        return Response(status_code=304, headers=headers)
+
+    months = []
+    for (year, month), bucket in buckets.items():
+        month_start, month_end = month_bounds(year, month)
+        entry = {
+            "month": f"{year}-{month:02d}",
+            "start": month_start.isoformat(),
+            "end": month_end.isoformat(),
+            "etag": bucket["etag"],
+        }
+        if bucket["etag"] in known:
+            entry["not_modified"] = True
+        else:
+            entry["days"] = bucket["days"]
+        months.append(entry)
+
+    response.headers.update(headers)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "months": months,
+    }
+
+
 @router.get("/cold-protection/")
 async def get_cold_protection_needed(db: AsyncSession = Depends(get_db)):
     """
@@ -362,11 +448,11 @@ async def get_cold_protection_needed(db: AsyncSession = Depends(get_db)):
     Only returns data if there are plants that need protection.
     """
     # Get current weather and forecast
-    reading = await weather_service.get_latest_reading(db)
+    reading = await _latest_reading(db)
     current_temp = reading.temp_outdoor if reading else None
 
     # Get today's forecast low
-    forecast = await forecast_service.get_forecast_simple()
+    forecast = await _forecast()
     forecast_low = None
     if forecast and len(forecast) > 0:
         # First entry is usually today/tonight
@@ -435,16 +521,14 @@ async def get_freeze_warning(db: AsyncSession = Depends(get_db)):
     Check if freeze is forecasted and return irrigation/pipe protection reminder.
     Returns warning if forecast low is at or below 32°F (with buffer).
     """
-    from services.weather import get_threshold
-
     # Get current weather and forecast
-    reading = await weather_service.get_latest_reading(db)
+    reading = await _latest_reading(db)
     current_temp = reading.temp_outdoor if reading else None
 
     # Get forecast - check tonight and next few nights
-    forecast = await forecast_service.get_forecast_simple()
+    forecast = await _forecast()
 
-    freeze_threshold = await get_threshold(db, "freeze_warning_temp")  # Default 32°F
+    freeze_threshold = await settings_cache.get_float(db, "freeze_warning_temp", settings.freeze_warning_temp)  # Default 32°F
     buffer_degrees = 5  # Be conservative for pipes
 
     freeze_nights = []
@@ -482,12 +566,7 @@ async def get_freeze_warning(db: AsyncSession = Depends(get_db)):
 
 # === Storage Monitoring ===
 # SECURITY: All paths are hardcoded constants - no user input accepted
-from pathlib import Path
-import shutil
-
-# Hardcoded paths for security - prevents path traversal attacks
-ISAAC_DATA_DIR = Path("/opt/isaac/data")
-ISAAC_LOGS_DIR = Path("/opt/isaac/logs")
+# Sizes are sampled in the background by services.storage_monitor; handlers read the cached snapshot
 
 
 class StorageStats(BaseModel):
@@ -499,15 +578,23 @@ class StorageStats(BaseModel):
     disk_usage_percent: float
 
     # Isaac app breakdown
-    database_bytes: int
+    database_bytes: int  # main file plus -wal and -shm
     logs_bytes: int
+    uploads_bytes: int
     app_total_bytes: int
 
     # Human-readable formats
     disk_total_human: str
+    disk_used_human: str
     disk_available_human: str
     database_human: str
     logs_human: str
+    uploads_human: str
+
+    # Growth projection from the sampled history (None until there is enough of it)
+    growth_bytes_per_day: Optional[float] = None
+    days_until_full: Optional[float] = None
+    sampled_at: str
 
     # Alert state for conditional dashboard display
     alert_level: str  # "ok", "warning", "critical"
@@ -522,62 +609,20 @@ def _format_bytes(size_bytes: int) -> str:
     return f"{size_bytes:.1f} PB"
 
 
-def _safe_get_size(path: Path) -> int:
-    """
-    Get file size safely.
-    SECURITY: Rejects symlinks to prevent traversal attacks.
-    """
-    try:
-        if path.exists() and path.is_file() and not path.is_symlink():
-            return path.stat().st_size
-    except (OSError, PermissionError):
-        pass
-    return 0
-
-
-def _safe_dir_size(dir_path: Path) -> int:
-    """
-    Get total size of regular files in directory.
-    SECURITY: Only counts regular files, rejects symlinks.
-    """
-    total = 0
-    try:
-        if dir_path.exists() and dir_path.is_dir():
-            for f in dir_path.iterdir():
-                if f.is_file() and not f.is_symlink():
-                    try:
-                        total += f.stat().st_size
-                    except (OSError, PermissionError):
-                        pass
-    except (OSError, PermissionError):
-        pass
-    return total
-
-
 @router.get("/storage/", response_model=StorageStats)
-async def get_storage_stats(db: AsyncSession = Depends(get_db)):
+async def get_storage_stats(refresh: bool = False, db: AsyncSession = Depends(get_db)):
     """
     Get storage statistics for disk and Isaac app components.
+    Returns the latest background sample immediately; refresh=true re-samples first.
     SECURITY: All paths are hardcoded - no user input accepted.
     """
-    from routers.settings import get_setting
-
-    # Get whole disk usage (root partition)
-    try:
-        total, used, free = shutil.disk_usage("/")
-        usage_percent = (used / total) * 100 if total > 0 else 0
-    except OSError:
-        total, used, free = 0, 0, 0
-        usage_percent = 0
-
-    # Get Isaac component sizes from hardcoded paths only
-    db_size = _safe_get_size(ISAAC_DATA_DIR / "isaac.db")
-    log_size = _safe_dir_size(ISAAC_LOGS_DIR)
-    app_total = db_size + log_size
+    sample = await storage_monitor.refresh() if refresh else await storage_monitor.get_snapshot()
+    usage_percent = sample.disk_usage_percent
+    app_total = sample.database_bytes + sample.logs_bytes + sample.uploads_bytes
 
     # Determine alert level based on settings
-    warning_threshold = float(await get_setting(db, "storage_warning_percent") or "80")
-    critical_threshold = float(await get_setting(db, "storage_critical_percent") or "95")
+    warning_threshold = await settings_cache.get_float(db, "storage_warning_percent", 80.0)
+    critical_threshold = await settings_cache.get_float(db, "storage_critical_percent", 95.0)
 
     if usage_percent >= critical_threshold:
         alert_level = "critical"
@@ -586,22 +631,53 @@ async def get_storage_stats(db: AsyncSession = Depends(get_db)):
     else:
         alert_level = "ok"
 
+    growth = storage_monitor.growth_bytes_per_day()
+    days_left = storage_monitor.days_until_full()
+
     return StorageStats(
-        disk_total_bytes=total,
-        disk_used_bytes=used,
-        disk_available_bytes=free,
+        disk_total_bytes=sample.disk_total_bytes,
+        disk_used_bytes=sample.disk_used_bytes,
+        disk_available_bytes=sample.disk_available_bytes,
         disk_usage_percent=round(usage_percent, 1),
-        database_bytes=db_size,
-        logs_bytes=log_size,
+        database_bytes=sample.database_bytes,
+        logs_bytes=sample.logs_bytes,
+        uploads_bytes=sample.uploads_bytes,
         app_total_bytes=app_total,
-        disk_total_human=_format_bytes(total),
-        disk_available_human=_format_bytes(free),
-        database_human=_format_bytes(db_size),
-        logs_human=_format_bytes(log_size),
+        disk_total_human=_format_bytes(sample.disk_total_bytes),
+        disk_used_human=_format_bytes(sample.disk_used_bytes),
+        disk_available_human=_format_bytes(sample.disk_available_bytes),
+        database_human=_format_bytes(sample.database_bytes),
+        logs_human=_format_bytes(sample.logs_bytes),
+        uploads_human=_format_bytes(sample.uploads_bytes),
+        growth_bytes_per_day=round(growth) if growth is not None else None,
+        days_until_full=round(days_left, 1) if days_left is not None else None,
+        sampled_at=sample.sampled_at.isoformat(),
         alert_level=alert_level,
     )
 
 
+def _clear_log_files() -> tuple[int, int]:
+    """
+    Delete regular files in ISAAC_LOGS_DIR. Blocking - runs on the I/O pool.
+    SECURITY: Only deletes regular files, not symlinks or directories.
+    Raises OSError if the directory itself cannot be read.
+    """
+    cleared_count = 0
+    cleared_bytes = 0
+    if ISAAC_LOGS_DIR.exists() and ISAAC_LOGS_DIR.is_dir():
+        for f in ISAAC_LOGS_DIR.iterdir():
+            if f.is_file() and not f.is_symlink():
+                try:
+                    size = f.stat().st_size
+                    f.unlink()
+                    cleared_count += 1
+                    cleared_bytes += size
+                except (OSError, PermissionError):
+                    # Don't fail on individual file errors
+                    pass
+    return cleared_count, cleared_bytes
+
+
 @router.post("/storage/clear-logs/")
 async def clear_logs():
     """
@@ -609,23 +685,9 @@ async def clear_logs():
     SECURITY: Only deletes regular files from hardcoded ISAAC_LOGS_DIR.
     Symlinks and subdirectories are ignored.
     """
-    cleared_count = 0
-    cleared_bytes = 0
-
     try:
-        if ISAAC_LOGS_DIR.exists() and ISAAC_LOGS_DIR.is_dir():
-            for f in ISAAC_LOGS_DIR.iterdir():
-                # SECURITY: Only delete regular files, not symlinks or directories
-                if f.is_file() and not f.is_symlink():
-                    try:
-                        size = f.stat().st_size
-                        f.unlink()
-                        cleared_count += 1
-                        cleared_bytes += size
-                    except (OSError, PermissionError) as e:
-                        # Log but don't fail on individual file errors
-                        pass
-    except (OSError, PermissionError) as e:
+        cleared_count, cleared_bytes = await io_pool.run(_clear_log_files)
+    except (OSError, PermissionError):
         return {
             "success": False,
             "error": "Permission denied accessing logs directory",
@@ -633,9 +695,141 @@ async def clear_logs():
             "cleared_bytes": 0,
         }
 
+    # Re-sample so the next /storage/ read reflects the freed space
+    await storage_monitor.refresh()
+
     return {
         "success": True,
         "cleared_count": cleared_count,
         "cleared_bytes": cleared_bytes,
         "cleared_human": _format_bytes(cleared_bytes),
     }
+
+
+# === Finances ===
+# Read from the materialized monthly aggregates, so the dashboard never scans the ledgers
+
+
+@router.get("/finance/")
+async def get_finance_month(
+    month: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    user=Depends(require_auth),
+):
+    """Income, spending and net for the farm and the household budget (this month by default)"""
+    if month is None:
+        month = date.today().strftime("%Y-%m")
+    elif not MONTH_RE.match(month):
+        raise HTTPException(status_code=400, detail="Month must be YYYY-MM")
+    return await finance_aggregates.month_totals(db, month)
+
+
+# === Batched Widgets ===
+# One request for the whole dashboard page: local widgets run concurrently, each in its own
+# session; widgets served by other routers are dispatched straight to the app's router,
+# skipping the middleware chain but keeping their auth dependencies.
+
+# Called directly, so no dependencies run: widgets that need a user are handed the batch's
+LOCAL_WIDGETS = {
+    "dashboard": lambda db, user: get_dashboard(db=db),
+    "quick_stats": lambda db, user: get_quick_stats(db=db),
+    "cold_protection": lambda db, user: get_cold_protection_needed(db=db),
+    "freeze_warning": lambda db, user: get_freeze_warning(db=db),
+    "storage": lambda db, user: get_storage_stats(db=db),
+    "finance": lambda db, user: get_finance_month(db=db, user=user),
+}
+
+ROUTED_WIDGETS = {
+    "weather_current": "/weather/current/",
+    "weather_forecast": "/weather/forecast/",
+    "budget_summary": "/budget/summary/dashboard/",
+}
+
+DEFAULT_WIDGETS = (*LOCAL_WIDGETS, *ROUTED_WIDGETS)
+
+
+async def _run_local(name: str, user) -> dict:
+    try:
+        async with async_session() as db:
+            return {"status": 200, "data": await LOCAL_WIDGETS[name](db, user)}
+    except HTTPException as e:
+        return {"status": e.status_code, "error": e.detail}
+    except Exception as e:
+        logger.warning(f"Dashboard widget {name} failed: {e}")
+        return {"status": 500, "error": "Widget failed"}
+
+
+async def _dispatch(request: Request, path: str) -> tuple[int, bytes]:
+    scope = {
+        **request.scope,
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+    }
+    status, chunks = 500, []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await request.app.router(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def _run_routed(request: Request, name: str) -> dict:
+    path = ROUTED_WIDGETS[name]
+    try:
+        status, body = await _dispatch(request, path)
+        if status in (307, 404):
+            # Routes are declared with or without the trailing slash; the middleware normally hides this
+            alternate = path.rstrip("/") if path.endswith("/") else path + "/"
+            status, body = await _dispatch(request, alternate)
+        data = orjson.loads(body) if body else None
+    except Exception as e:
+        logger.warning(f"Dashboard widget {name} failed: {e}")
+        return {"status": 500, "error": "Widget failed"}
+    if status >= 400:
+        detail = data.get("detail") if isinstance(data, dict) else None
+        return {"status": status, "error": detail or "Widget failed"}
+    return {"status": status, "data": data}
+
+
+@router.get("/batch")
+async def get_dashboard_batch(
+    request: Request,
+    widgets: Optional[str] = Query(None, description="Comma-separated widget names; default is all"),
+    user=Depends(require_auth),
+):
+    """Get several dashboard widgets in one request.
+
+    Widgets run concurrently. The local widgets share one latest weather reading and
+    forecast; routed widgets (current weather, forecast, budget summary) are answered by
+    their own routers. Each entry carries its own status; one failing widget doesn't fail
+    the batch.
+    """
+    names = [w.strip() for w in widgets.split(",") if w.strip()] if widgets else list(DEFAULT_WIDGETS)
+    unknown = [n for n in names if n not in LOCAL_WIDGETS and n not in ROUTED_WIDGETS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown widgets: {', '.join(unknown)}")
+    names = list(dict.fromkeys(names))
+
+    started = time.perf_counter()
+    token = _batch_cache.set({})
+    try:
+        results = await asyncio.gather(*[
+            _run_local(n, user) if n in LOCAL_WIDGETS else _run_routed(request, n)
+            for n in names
+        ])
+    finally:
+        _batch_cache.reset(token)
+    return {
+        "widgets": dict(zip(names, results)),
+        "took_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
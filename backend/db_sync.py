@@ -0,0 +1,95 @@
+"""
+Database Sync API Routes
+Page-level delta pull from production: production serves snapshot manifests and pages,
+the dev instance pulls only the pages that changed
+"""
+
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from pydantic import BaseModel
+
+from config import settings
+from routers.auth import require_admin
+from services import db_delta
+from services.blocking_io import io_pool
+from services.settings_cache import settings_cache
+from services.storage_monitor import database_path
+
+
+router = APIRouter(prefix="/db-sync", tags=["Database Sync"])
+
+
+def _snapshot_source() -> db_delta.SnapshotSource:
+    return db_delta.SnapshotSource(database_path(), settings.data_dir / ".pull-snapshot.db")
+
+
+def require_sync_token(x_sync_token: Optional[str] = Header(None)) -> None:
+    # Unconfigured production doesn't advertise the endpoints at all
+    if not settings.db_sync_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_sync_token or not hmac.compare_digest(x_sync_token, settings.db_sync_token):
+        raise HTTPException(status_code=403, detail="Invalid sync token")
+
+
+class PageRequest(BaseModel):
+    snapshot_id: str
+    ranges: list[tuple[int, int]]
+
+
+@router.get("/manifest/", dependencies=[Depends(require_sync_token)])
+async def get_manifest():
+    """Snapshot the database and return one hash per page"""
+    manifest = await io_pool.run(_snapshot_source().manifest)
+    return db_delta.manifest_to_json(manifest)
+
+
+@router.post("/pages/", dependencies=[Depends(require_sync_token)])
+async def get_pages(request: PageRequest):
+    """Stream the requested snapshot pages as zlib-compressed (page number, bytes) frames"""
+    source = _snapshot_source()
+    pages = source.pages(request.snapshot_id, db_delta.from_ranges(request.ranges))
+    try:
+        # Pull the first frame now so a replaced snapshot is a 409, not a broken stream
+        first = await io_pool.run(next, pages, None)
+    except db_delta.SnapshotChanged as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except db_delta.DeltaError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def frames():
+        if first is not None:
+            yield first
+            yield from pages
+
+    # Sync generator: Starlette iterates it in its threadpool, off the event loop
+    return StreamingResponse(db_delta.encode_frames(frames()), media_type="application/octet-stream")
+
+
+@router.post("/pull/")
+async def pull_from_production(user=Depends(require_admin)):
+    """Dev instance: bring the local database up to date with production"""
+    if not settings.is_dev_instance:
+        raise HTTPException(status_code=400, detail="Only a dev instance can pull from production")
+    if not settings.prod_sync_url or not settings.db_sync_token:
+        raise HTTPException(status_code=400, detail="PROD_SYNC_URL and DB_SYNC_TOKEN must be set")
+
+    def run() -> dict:
+        source = db_delta.HttpSource(settings.prod_sync_url, settings.db_sync_token)
+        try:
+            return db_delta.pull(source, database_path(), settings.data_dir / ".prod-mirror.db")
+        finally:
+            source.close()
+
+    try:
+        stats = await io_pool.run(run)
+    except Exception as e:
+        logger.error(f"Incremental pull from production failed: {e}")
+        raise HTTPException(status_code=502, detail=f"Pull failed: {e}")
+
+    # Cached settings came from the old database content
+    settings_cache.invalidate()
+    return {"success": True, **stats}
@@ -0,0 +1,62 @@
+"""
+Finance Aggregate API Routes
+Monthly totals for budget transactions, expenses, sales and orders, read from the
+materialized aggregates so summary cards and charts don't scan the ledgers
+"""
+
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import get_db
+from routers.auth import require_admin, require_auth
+from services import finance_aggregates
+
+
+router = APIRouter(prefix="/finance/aggregates", tags=["Budget"])
+
+MONTH_RE = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+
+def _split(value: Optional[str]) -> list[str]:
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+@router.get("/")
+async def get_finance_aggregates(
+    start: Optional[str] = Query(None, description="First month, YYYY-MM"),
+    end: Optional[str] = Query(None, description="Last month, YYYY-MM (inclusive)"),
+    sources: Optional[str] = Query(None, description="Comma-separated, e.g. budget,expenses,sales"),
+    group_by: str = Query("month", description="Comma-separated: month, account_id, category, enterprise"),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(require_auth),
+):
+    """Get totals, inflow, outflow and row counts per source and the requested groups.
+
+    Omit `group_by` values to sum across them, e.g. `group_by=` for one total per source.
+    """
+    for month in (start, end):
+        if month and not MONTH_RE.match(month):
+            raise HTTPException(status_code=400, detail="Months must be YYYY-MM")
+    wanted_sources = _split(sources)
+    known = {source.name for source in finance_aggregates.SOURCES}
+    unknown = [s for s in wanted_sources if s not in known]
+    groups = _split(group_by)
+    unknown += [g for g in groups if g not in finance_aggregates.GROUP_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sources or groups: {', '.join(unknown)}")
+    rows = await finance_aggregates.summarize(db, start, end, wanted_sources or None, tuple(groups))
+    return {"rows": rows}
+
+
+@router.post("/rebuild/")
+async def rebuild_finance_aggregates(db: AsyncSession = Depends(get_db), user=Depends(require_admin)):
+    """Recompute all aggregates from the ledgers"""
+    try:
+        counts = await db.run_sync(lambda session: finance_aggregates.rebuild(session.connection()))
+    except finance_aggregates.FinanceAggregateError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    await db.commit()
+    return {"rebuilt": counts}
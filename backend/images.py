@@ -0,0 +1,86 @@
+"""
+Image API Routes
+Thumbnail and medium variants of uploaded photos and receipts. Hashed variant URLs are
+immutable and cached by clients for a year; Range requests are honoured. Receipt variants
+are served by upload filename to editors and admins only.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import get_db
+from routers.auth import require_admin, require_auth, require_editor
+from services import image_derivatives
+
+
+router = APIRouter(prefix="/images", tags=["Images"])
+
+IMMUTABLE = "max-age=31536000, immutable"
+
+
+@router.get("/derived/{name}")
+async def get_derived_image(name: str, db: AsyncSession = Depends(get_db), user=Depends(require_auth)):
+    """A variant by content-hash name, as returned in list responses"""
+    match = image_derivatives.DERIVED_NAME_RE.match(name)
+    if not match or await image_derivatives.is_private(db, match.group(1)):
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = image_derivatives.derived_path(match.group(1), match.group(2))
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(
+        path,
+        media_type="image/webp",
+        headers={"Cache-Control": f"private, {IMMUTABLE}", "ETag": f'"{match.group(1)}-{match.group(2)}"'},
+    )
+
+
+async def _variant(db: AsyncSession, kind: str, filename: str, variant: str) -> FileResponse:
+    if kind not in image_derivatives.UPLOAD_DIRS or variant not in image_derivatives.VARIANTS:
+        raise HTTPException(status_code=404, detail="Image not found")
+    row = await image_derivatives.ensure(db, kind, filename)
+    if row is None or row.content_hash is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = image_derivatives.derived_path(row.content_hash, variant)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Stable URL, changing content: cache briefly, then revalidate against the hash ETag
+    return FileResponse(
+        path,
+        media_type="image/webp",
+        headers={"Cache-Control": "private, max-age=300", "ETag": f'"{row.content_hash}-{variant}"'},
+    )
+
+
+# Declared before the generic route so receipt paths never reach it
+@router.get("/receipts/{filename}/{variant}/")
+async def get_receipt_variant(
+    filename: str, variant: str, db: AsyncSession = Depends(get_db), user=Depends(require_editor)
+):
+    """A garden expense receipt variant"""
+    return await _variant(db, "receipts", filename, variant)
+
+
+@router.get("/animal_receipts/{filename}/{variant}/")
+async def get_animal_receipt_variant(
+    filename: str, variant: str, db: AsyncSession = Depends(get_db), user=Depends(require_editor)
+):
+    """An animal expense receipt variant"""
+    return await _variant(db, "animal_receipts", filename, variant)
+
+
+@router.get("/{kind}/{filename}/{variant}/")
+async def get_image_variant(
+    kind: str, filename: str, variant: str, db: AsyncSession = Depends(get_db), user=Depends(require_auth)
+):
+    """A variant by upload filename; generated on first request if the backfill hasn't reached it"""
+    if kind in image_derivatives.PRIVATE_KINDS:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return await _variant(db, kind, filename, variant)
+
+
+@router.post("/backfill/")
+async def run_image_backfill(user=Depends(require_admin)):
+    """Derive variants for uploads that don't have them yet"""
+    derived = await image_derivatives.backfill()
+    return {"derived": derived}
@@ -0,0 +1,162 @@
+"""
+In-process load driver for the FastAPI app.
+Sends a weighted mix of read and write requests through an ASGI transport and reports
+throughput and latency percentiles. No network or live services are involved.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+import httpx
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """One request shape in the workload mix"""
+    name: str
+    method: str
+    path: Callable[[random.Random], str]
+    weight: int
+    body: Optional[Callable[[random.Random], dict]] = None
+
+
+def _calendar_path(rng: random.Random) -> str:
+    month = date.today() + timedelta(days=rng.randint(-90, 90))
+    return f"/dashboard/calendar/{month.year}/{month.month}/"
+
+
+def _new_task(rng: random.Random) -> dict:
+    return {
+        "title": f"Load test task {rng.randint(1, 1_000_000)}",
+        "task_type": "todo",
+        "category": "custom",
+        "priority": rng.randint(1, 3),
+        "due_date": (date.today() + timedelta(days=rng.randint(0, 30))).isoformat(),
+    }
+
+
+READ_ENDPOINTS = [
+    Endpoint("dashboard", "GET", lambda rng: "/dashboard/", 10),
+    Endpoint("quick_stats", "GET", lambda rng: "/dashboard/quick-stats/", 6),
+    Endpoint("calendar_month", "GET", _calendar_path, 5),
+    Endpoint("cold_protection", "GET", lambda rng: "/dashboard/cold-protection/", 3),
+    Endpoint("plants_list", "GET", lambda rng: "/plants/", 3),
+    Endpoint("animals_list", "GET", lambda rng: "/animals/", 2),
+    Endpoint("tasks_list", "GET", lambda rng: "/tasks/", 3),
+]
+
+WRITE_ENDPOINTS = [
+    Endpoint("task_create", "POST", lambda rng: "/tasks/", 3, _new_task),
+    Endpoint("task_complete", "POST", lambda rng: f"/tasks/{rng.randint(1, 1_000)}/complete/", 1),
+]
+
+
+@dataclass
+class LoadReport:
+    duration: float
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    # endpoint -> failing status code (or "exception") -> count
+    error_statuses: dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+
+    @property
+    def total_requests(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+    @property
+    def throughput(self) -> float:
+        return self.total_requests / self.duration if self.duration > 0 else 0.0
+
+    def summary(self) -> dict:
+        everything = [ms for values in self.latencies.values() for ms in values]
+        return {
+            "requests": self.total_requests,
+            "errors": sum(self.errors.values()),
+            "duration_s": round(self.duration, 2),
+            "throughput_rps": round(self.throughput, 1),
+            **percentiles(everything),
+            "endpoints": {
+                name: {
+                    "requests": len(values),
+                    "errors": self.errors.get(name, 0),
+                    "error_statuses": dict(sorted(self.error_statuses.get(name, {}).items())),
+                    **percentiles(values),
+                }
+                for name, values in sorted(self.latencies.items())
+            },
+        }
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    """Nearest-rank p50/p95/p99 in milliseconds"""
+    if not values:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+        return round(ordered[index], 2)
+
+    return {"p50_ms": rank(50), "p95_ms": rank(95), "p99_ms": rank(99)}
+
+
+def prepare_app(app) -> None:
+    """Let the harness reach authenticated routes and bypass the per-IP rate limit."""
+    from config import settings
+    from routers import auth
+
+    settings.rate_limit_enabled = False
+    user = SimpleNamespace(id=1, username="loadtest", role="admin", is_admin=True, is_active=True)
+    for name in ("get_current_user", "require_auth", "require_editor", "require_admin"):
+        dependency = getattr(auth, name, None)
+        if dependency is not None:
+            app.dependency_overrides[dependency] = lambda: user
+
+
+async def run_load(
+    app,
+    duration: float = 30.0,
+    concurrency: int = 8,
+    write_ratio: float = 0.1,
+    seed: int = 42,
+) -> LoadReport:
+    """Drive the app with `concurrency` clients for `duration` seconds"""
+    rng = random.Random(seed)
+    reads = [e for e in READ_ENDPOINTS for _ in range(e.weight)]
+    writes = [e for e in WRITE_ENDPOINTS for _ in range(e.weight)]
+    report = LoadReport(duration=duration)
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://isaac.test", timeout=60.0) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(worker_rng: random.Random) -> None:
+            while time.perf_counter() < deadline:
+                pool = writes if writes and worker_rng.random() < write_ratio else reads
+                endpoint = worker_rng.choice(pool)
+                body = endpoint.body(worker_rng) if endpoint.body else None
+                started = time.perf_counter()
+                try:
+                    response = await client.request(endpoint.method, endpoint.path(worker_rng), json=body)
+                    # A 4xx is a broken workload or a rejected request, not a fast success
+                    failed = None if 200 <= response.status_code < 400 else str(response.status_code)
+                except Exception:
+                    failed = "exception"
+                report.latencies[endpoint.name].append((time.perf_counter() - started) * 1000)
+                if failed:
+                    report.errors[endpoint.name] += 1
+                    report.error_statuses[endpoint.name][failed] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(random.Random(rng.random())) for _ in range(concurrency)))
+        report.duration = time.perf_counter() - started
+
+    return report
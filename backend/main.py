@@ -4,9 +4,7 @@ Main FastAPI Application
 """
 
 from contextlib import asynccontextmanager
-from collections import defaultdict
 import time
-import asyncio
 import pathlib
 from datetime import datetime, timedelta
 from fastapi import FastAPI, Request, Depends
@@ -17,8 +15,18 @@ from loguru import logger
 import sys
 from sqlalchemy import select
 from services.encryption import is_value_decryptable
-from services.email import EmailService, ConfigurationError
 from models.settings import AppSetting
+from services.blocking_io import io_pool, loop_monitor
+from services.settings_cache import settings_cache
+from services.rate_limit import create_rate_limit_store
+from services.leader import LeaderElection, detect_workers
+from services.job_metrics import job_metrics
+from services.weather_poller import AdaptiveWeatherPoller, evaluate_alerts as evaluate_weather_alerts
+from services.mail_queue import enqueue_email, mail_worker
+from services import http_responses
+from services.http_responses import FastJSONResponse, ResponseOptimizationMiddleware
+from services.caldav_incremental import caldav_sync
+from services.care_horizon import bind as bind_care_horizon, care_horizon
 
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
@@ -40,6 +48,17 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class LoopLagMiddleware(BaseHTTPMiddleware):
+    """Track in-flight requests so the loop lag monitor can name what blocked the event loop"""
+    async def dispatch(self, request: Request, call_next):
+        key = id(request)
+        loop_monitor.request_started(key, f"{request.method} {request.url.path}")
+        try:
+            return await call_next(request)
+        finally:
+            loop_monitor.request_finished(key)
+
+
 class TrailingSlashMiddleware(BaseHTTPMiddleware):
     """Normalize all paths to have trailing slashes to match router definitions"""
     async def dispatch(self, request: Request, call_next):
@@ -138,12 +157,15 @@ class LocalNetworkOnlyMiddleware(BaseHTTPMiddleware):
         return await call_next(request)
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple in-memory rate limiter per client IP.
+    """Simple rate limiter per client IP.
 
     Limits:
     - 200 total requests per minute per IP (GET + write)
     - 60 write requests (POST/PUT/DELETE/PATCH) per minute per IP
     - Auth endpoints excluded (handled by account lockout in auth.py)
+
+    State lives in memory for a single worker and in a shared SQLite store when
+    uvicorn runs several workers (see services/rate_limit.py).
     """
     GLOBAL_LIMIT = 200   # total requests per window
     WRITE_LIMIT = 60     # write requests per window
@@ -151,56 +173,47 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
 
     def __init__(self, app):
         super().__init__(app)
-        self._requests = defaultdict(list)
-        self._writes = defaultdict(list)
-        self._last_cleanup = time.monotonic()
+        self._store = create_rate_limit_store(self.WINDOW)
 
     async def dispatch(self, request: Request, call_next):
+        if not settings.rate_limit_enabled:
+            return await call_next(request)
+
         client_ip = request.client.host if request.client else "unknown"
-        now = time.monotonic()
-        cutoff = now - self.WINDOW
-
-        # Periodic cleanup of stale IPs (every 5 minutes)
-        if now - self._last_cleanup > 300:
-            stale = [ip for ip, ts in self._requests.items() if not ts or ts[-1] < cutoff]
-            for ip in stale:
-                self._requests.pop(ip, None)
-                self._writes.pop(ip, None)
-            self._last_cleanup = now
-
-        # Clean old entries for this IP
-        reqs = self._requests[client_ip]
-        self._requests[client_ip] = [t for t in reqs if t > cutoff]
-
-        # Check global limit
-        if len(self._requests[client_ip]) >= self.GLOBAL_LIMIT:
-            logger.warning(f"Rate limit exceeded for {client_ip}: {len(self._requests[client_ip])} requests/min")
+        is_write = request.method in ("POST", "PUT", "DELETE", "PATCH")
+        if self._store.blocking:
+            # The shared store is a SQLite file; keep its lock waits off the event loop
+            exceeded = await io_pool.run(
+                self._store.check_and_record, client_ip, is_write, self.GLOBAL_LIMIT, self.WRITE_LIMIT
+            )
+        else:
+            exceeded = self._store.check_and_record(client_ip, is_write, self.GLOBAL_LIMIT, self.WRITE_LIMIT)
+
+        if exceeded == "global":
+            logger.warning(f"Rate limit exceeded for {client_ip}: {self.GLOBAL_LIMIT} requests/min")
             return JSONResponse(
                 status_code=429,
                 content={"detail": "Too many requests. Please try again later."},
                 headers={"Retry-After": str(self.WINDOW)}
             )
 
-        # Check write limit
-        if request.method in ("POST", "PUT", "DELETE", "PATCH"):
-            writes = self._writes[client_ip]
-            self._writes[client_ip] = [t for t in writes if t > cutoff]
-            if len(self._writes[client_ip]) >= self.WRITE_LIMIT:
-                logger.warning(f"Write rate limit exceeded for {client_ip}: {len(self._writes[client_ip])} writes/min")
-                return JSONResponse(
-                    status_code=429,
-                    content={"detail": "Too many write requests. Please try again later."},
-                    headers={"Retry-After": str(self.WINDOW)}
-                )
-            self._writes[client_ip].append(now)
+        if exceeded == "write":
+            logger.warning(f"Write rate limit exceeded for {client_ip}: {self.WRITE_LIMIT} writes/min")
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many write requests. Please try again later."},
+                headers={"Retry-After": str(self.WINDOW)}
+            )
 
-        self._requests[client_ip].append(now)
         return await call_next(request)
 
 
 from config import settings
-from models.database import init_db
+from models.database import init_db, async_session, engine
+from services.calendar_buckets import ensure_calendar_index
+from services.search_index import ensure_search_index
 from services.scheduler import SchedulerService
+from services.storage_monitor import storage_monitor
 from routers import (
     plants_router,
     animals_router,
@@ -226,6 +239,25 @@ from routers import (
     chat_router,
     setup_router,
 )
+from changes import router as changes_router
+from search import router as search_router
+from weather_history import router as weather_history_router
+from app_logs import router as app_logs_router
+from db_sync import router as db_sync_router
+from outbound_email import router as outbound_email_router
+from budget_import import router as budget_import_router
+from services import statement_import
+from services.statement_import import statement_pool
+from plant_import import router as plant_import_router
+from services.plant_import_client import plant_import_client
+from images import router as images_router
+from services import image_derivatives
+from sun_moon import router as sun_moon_router
+from services.ephemeris import ephemeris
+from finance_summary import router as finance_summary_router
+from services import finance_aggregates
+from services import change_feed
+from services.weather_downsample import history_cache
 from routers.settings import get_setting
 from routers.auth import require_admin
 
@@ -256,65 +288,59 @@ logger.add(
     level="DEBUG",
 )
 
-# Scheduler instance
+# Scheduler instance - only the elected leader worker starts it
 scheduler = SchedulerService()
+leader = LeaderElection(settings.data_dir / "scheduler.lock")
+weather_poller = AdaptiveWeatherPoller(on_flush=evaluate_weather_alerts)
 
 
-async def _send_encryption_error_email(db, error_keys: list) -> None:
-    """Send encryption error notification email with timeout.
+async def _queue_encryption_error_email(db, error_keys: list) -> None:
+    """Queue the encryption error notification email.
 
-    Fire-and-forget task scheduled during startup. Logs if it fails but does not
-    block startup. If successful, updates the notification timestamp in the database.
+    Only writes a row to the outbound mail queue; the mail worker delivers it, so
+    startup never waits on SMTP.
     """
-    from routers.settings import get_setting
-    from models.database import async_session
-
     try:
-        async def send_and_update():
-            try:
-                email_service = await EmailService.get_configured_service(db)
-                admin_email = await get_setting(db, "admin_email")
-                if admin_email:
-                    error_list = ", ".join(error_keys)
-                    body = (
-                        f"Isaac encryption audit detected {len(error_keys)} "
-                        f"encrypted settings that cannot be decrypted:\n\n"
-                        f"{error_list}\n\n"
-                        f"Recovery options:\n"
-                        f"1. Restore SECRET_KEY from backup\n"
-                        f"2. Re-enter these settings in Settings > Passwords\n"
-                        f"3. Run: python -m backend.admin rotate-key --reset-encrypted (DESTRUCTIVE)\n\n"
-                        f"Log into Isaac and visit Settings to address this issue."
-                    )
-                    await asyncio.wait_for(
-                        email_service.send_email(
-                            subject="[Isaac] Encryption Audit: Unreadable Settings",
-                            body=body,
-                            to=admin_email,
-                            html=False,
-                            no_prefix=True,
-                        ),
-                        timeout=10.0
-                    )
-                    logger.info("Sent encryption error notification email")
-            except asyncio.TimeoutError:
-                logger.warning("Encryption error email send timed out (10s)")
-            except ConfigurationError:
-                logger.debug("Email not configured; skipping encryption error notification")
-            except Exception as e:
-                logger.warning(f"Failed to send encryption error email: {e}")
-
-        await send_and_update()
+        admin_email = await settings_cache.get(db, "admin_email")
+        if not admin_email:
+            return
+        error_list = ", ".join(error_keys)
+        body = (
+            f"Isaac encryption audit detected {len(error_keys)} "
+            f"encrypted settings that cannot be decrypted:\n\n"
+            f"{error_list}\n\n"
+            f"Recovery options:\n"
+            f"1. Restore SECRET_KEY from backup\n"
+            f"2. Re-enter these settings in Settings > Passwords\n"
+            f"3. Run: python -m backend.admin rotate-key --reset-encrypted (DESTRUCTIVE)\n\n"
+            f"Log into Isaac and visit Settings to address this issue."
+        )
+        await enqueue_email(
+            db,
+            subject="[Isaac] Encryption Audit: Unreadable Settings",
+            body=body,
+            to=admin_email,
+            html=False,
+            no_prefix=True,
+        )
+        await db.commit()
+        logger.info("Queued encryption error notification email")
     except Exception as e:
-        logger.warning(f"Encryption error email task failed: {e}")
+        logger.warning(f"Failed to queue encryption error email: {e}")
+
+
+async def _prune_change_feed() -> None:
+    async with async_session() as db:
+        removed = await change_feed.prune(db)
+    if removed:
+        logger.info(f"Change feed: pruned {removed} old tombstones")
 
 
 async def _run_encryption_audit(app: FastAPI):
     """Audit encrypted settings at startup; populate app.state.encryption_errors.
 
-    If errors found and no recent notification (24h), schedule fire-and-forget email alert.
+    If errors found and no recent notification (24h), queue an email alert.
     """
-    from routers.settings import get_setting
     from models.database import async_session
 
     app.state.encryption_errors = []
@@ -348,7 +374,7 @@ async def _run_encryption_audit(app: FastAPI):
                 # Check if we should send a notification email (once per 24h)
                 should_notify = True
                 try:
-                    last_notified_str = await get_setting(db, "last_encryption_error_notified_at")
+                    last_notified_str = await settings_cache.get(db, "last_encryption_error_notified_at")
                     if last_notified_str:
                         try:
                             last_notified = datetime.fromisoformat(last_notified_str)
@@ -359,9 +385,10 @@ async def _run_encryption_audit(app: FastAPI):
                 except Exception as e:
                     logger.debug(f"Could not check encryption notification timestamp: {e}; sending alert anyway")
 
-                if should_notify:
-                    # Fire-and-forget: schedule email task without blocking startup
-                    asyncio.create_task(_send_encryption_error_email(db, app.state.encryption_errors))
+                # Every worker audits, but only the leader sends mail so N workers don't send N emails
+                if should_notify and leader.is_leader:
+                    # Queued, not sent: the mail worker delivers it after startup
+                    await _queue_encryption_error_email(db, app.state.encryption_errors)
 
                     # Update timestamp immediately so duplicate emails don't spam
                     try:
@@ -392,6 +419,16 @@ async def lifespan(app: FastAPI):
 
     # Initialize database
     await init_db()
+    async with engine.begin() as conn:
+        await ensure_calendar_index(conn)
+        await ensure_search_index(conn)
+        await change_feed.ensure_autoincrement(conn)
+    async with async_session() as db:
+        await change_feed.ensure_backfilled(db)
+        await finance_aggregates.ensure_built(db)
+    statement_import.bind()
+    if settings.care_horizon_enabled:
+        bind_care_horizon()  # a renamed schedule column stops startup, not every pass
     logger.info("Database initialized")
 
     # Verify encryption probe — check decryptability of all encrypted settings
@@ -418,20 +455,110 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Encryption probe skipped (no encrypted data or probe error): {e}")
 
+    # Share settings-cache invalidations between workers
+    if settings.workers > 1:
+        settings_cache.stamp_path = settings.data_dir / "settings.stamp"
+
+    # Decide leadership before the audit so only one worker sends its notification
+    leader.try_acquire()
+
     # Run encryption audit
     await _run_encryption_audit(app)
 
-    # Start scheduler
-    scheduler.bind_app(app)
-    await scheduler.start()
-    logger.info("Scheduler started")
+    def _pause_replaced_job(job_id: str, replacement: str) -> None:
+        job = scheduler.scheduler.get_job(job_id)
+        if job is None:
+            known = ", ".join(sorted(j.id for j in scheduler.scheduler.get_jobs()))
+            logger.warning(f"No scheduler job '{job_id}' to pause for {replacement}; jobs are: {known}")
+            return
+        job.pause()
+        logger.info(f"Paused scheduler job '{job_id}'; replaced by {replacement}")
+
+    # Start scheduler on the leader; followers take over if the leader process dies
+    async def start_leader_services():
+        scheduler.bind_app(app)
+        await scheduler.start()
+        # Per-job durations/failures/misfires plus max_instances and coalesce policies
+        job_metrics.attach(scheduler.scheduler)
+        logger.info("Scheduler started")
+
+        # Deliver queued email over one pooled SMTP session
+        mail_worker.start()
+
+        if settings.weather_adaptive_polling:
+            # The adaptive poller owns weather ingestion; pause only the fixed-interval poll
+            _pause_replaced_job(settings.weather_poll_job_id, "adaptive weather polling")
+            await weather_poller.start()
+
+        if settings.caldav_incremental_sync:
+            # Incremental sync replaces the full-comparison calendar job
+            _pause_replaced_job(settings.caldav_sync_job_id, "incremental CalDAV sync")
+            async with async_session() as db:
+                interval = await settings_cache.get_int(db, "calendar_sync_interval", 15)
+            scheduler.scheduler.add_job(
+                caldav_sync.run_job, "interval", minutes=max(1, interval), args=[app],
+                id="caldav_incremental_sync", replace_existing=True,
+            )
+
+        # Tombstones only need to outlive the slowest client's polling gap
+        scheduler.scheduler.add_job(
+            _prune_change_feed, "interval", hours=24, id="change_feed_prune", replace_existing=True,
+        )
+
+        # Thumbnails for uploads that predate the pipeline or missed their first request
+        scheduler.scheduler.add_job(
+            image_derivatives.backfill, "interval", minutes=max(1, settings.image_derivative_interval),
+            id="image_derivatives", replace_existing=True, next_run_time=datetime.now(),
+        )
+
+        if settings.care_horizon_enabled:
+            # Watermarked generator replaces full-scan care reminder generation
+            _pause_replaced_job(settings.care_reminder_job_id, "the care reminder horizon")
+            scheduler.scheduler.add_job(
+                care_horizon.run_pass, "interval", minutes=settings.care_horizon_interval,
+                id="care_horizon", replace_existing=True, next_run_time=datetime.now(),
+            )
+
+    async def stop_leader_services():
+        await mail_worker.stop()
+        await weather_poller.stop()
+        job_metrics.detach()
+        await scheduler.stop()
+
+    await leader.start(start_leader_services, stop_leader_services)
+
+    # A year of sun/moon values in one pass, so the dashboard never computes astronomy per request
+    try:
+        async with async_session() as db:
+            await ephemeris.table(db)
+    except Exception as e:
+        logger.warning(f"Ephemeris precompute failed; will retry on first request: {e}")
+
+    # Log handlers that stall the event loop; sample storage sizes in the background
+    loop_monitor.start()
+    storage_monitor.start()
 
     yield
 
     # Shutdown
     logger.info("Shutting down...")
-    await scheduler.stop()
-
+    await storage_monitor.stop()
+    await leader.stop()
+    await loop_monitor.stop()
+    io_pool.shutdown()
+    statement_pool.shutdown()
+    await plant_import_client.close()
+
+
+# WORKERS must match uvicorn --workers: with a lower value each worker keeps its own
+# rate-limit windows and caches and several would run the scheduler's side effects
+_detected_workers = detect_workers()
+if _detected_workers and _detected_workers != settings.workers:
+    logger.warning(
+        f"WORKERS={settings.workers} but uvicorn runs {_detected_workers} workers; "
+        f"using {_detected_workers} for leader election, rate limits and caches"
+    )
+    settings.workers = _detected_workers
 
 # Create application - disable docs in production
 _docs_url = "/docs" if settings.is_dev_instance else None
@@ -443,6 +570,7 @@ app = FastAPI(
     lifespan=lifespan,
     docs_url=_docs_url,
     redoc_url=_redoc_url,
+    default_response_class=FastJSONResponse,
 )
 
 # Security headers - add protective headers to all responses
@@ -457,6 +585,12 @@ app.add_middleware(LocalNetworkOnlyMiddleware)
 # Trailing slash middleware - normalize URLs
 app.add_middleware(TrailingSlashMiddleware)
 
+# ETag/304 and gzip/brotli for JSON GET responses
+app.add_middleware(ResponseOptimizationMiddleware)
+
+# Event-loop lag attribution - outermost of our middleware so it sees the whole request
+app.add_middleware(LoopLagMiddleware)
+
 # CORS middleware - allow frontend access from known local origins
 # Using explicit origins instead of "*" to safely allow credentials
 _cors_origins = [
@@ -480,10 +614,14 @@ if setup_router:
     app.include_router(setup_router)  # Setup wizard (deleted after use)
 app.include_router(auth_router)  # Auth first
 app.include_router(dashboard_router)
+app.include_router(images_router)
+app.include_router(plant_import_router)  # before plants_router so /plants/import/bulk/ isn't shadowed
 app.include_router(plants_router)
 app.include_router(animals_router)
 app.include_router(lists_router)
 app.include_router(tasks_router)
+app.include_router(weather_history_router)  # before weather_router so /weather/history/series isn't shadowed
+app.include_router(sun_moon_router)  # before weather_router so /weather/sun-moon/ isn't shadowed
 app.include_router(weather_router)
 app.include_router(seeds_router)
 app.include_router(settings_router)
@@ -500,8 +638,15 @@ if customer_feedback_router:  # Only in dev/private builds
     app.include_router(customer_feedback_router)
 app.include_router(team_router)
 app.include_router(garden_router)
+app.include_router(budget_import_router)  # before budget_router so /budget/import/statement/ isn't shadowed
 app.include_router(budget_router)
+app.include_router(finance_summary_router)
 app.include_router(chat_router)
+app.include_router(changes_router)
+app.include_router(search_router)
+app.include_router(app_logs_router)
+app.include_router(db_sync_router)
+app.include_router(outbound_email_router)
 
 
 @app.get("/")
@@ -533,6 +678,7 @@ async def health_check():
     return {
         "status": "healthy",
         "scheduler_running": scheduler.scheduler.running,
+        "scheduler_leader": leader.is_leader,
         "has_encryption_errors": bool(getattr(app.state, "encryption_errors", [])),
     }
 
@@ -546,6 +692,18 @@ async def health_check_admin(user=Depends(require_admin)):
         "encryption_errors": getattr(app.state, "encryption_errors", []),
         "caldav_last_success_at": getattr(app.state, "caldav_last_success_at", None),
         "caldav_silence_severity": getattr(app.state, "caldav_silence_severity", "ok"),
+        "scheduler_jobs": job_metrics.snapshot(),
+        "weather_poller": weather_poller.status(),
+        "mail_queue": mail_worker.status(),
+        "care_horizon": care_horizon.status(),
+        "leader": leader.status(),
+        "settings_cache_version": settings_cache.version,
+        "io_pool": io_pool.stats(),
+        "responses": http_responses.stats,
+        "weather_history_cache": history_cache.stats,
+        "plant_import": plant_import_client.stats,
+        "ephemeris": ephemeris.stats(),
+        "event_loop": loop_monitor.stats(),
     }
 
 
@@ -557,4 +715,5 @@ if __name__ == "__main__":
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
+        workers=settings.workers,
     )
@@ -0,0 +1,34 @@
+"""
+CalDAV incremental sync state
+Remembers the collection ctag/sync-token and one ETag per pushed task so each sync run
+only touches what changed on either side.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime
+
+from models.database import Base
+
+
+class CalDAVSyncState(Base):
+    """Per-collection sync cursor"""
+    __tablename__ = "caldav_sync_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    collection_url = Column(String(1000), unique=True, nullable=False)
+    ctag = Column(String(255), nullable=True)
+    sync_token = Column(String(1000), nullable=True)
+    last_sync_at = Column(DateTime, nullable=True)
+
+
+class CalDAVTaskETag(Base):
+    """Remote copy of one task: where it lives, its ETag, and which local version it reflects"""
+    __tablename__ = "caldav_task_etags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, unique=True, nullable=False, index=True)
+    href = Column(String(1000), unique=True, nullable=False)
+    etag = Column(String(255), nullable=True)
+    synced_updated_at = Column(DateTime, nullable=True)
+    synced_at = Column(DateTime, default=datetime.utcnow)
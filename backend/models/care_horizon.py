@@ -0,0 +1,48 @@
+"""
+Care-schedule reminder horizon
+One watermark per (plant/animal, schedule) recording what has been materialized as
+reminder tasks, so the generator only touches schedules that changed or whose next
+occurrence entered the horizon.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index, UniqueConstraint
+
+from models.database import Base
+
+
+class CareScheduleWatermark(Base):
+    """Generated-through watermark for one recurring care schedule"""
+    __tablename__ = "care_schedule_watermarks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_type = Column(String(20), nullable=False)  # animal, plant
+    source_id = Column(Integer, nullable=False)
+    schedule_key = Column(String(50), nullable=False)  # worming, farrier, fertilizing, ...
+
+    # Hash of the schedule definition (anchor date, frequency, name); a change regenerates
+    definition_hash = Column(String(40), nullable=False)
+    frequency_days = Column(Integer, nullable=True)  # None for one-off dates
+    generated_through = Column(Date, nullable=True)
+    next_due = Column(Date, nullable=True)  # first occurrence not yet materialized
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("source_type", "source_id", "schedule_key", name="uq_care_schedule"),
+        Index("ix_care_schedule_next_due", "next_due"),
+    )
+
+
+class CareOccurrence(Base):
+    """A materialized occurrence and the reminder task created for it"""
+    __tablename__ = "care_occurrences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    watermark_id = Column(Integer, ForeignKey("care_schedule_watermarks.id", ondelete="CASCADE"), nullable=False)
+    due_date = Column(Date, nullable=False)
+    task_id = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("watermark_id", "due_date", name="uq_care_occurrence"),
+    )
@@ -0,0 +1,38 @@
+"""
+Change feed log
+One row per changed record (the latest change wins) keyed by a monotonic sequence, so
+clients can ask for everything after the last sequence they saw.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, Index
+
+from models.database import Base
+
+
+class ChangeLogEntry(Base):
+    """Latest change to one record, or a whole-collection reset after a bulk statement"""
+    __tablename__ = "change_log"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(50), nullable=False)  # plants, animals, tasks, ...
+    row_id = Column(Integer, nullable=True)  # None for op == "reset"
+    op = Column(String(10), nullable=False)  # upsert, delete, reset
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_change_log_entity_row", "entity", "row_id"),
+        # Writes delete a record's previous entry before inserting the new one; without
+        # AUTOINCREMENT SQLite hands the deleted (highest) seq out again and clients skip it
+        {"sqlite_autoincrement": True},
+    )
+
+
+class ChangeFeedState(Base):
+    """Single row: backfill marker and how far tombstones have been pruned"""
+    __tablename__ = "change_feed_state"
+
+    id = Column(Integer, primary_key=True)
+    backfilled_at = Column(DateTime, nullable=True)
+    pruned_through = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,43 @@
+"""
+Materialized finance aggregates
+Monthly totals per source (budget transactions, expenses, sales, orders), account,
+category and enterprise, maintained on every write so summaries and charts never scan
+the raw ledgers.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, UniqueConstraint
+
+from models.database import Base
+
+
+class FinanceMonthlyAggregate(Base):
+    """Totals for one source, month and (account, category, enterprise) group"""
+    __tablename__ = "finance_monthly_aggregates"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(30), nullable=False)  # budget, expenses, animal_expenses, sales, orders
+    month = Column(String(7), nullable=False)  # YYYY-MM
+    account_id = Column(Integer, default=0, nullable=False)  # 0 when the source has no account
+    category = Column(String(100), default="", nullable=False)  # category id or name, as stored
+    enterprise = Column(String(100), default="", nullable=False)  # production expense scope; "" elsewhere
+
+    total = Column(Float, default=0.0, nullable=False)  # net; spending is negative
+    inflow = Column(Float, default=0.0, nullable=False)  # money in
+    outflow = Column(Float, default=0.0, nullable=False)  # money out, as a negative sum (<= 0)
+    count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("source", "month", "account_id", "category", "enterprise", name="uq_finance_monthly_group"),
+        Index("ix_finance_monthly_month", "month", "source"),
+    )
+
+
+class FinanceAggregateState(Base):
+    """Single row: when the aggregates were last fully rebuilt, and by which definition"""
+    __tablename__ = "finance_aggregate_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    rebuilt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,36 @@
+"""
+Image derivatives
+Thumbnail and medium WebP variants of uploaded photos and receipts, stored under
+content-hash names so they can be cached by clients forever.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, UniqueConstraint
+
+from models.database import Base
+
+
+class ImageDerivative(Base):
+    """Derived variants for one uploaded image, keyed by upload kind and filename"""
+    __tablename__ = "image_derivatives"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(30), nullable=False)  # plants, animals, seeds, journal, team, receipts
+    filename = Column(String(255), nullable=False)
+
+    # Source identity at derivation time; a change re-derives
+    source_size = Column(Integer, nullable=False)
+    source_mtime = Column(Float, nullable=False)
+
+    content_hash = Column(String(32), nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    variants = Column(Text, nullable=True)  # JSON: {"thumb": {"width", "height", "bytes"}, ...}
+    error = Column(String(255), nullable=True)  # unreadable source; not retried until it changes
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("kind", "filename", name="uq_image_derivatives_kind_filename"),
+    )
@@ -0,0 +1,39 @@
+"""
+Outbound mail queue
+Emails are queued here and delivered by services.mail_queue so request handlers and
+startup never wait on SMTP.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Index
+
+from models.database import Base
+
+
+class OutboundEmail(Base):
+    """A queued email awaiting (or finished with) delivery"""
+    __tablename__ = "outbound_emails"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    body = Column(Text, nullable=False)
+    html = Column(Boolean, default=False)
+    no_prefix = Column(Boolean, default=False)
+
+    # Messages sharing a coalesce key (e.g. "weather_alert") within the window go out as one digest
+    coalesce_key = Column(String(100), nullable=True)
+
+    status = Column(String(20), default="pending", nullable=False)  # pending, sent, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    digest_id = Column(Integer, nullable=True)  # id of the row whose send carried this one
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbound_emails_status_next", "status", "next_attempt_at"),
+    )
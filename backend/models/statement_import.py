@@ -0,0 +1,24 @@
+"""
+Memoized bank statement text
+Raw per-page text keyed by the uploaded file's SHA-256, so re-uploading a statement skips
+the PDF extraction. Categories and duplicate flags are not stored: they depend on the
+rules and transactions at upload time.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime
+
+from models.database import Base
+
+
+class StatementTextCache(Base):
+    """Extracted page text for one statement file"""
+    __tablename__ = "statement_text_cache"
+
+    file_hash = Column(String(64), primary_key=True)
+    extractor_version = Column(Integer, nullable=False)
+    pages = Column(Integer, nullable=False)
+    texts = Column(Text, nullable=False)  # JSON list of page text, in page order
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
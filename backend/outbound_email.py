@@ -0,0 +1,55 @@
+"""
+Outbound Email API Routes
+Inspect the mail queue: what is waiting, what went out, and why sends failed
+"""
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import get_db
+from models.mail_queue import OutboundEmail
+from routers.auth import require_admin
+from services.pagination import PageParams, page_params, paginate
+
+
+router = APIRouter(prefix="/mail-queue", tags=["Email"])
+
+
+class OutboundEmailResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    to: str
+    subject: str
+    coalesce_key: Optional[str] = None
+    status: str
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    digest_id: Optional[int] = None
+    created_at: datetime
+    sent_at: Optional[datetime] = None
+
+
+@router.get("/")
+async def list_outbound_emails(
+    status: Optional[Literal["pending", "sent", "failed"]] = Query(None),
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(require_admin),
+):
+    """List queued and delivered emails, newest first.
+
+    Pass `next_cursor` back as `cursor` for the next page; `fields` narrows each item.
+    """
+    query = select(OutboundEmail)
+    if status:
+        query = query.where(OutboundEmail.status == status)
+    return await paginate(
+        db, query, page, sort=[OutboundEmail.created_at.desc()], response_model=OutboundEmailResponse,
+    )
@@ -0,0 +1,33 @@
+"""
+Plant Bulk Import API Routes
+Preview many PFAF / Permapeople plant records in one request, fetched concurrently
+through the cached import client
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
+from routers.auth import require_auth
+from services.plant_import_client import MAX_BULK, plant_import_client
+
+
+router = APIRouter(prefix="/plants/import", tags=["Plants"])
+
+
+class BulkImportRequest(BaseModel):
+    urls: list[str]
+
+
+@router.post("/bulk/preview/")
+async def preview_bulk_import(body: BulkImportRequest, user=Depends(require_auth)):
+    """Parsed records for up to MAX_BULK source URLs; each result has `record` or `error`"""
+    if not body.urls:
+        raise HTTPException(status_code=400, detail="No URLs given")
+    if len(body.urls) > MAX_BULK:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK} plants per bulk import")
+    results = await plant_import_client.records(body.urls)
+    return {
+        "results": results,
+        "imported": sum(1 for r in results if "record" in r),
+        "failed": sum(1 for r in results if "error" in r),
+    }
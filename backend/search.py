@@ -0,0 +1,40 @@
+"""
+Search API Routes
+Ranked, highlighted full-text search across plants, animals, tasks, seeds, equipment,
+vehicles and journal entries
+"""
+
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import get_db
+from routers.auth import require_auth
+from services import search_index
+
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.get("/")
+async def global_search(
+    q: str = Query(..., min_length=1, max_length=200),
+    entities: Optional[str] = Query(None, description="Comma-separated subset, e.g. plants,seeds"),
+    limit: int = Query(search_index.DEFAULT_LIMIT, ge=1, le=search_index.MAX_LIMIT),
+    db: AsyncSession = Depends(get_db),
+    user=Depends(require_auth),
+):
+    """Search every indexed entity; the last word matches as a prefix so results update while typing.
+
+    `title` and `snippet` are HTML-escaped with matches wrapped in <mark>.
+    """
+    started = time.perf_counter()
+    wanted = {e.strip() for e in entities.split(",") if e.strip()} if entities else None
+    results = await search_index.search(db, q, entities=wanted, limit=limit)
+    return {
+        "query": q,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        "results": results,
+    }
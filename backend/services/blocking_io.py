@@ -0,0 +1,158 @@
+"""
+Shared blocking-I/O worker pool and event-loop lag monitor.
+Filesystem calls (iterdir, stat, unlink) on a slow SD card must not run on the event loop;
+route them through `io_pool.run()` so every request keeps moving.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from loguru import logger
+
+
+T = TypeVar("T")
+
+IO_MAX_WORKERS = 4
+IO_MAX_QUEUE = 64  # callers beyond workers + queue wait for a slot (backpressure)
+LAG_CHECK_INTERVAL = 0.5  # seconds
+LAG_WARN_THRESHOLD = 0.25  # seconds the loop may stall before we log it
+
+
+class BlockingIOPool:
+    """Bounded thread pool for blocking filesystem work, with basic instrumentation"""
+
+    def __init__(self, max_workers: int = IO_MAX_WORKERS, max_queue: int = IO_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._max_queued = 0
+        self._max_task_ms = 0.0
+        self._recent_ms: deque[float] = deque(maxlen=500)
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="isaac-io")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+
+    def _instrumented(self, fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        started = time.perf_counter()
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._running -= 1
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+                self._recent_ms.append(elapsed_ms)
+                self._max_task_ms = max(self._max_task_ms, elapsed_ms)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `fn` on the pool and await its result"""
+        self._ensure_started()
+        async with self._slots:
+            with self._lock:
+                self._queued += 1
+                self._max_queued = max(self._max_queued, self._queued)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._instrumented, fn, args, kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent_ms)
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "max_queue_depth": self._max_queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "task_ms_p50": round(recent[len(recent) // 2], 2) if recent else None,
+                "task_ms_max": round(self._max_task_ms, 2),
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._slots = None
+
+
+class LoopLagMonitor:
+    """Detects event-loop stalls by measuring how late a periodic sleep wakes up"""
+
+    def __init__(self, interval: float = LAG_CHECK_INTERVAL, threshold: float = LAG_WARN_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.stall_count = 0
+        self._in_flight: dict[int, tuple[str, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def request_started(self, key: int, label: str) -> None:
+        self._in_flight[key] = (label, time.monotonic())
+
+    def request_finished(self, key: int) -> None:
+        self._in_flight.pop(key, None)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.stall_count += 1
+                # Whatever was in flight across the stall is the likely culprit
+                suspects = ", ".join(label for label, _ in self._in_flight.values()) or "none in flight"
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms (requests: {suspects})")
+
+    def stats(self) -> dict:
+        return {
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stalls_over_threshold": self.stall_count,
+            "threshold_ms": round(self.threshold * 1000),
+        }
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+io_pool = BlockingIOPool()
+loop_monitor = LoopLagMonitor()
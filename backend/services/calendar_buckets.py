@@ -0,0 +1,233 @@
+"""
+Per-day calendar buckets for arbitrary date ranges.
+Expands recurring events into their occurrences, groups them by day, and keeps each
+month's buckets (plus a content hash used as its ETag) in memory until a task changes.
+"""
+
+from __future__ import annotations
+
+import calendar
+import hashlib
+import json
+from datetime import date, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import Index, event, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from config import settings
+from models.tasks import Task, TaskType
+
+
+MAX_RANGE_DAYS = 400
+MAX_CACHED_MONTHS = 48
+_PENDING_KEY = "calendar_buckets_pending"
+
+# Matches the range query: equality on task_type/is_active, range on due_date
+CALENDAR_INDEX = Index("ix_tasks_calendar_range", Task.task_type, Task.is_active, Task.due_date)
+
+# Recurrence value -> fixed step in days; monthly/quarterly/annually step by calendar months
+FIXED_STEPS = {"daily": 1, "weekly": 7, "biweekly": 14}
+MONTH_STEPS = {"monthly": 1, "quarterly": 3, "annually": 12}
+
+
+def _value(field: Any) -> Any:
+    return getattr(field, "value", field)
+
+
+def month_bounds(year: int, month: int) -> tuple[date, date]:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def months_between(start: date, end: date) -> list[tuple[int, int]]:
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _add_months(day: date, months: int, anchor_day: int) -> date:
+    index = day.month - 1 + months
+    year, month = day.year + index // 12, index % 12 + 1
+    return date(year, month, min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def _exceptions(task: Task) -> set[str]:
+    raw = getattr(task, "recurrence_exceptions", None) or []
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raw = []
+    return {str(d)[:10] for d in raw}
+
+
+def occurrence_dates(task: Task, start: date, end: date) -> list[date]:
+    """Dates in [start, end] on which `task` occurs"""
+    first = task.due_date
+    if first is None or first > end:
+        return []
+    recurrence = _value(getattr(task, "recurrence", None)) or "once"
+    until = getattr(task, "recurrence_end_date", None)
+    if until is not None and until < end:
+        end = until
+    if recurrence == "once":
+        return [first] if start <= first <= end else []
+
+    dates: list[date] = []
+    if recurrence in FIXED_STEPS or recurrence == "custom":
+        step = FIXED_STEPS.get(recurrence) or getattr(task, "recurrence_interval", None) or 1
+        # Jump straight to the first occurrence in range instead of walking from due_date
+        skip = max(0, (start - first).days + step - 1) // step
+        current = first + timedelta(days=skip * step)
+        while current <= end:
+            dates.append(current)
+            current += timedelta(days=step)
+    elif recurrence == "custom_weekly":
+        weekdays = set(getattr(task, "recurrence_days_of_week", None) or [first.weekday()])
+        current = max(start, first)
+        while current <= end:
+            if current.weekday() in weekdays:
+                dates.append(current)
+            current += timedelta(days=1)
+    elif recurrence in MONTH_STEPS:
+        step = MONTH_STEPS[recurrence]
+        n = max(0, ((start.year - first.year) * 12 + start.month - first.month) // step - 1)
+        current = _add_months(first, n * step, first.day)
+        while current <= end:
+            if current >= start:
+                dates.append(current)
+            n += 1
+            current = _add_months(first, n * step, first.day)
+    else:
+        return [first] if start <= first <= end else []
+
+    skipped = _exceptions(task)
+    return [d for d in dates if d.isoformat() not in skipped]
+
+
+def _entry(task: Task, day: date) -> dict:
+    recurring = (_value(getattr(task, "recurrence", None)) or "once") != "once"
+    return {
+        "id": task.id,
+        "title": task.title,
+        "category": task.category.value if task.category else "custom",
+        "priority": task.priority,
+        "due_time": task.due_time,
+        "end_time": task.end_time,
+        "is_completed": False if recurring else task.is_completed,
+        "is_recurring": recurring,
+        "occurrence_date": day.isoformat(),
+    }
+
+
+def content_hash(days: dict) -> str:
+    payload = json.dumps(days, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha1(payload.encode()).hexdigest()[:20] + '"'
+
+
+class CalendarBuckets:
+    """Month-granular cache of per-day event buckets"""
+
+    def __init__(self):
+        self.version = 0
+        self._months: dict[tuple[int, int], tuple[int, dict]] = {}
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self._months.clear()
+
+    async def _load(self, db: AsyncSession, start: date, end: date) -> dict[tuple[int, int], dict]:
+        """Build buckets for every month touching [start, end] with two index-range scans"""
+        events = (
+            select(Task)
+            .where(Task.task_type == TaskType.EVENT)
+            .where(Task.is_active == True)
+        )
+        recurrence = getattr(Task, "recurrence", None)
+        if recurrence is not None:
+            enum_class = getattr(recurrence.type, "enum_class", None)
+            once = enum_class("once") if enum_class else "once"
+            one_off = or_(recurrence.is_(None), recurrence == once)
+            single = events.where(one_off).where(Task.due_date >= start).where(Task.due_date <= end)
+            repeating = events.where(~one_off).where(Task.due_date <= end)
+            tasks = list((await db.execute(single)).scalars().all())
+            tasks += (await db.execute(repeating)).scalars().all()
+        else:
+            query = events.where(Task.due_date >= start).where(Task.due_date <= end)
+            tasks = list((await db.execute(query)).scalars().all())
+
+        months: dict[tuple[int, int], dict] = {m: {} for m in months_between(start, end)}
+        for task in tasks:
+            for day in occurrence_dates(task, start, end):
+                months[(day.year, day.month)].setdefault(day.isoformat(), []).append(_entry(task, day))
+
+        result = {}
+        for key, days in months.items():
+            for entries in days.values():
+                entries.sort(key=lambda e: (e["due_time"] or "", e["priority"] or 0, e["id"]))
+            result[key] = {"days": dict(sorted(days.items())), "etag": content_hash(days)}
+        return result
+
+    async def get_months(self, db: AsyncSession, start: date, end: date) -> dict[tuple[int, int], dict]:
+        """Whole-month buckets covering [start, end]; served from cache where possible"""
+        wanted = months_between(start, end)
+        version = self.version
+        cached = {m: entry[1] for m in wanted if (entry := self._months.get(m)) and entry[0] == version}
+        missing = [m for m in wanted if m not in cached]
+        if not missing:
+            return cached
+
+        loaded = await self._load(db, month_bounds(*missing[0])[0], month_bounds(*missing[-1])[1])
+        # Other workers' writes never reach this process's invalidation hooks
+        if settings.workers <= 1 and self.version == version:
+            if len(self._months) + len(missing) > MAX_CACHED_MONTHS:
+                self._months.clear()
+            for key in missing:
+                self._months[key] = (version, loaded[key])
+        return {m: cached.get(m) or loaded[m] for m in wanted}
+
+
+calendar_buckets = CalendarBuckets()
+
+
+async def ensure_calendar_index(conn) -> None:
+    """create_all() skips indexes on existing tables, so add this one explicitly"""
+    await conn.run_sync(lambda sync_conn: CALENDAR_INDEX.create(sync_conn, checkfirst=True))
+
+
+def _mark_pending(session: Optional[Session]) -> None:
+    if session is not None:
+        session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(Task, "after_insert")
+@event.listens_for(Task, "after_update")
+@event.listens_for(Task, "after_delete")
+def _task_written(mapper, connection, target) -> None:
+    _mark_pending(object_session(target))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _task_bulk_write(orm_execute_state) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is Task:
+        _mark_pending(orm_execute_state.session)
+
+
+# Invalidate only once the write is visible to other sessions; invalidating at flush time
+# let a concurrent reader re-cache the pre-commit month before the commit landed
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        calendar_buckets.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,390 @@
+"""
+Incremental care-schedule reminder generator.
+Materializes reminder tasks for plant/animal care schedules up to a rolling horizon and
+keeps a generated-through watermark per schedule. Each pass only looks at plants/animals
+updated since the previous pass (a full reconcile runs on the first pass after startup),
+regenerates schedules whose definition hash changed, and extends schedules whose next
+occurrence has entered the horizon - so cost follows changes, not herd or garden size.
+
+Reminders the legacy full-scan job already created (same plant/animal, category and due
+date, with the schedule named in the title) are adopted instead of duplicated. `bind()`
+checks every schedule's attributes against the mapped models at startup.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+from loguru import logger
+from sqlalchemy import delete, exists, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.care_horizon import CareOccurrence, CareScheduleWatermark
+
+
+ID_CHUNK = 500  # stay well under SQLite's bound-parameter limit
+
+
+class CareHorizonError(Exception):
+    """A care schedule names a model or column that doesn't exist"""
+
+
+@dataclass(frozen=True)
+class CareSpec:
+    """Where a schedule's next date and repeat interval live on the source row.
+
+    `keywords` identify this schedule's reminders in legacy task titles (lowercase).
+    """
+    key: str
+    label: str
+    date_attr: str
+    frequency_attr: Optional[str] = None
+    keywords: tuple[str, ...] = ()
+
+    def definition(self, row) -> Optional[tuple[date, Optional[int]]]:
+        anchor = getattr(row, self.date_attr, None)
+        if anchor is None or not getattr(row, "is_active", True):
+            return None
+        if isinstance(anchor, datetime):
+            anchor = anchor.date()
+        frequency = getattr(row, self.frequency_attr, None) if self.frequency_attr else None
+        return anchor, (int(frequency) if frequency and int(frequency) > 0 else None)
+
+
+ANIMAL_SCHEDULES = [
+    CareSpec("worming", "Worm", "next_worming_date", "worming_frequency_days", ("worm",)),
+    CareSpec("farrier", "Farrier", "next_farrier_date", "hoof_trim_frequency_days", ("farrier", "hoof")),
+    CareSpec("vaccination", "Vaccinate", "next_vaccination_date", "vaccination_frequency_days", ("vaccin",)),
+    CareSpec("dental", "Dental", "next_dental_date", "dental_frequency_days", ("dental", "teeth")),
+]
+
+# Plant fertilizing intervals are seasonal, so only the next computed date is materialized;
+# logging care moves next_fertilizing and regenerates it
+PLANT_SCHEDULES = [
+    CareSpec("fertilizing", "Fertilize", "next_fertilizing", keywords=("fertiliz",)),
+]
+
+# source_type, module.Class, schedules, reminder task foreign key, reminder task category
+SOURCES = (
+    ("animal", "models.livestock.Animal", ANIMAL_SCHEDULES, "animal_id", "animal_care"),
+    ("plant", "models.plants.Plant", PLANT_SCHEDULES, "plant_id", "plant_care"),
+)
+TASK_COLUMNS = ("id", "title", "category", "due_date", "is_completed")
+
+_bound: list[tuple[str, Any, list[CareSpec], str, str]] = []  # empty until bind()
+
+
+def bind() -> list[tuple[str, Any, list[CareSpec], str, str]]:
+    """Resolve SOURCES and check every schedule attribute; raises with all problems at once"""
+    from models.tasks import Task
+
+    bound, problems = [], []
+    task_columns = inspect(Task).columns
+    for source_type, path, specs, fk, category in SOURCES:
+        missing_task = [name for name in (*TASK_COLUMNS, fk) if name not in task_columns]
+        if missing_task:
+            problems.append(f"{source_type}: Task has no column {', '.join(missing_task)}")
+        module_name, _, class_name = path.rpartition(".")
+        try:
+            model = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as e:
+            problems.append(f"{source_type}: no model {path} ({e})")
+            continue
+        columns = inspect(model).columns
+        wanted = ["id", "name"] + [a for spec in specs for a in (spec.date_attr, spec.frequency_attr) if a]
+        missing = [name for name in wanted if name not in columns]
+        if missing:
+            problems.append(f"{source_type}: {path} has no column {', '.join(missing)}")
+        bound.append((source_type, model, specs, fk, category))
+    if problems:
+        raise CareHorizonError("Care schedules don't match the models:\n  " + "\n  ".join(problems))
+    _bound[:] = bound
+    return bound
+
+
+def _sources() -> list[tuple[str, Any, list[CareSpec], str, str]]:
+    return _bound or bind()
+
+
+def _chunks(items: list, size: int = ID_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def definition_hash(name: str, anchor: date, frequency: Optional[int]) -> str:
+    return hashlib.sha1(f"{name}|{anchor.isoformat()}|{frequency or ''}".encode()).hexdigest()
+
+
+def _advance(current: date, frequency: int, today: date) -> date:
+    """Next occurrence after `current`, skipping any that already lie in the past"""
+    current += timedelta(days=frequency)
+    if current < today:
+        current += timedelta(days=frequency * -(-(today - current).days // frequency))
+    return current
+
+
+def occurrences(next_due: date, frequency: Optional[int], today: date, through: date) -> list[date]:
+    """Dates from next_due up to `through`; an overdue anchor yields one reminder, not a backlog"""
+    dates = []
+    current = next_due
+    while current <= through:
+        dates.append(current)
+        if not frequency:
+            break
+        current = _advance(current, frequency, today)
+    return dates
+
+
+def _enum_value(enum_cls, value: str):
+    try:
+        return enum_cls(value)
+    except ValueError:
+        return value
+
+
+class CareHorizonGenerator:
+    """Keeps reminder tasks materialized through today + horizon_days"""
+
+    def __init__(self, horizon_days: Optional[int] = None, session_factory=None):
+        self.horizon_days = horizon_days or settings.care_horizon_days
+        self._session_factory = session_factory
+        self._last_scan: Optional[datetime] = None
+        self.stats = {
+            "passes": 0, "regenerated": 0, "removed": 0, "tasks_created": 0, "tasks_adopted": 0, "last_pass_ms": None,
+        }
+
+    async def _changed_rows(self, db: AsyncSession, model, full: bool) -> list:
+        query = select(model)
+        updated_at = getattr(model, "updated_at", None)
+        if not full and updated_at is not None:
+            query = query.where(updated_at >= self._last_scan)
+        return (await db.execute(query)).scalars().all()
+
+    async def _clear_pending(self, db: AsyncSession, watermark_ids: list[int]) -> None:
+        """Drop uncompleted reminders of a schedule; completed ones stay as history"""
+        from models.tasks import Task
+
+        for chunk in _chunks(watermark_ids):
+            rows = (await db.execute(
+                select(CareOccurrence.id, CareOccurrence.task_id)
+                .outerjoin(Task, Task.id == CareOccurrence.task_id)
+                .where(CareOccurrence.watermark_id.in_(chunk))
+                .where((Task.id.is_(None)) | (Task.is_completed == False))
+            )).all()
+            task_ids = [r.task_id for r in rows if r.task_id is not None]
+            for ids in _chunks(task_ids):
+                # Per-object deletes so the change feed records tombstones, not a collection reset
+                for task in (await db.execute(select(Task).where(Task.id.in_(ids)))).scalars().all():
+                    await db.delete(task)
+            for ids in _chunks([r.id for r in rows]):
+                await db.execute(delete(CareOccurrence).where(CareOccurrence.id.in_(ids)))
+
+    async def _drop(self, db: AsyncSession, watermarks: list[CareScheduleWatermark]) -> None:
+        if not watermarks:
+            return
+        ids = [w.id for w in watermarks]
+        await self._clear_pending(db, ids)
+        for chunk in _chunks(ids):
+            await db.execute(delete(CareOccurrence).where(CareOccurrence.watermark_id.in_(chunk)))
+            await db.execute(delete(CareScheduleWatermark).where(CareScheduleWatermark.id.in_(chunk)))
+        self.stats["removed"] += len(ids)
+
+    async def _reconcile(self, db: AsyncSession, source_type: str, specs: list[CareSpec], rows: list) -> int:
+        """Create/refresh watermarks for changed rows; returns the number regenerated"""
+        if not rows:
+            return 0
+        existing: dict[tuple[int, str], CareScheduleWatermark] = {}
+        for chunk in _chunks([r.id for r in rows]):
+            result = await db.execute(
+                select(CareScheduleWatermark)
+                .where(CareScheduleWatermark.source_type == source_type)
+                .where(CareScheduleWatermark.source_id.in_(chunk))
+            )
+            for w in result.scalars().all():
+                existing[(w.source_id, w.schedule_key)] = w
+
+        stale, regenerate = [], []
+        for row in rows:
+            for spec in specs:
+                watermark = existing.get((row.id, spec.key))
+                definition = spec.definition(row)
+                if definition is None:
+                    if watermark is not None:
+                        stale.append(watermark)
+                    continue
+                anchor, frequency = definition
+                digest = definition_hash(getattr(row, "name", "") or "", anchor, frequency)
+                if watermark is not None and watermark.definition_hash == digest:
+                    continue
+                if watermark is None:
+                    watermark = CareScheduleWatermark(source_type=source_type, source_id=row.id, schedule_key=spec.key)
+                    db.add(watermark)
+                regenerate.append(watermark)
+                watermark.definition_hash = digest
+                watermark.frequency_days = frequency
+                watermark.next_due = anchor
+                watermark.generated_through = None
+
+        await self._drop(db, stale)
+        await db.flush()
+        await self._clear_pending(db, [w.id for w in regenerate])
+        self.stats["regenerated"] += len(regenerate)
+        return len(regenerate)
+
+    async def _sweep_orphans(self, db: AsyncSession) -> None:
+        """Watermarks whose plant/animal was hard-deleted never show up as 'changed'"""
+        for source_type, model, _, _, _ in _sources():
+            result = await db.execute(
+                select(CareScheduleWatermark)
+                .where(CareScheduleWatermark.source_type == source_type)
+                .where(~exists().where(model.id == CareScheduleWatermark.source_id))
+            )
+            await self._drop(db, result.scalars().all())
+
+    async def _legacy_tasks(self, db: AsyncSession, due: list[CareScheduleWatermark], sources: dict) -> dict:
+        """Reminder tasks no occurrence owns yet, by (source_type, source_id, due_date)"""
+        from models.tasks import Task, TaskCategory
+
+        owned = exists().where(CareOccurrence.task_id == Task.id)
+        since = min(w.next_due for w in due)
+        legacy: dict[tuple[str, int, date], list] = {}
+        for source_type, (_, _, fk, category) in sources.items():
+            column = getattr(Task, fk)
+            ids = sorted({w.source_id for w in due if w.source_type == source_type})
+            for chunk in _chunks(ids):
+                result = await db.execute(
+                    select(Task)
+                    .where(column.in_(chunk))
+                    .where(Task.category == _enum_value(TaskCategory, category))
+                    .where(Task.due_date >= since)
+                    .where(~owned)
+                    .order_by(Task.id)
+                )
+                for task in result.scalars().all():
+                    legacy.setdefault((source_type, getattr(task, fk), task.due_date), []).append(task)
+        return legacy
+
+    @staticmethod
+    def _adopt(candidates: list, spec: CareSpec):
+        """Take the first candidate whose title names this schedule"""
+        for task in candidates:
+            title = (task.title or "").lower()
+            if any(keyword in title for keyword in spec.keywords):
+                candidates.remove(task)
+                return task
+        return None
+
+    async def _extend(self, db: AsyncSession, today: date, through: date) -> int:
+        """Materialize occurrences for schedules whose next_due is inside the horizon"""
+        from models.tasks import Task, TaskCategory, TaskType
+
+        due = (await db.execute(
+            select(CareScheduleWatermark)
+            .where(CareScheduleWatermark.next_due.isnot(None))
+            .where(CareScheduleWatermark.next_due <= through)
+        )).scalars().all()
+        if not due:
+            return 0
+
+        task_columns = set(Task.__table__.columns.keys())
+        sources = {source_type: (model, specs, fk, category) for source_type, model, specs, fk, category in _sources()}
+        names: dict[tuple[str, int], str] = {}
+        for source_type, (model, _, _, _) in sources.items():
+            ids = sorted({w.source_id for w in due if w.source_type == source_type})
+            for chunk in _chunks(ids):
+                for row in (await db.execute(select(model.id, model.name).where(model.id.in_(chunk)))).all():
+                    names[(source_type, row.id)] = row.name
+
+        existing: set[tuple[int, date]] = set()
+        for chunk in _chunks([w.id for w in due]):
+            result = await db.execute(
+                select(CareOccurrence.watermark_id, CareOccurrence.due_date)
+                .where(CareOccurrence.watermark_id.in_(chunk))
+            )
+            existing.update((r.watermark_id, r.due_date) for r in result.all())
+        legacy = await self._legacy_tasks(db, due, sources)
+
+        pending: list[tuple[CareOccurrence, Task]] = []
+        adopted: list[CareOccurrence] = []
+        for watermark in due:
+            _, specs, fk, category = sources[watermark.source_type]
+            spec = next((s for s in specs if s.key == watermark.schedule_key), None)
+            name = names.get((watermark.source_type, watermark.source_id))
+            dates = occurrences(watermark.next_due, watermark.frequency_days, today, through)
+            if spec is not None and name is not None:
+                for day in dates:
+                    if (watermark.id, day) in existing:
+                        continue
+                    task = self._adopt(legacy.get((watermark.source_type, watermark.source_id, day), []), spec)
+                    if task is not None:
+                        adopted.append(CareOccurrence(watermark_id=watermark.id, due_date=day, task_id=task.id))
+                        continue
+                    values = {
+                        "title": f"{spec.label}: {name}",
+                        "description": "Auto-generated from care schedule",
+                        "task_type": _enum_value(TaskType, "todo"),
+                        "category": _enum_value(TaskCategory, category),
+                        "priority": 2,
+                        "due_date": day,
+                        "is_completed": False,
+                        "is_active": True,
+                        fk: watermark.source_id,
+                    }
+                    task = Task(**{k: v for k, v in values.items() if k in task_columns})
+                    pending.append((CareOccurrence(watermark_id=watermark.id, due_date=day), task))
+            if dates and watermark.frequency_days:
+                watermark.next_due = _advance(dates[-1], watermark.frequency_days, today)
+            else:
+                watermark.next_due = None
+            watermark.generated_through = through
+
+        db.add_all([task for _, task in pending])
+        await db.flush()
+        for occurrence, task in pending:
+            occurrence.task_id = task.id
+        db.add_all([occurrence for occurrence, _ in pending])
+        db.add_all(adopted)
+        self.stats["tasks_created"] += len(pending)
+        self.stats["tasks_adopted"] += len(adopted)
+        return len(pending)
+
+    async def run_pass(self, full: bool = False) -> dict:
+        """One incremental pass; `full` rescans every plant and animal"""
+        from models.database import async_session
+
+        started = datetime.utcnow()
+        today = date.today()
+        through = today + timedelta(days=self.horizon_days)
+        full = full or self._last_scan is None
+        regenerated = 0
+        async with (self._session_factory or async_session)() as db:
+            for source_type, model, specs, _, _ in _sources():
+                rows = await self._changed_rows(db, model, full)
+                regenerated += await self._reconcile(db, source_type, specs, rows)
+            await self._sweep_orphans(db)
+            created = await self._extend(db, today, through)
+            await db.commit()
+
+        # Rows edited while this pass ran are picked up next time (>= comparison)
+        self._last_scan = started
+        elapsed = (datetime.utcnow() - started).total_seconds() * 1000
+        self.stats["passes"] += 1
+        self.stats["last_pass_ms"] = round(elapsed, 1)
+        if regenerated or created:
+            logger.info(f"Care horizon: {regenerated} schedules regenerated, {created} reminders created")
+        return {"full": full, "regenerated": regenerated, "created": created, "through": through.isoformat()}
+
+    def status(self) -> dict:
+        return {
+            "horizon_days": self.horizon_days,
+            "last_scan": self._last_scan.isoformat() if self._last_scan else None,
+            **self.stats,
+        }
+
+
+care_horizon = CareHorizonGenerator()
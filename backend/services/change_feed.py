@@ -0,0 +1,281 @@
+"""
+Delta-sync change feed.
+Every flush that inserts, updates or deletes a tracked model records one change_log row
+per record in the same transaction, replacing that record's previous entry so the log
+stays about as large as the data it describes. Bulk UPDATE/DELETE statements can't say
+which rows they touched, so they record a collection-wide "reset" instead.
+
+Clients keep the last `seq` they saw and call GET /changes?since=<seq>.
+"""
+
+from __future__ import annotations
+
+import enum
+import importlib
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Optional
+
+from loguru import logger
+from sqlalchemy import delete, event, func, insert, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.change_log import ChangeFeedState, ChangeLogEntry
+
+
+TOMBSTONE_RETENTION = timedelta(days=30)
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+# model class -> entity name used in the feed
+TRACKED: dict[type, str] = {}
+
+# Every model a client keeps a local copy of, by module.Class; written by the routers
+# behind the Plants, Animals, Tasks, Seeds, Equipment, Vehicles, Budget and Farm Finances pages
+DEFAULT_TRACKED = (
+    ("models.plants.Plant", "plants"),
+    ("models.livestock.Animal", "animals"),
+    ("models.livestock.AnimalExpense", "animal_expenses"),
+    ("models.tasks.Task", "tasks"),
+    ("models.seeds.Seed", "seeds"),
+    ("models.equipment.Equipment", "equipment"),
+    ("models.equipment.EquipmentMaintenance", "equipment_maintenance"),
+    ("models.vehicles.Vehicle", "vehicles"),
+    ("models.vehicles.VehicleMaintenance", "vehicle_maintenance"),
+    ("models.budget.BudgetAccount", "budget_accounts"),
+    ("models.budget.BudgetCategory", "budget_categories"),
+    ("models.budget.BudgetTransaction", "budget_transactions"),
+    ("models.budget.BudgetRule", "budget_rules"),
+    ("models.budget.BudgetIncome", "budget_income"),
+    ("models.production.Expense", "expenses"),
+    ("models.production.Sale", "sales"),
+    ("models.production.Order", "orders"),
+    ("models.production.Customer", "customers"),
+    ("models.production.LivestockProduction", "livestock_production"),
+    ("models.production.PlantHarvest", "harvests"),
+)
+
+
+def track(model: type, entity: str) -> None:
+    """Record changes to `model` under `entity` in the feed"""
+    if "id" not in model.__table__.columns:
+        raise ValueError(f"{model.__name__} has no id column; the change feed keys rows by id")
+    TRACKED[model] = entity
+
+
+def _register_defaults() -> None:
+    """Track DEFAULT_TRACKED; a missing model stops startup rather than leaving clients stale"""
+    missing = []
+    for path, entity in DEFAULT_TRACKED:
+        module_name, _, class_name = path.rpartition(".")
+        try:
+            model = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as e:
+            missing.append(f"{entity}: {path} ({e})")
+            continue
+        track(model, entity)
+    if missing:
+        raise ImportError("Change feed models not found:\n  " + "\n  ".join(missing))
+
+
+_register_defaults()
+
+
+def _models_by_entity() -> dict[str, type]:
+    return {entity: model for model, entity in TRACKED.items()}
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def serialize(obj) -> dict:
+    """Column values of a tracked row, JSON-ready"""
+    return {column.key: _json_value(getattr(obj, column.key)) for column in obj.__table__.columns}
+
+
+def _write_entries(connection, changes: dict[tuple[str, Optional[int]], str]) -> None:
+    """Replace each record's previous entry with its newest change"""
+    if not changes:
+        return
+    table = ChangeLogEntry.__table__
+    keys = [key for key in changes if key[1] is not None]
+    for i in range(0, len(keys), 400):
+        connection.execute(delete(table).where(tuple_(table.c.entity, table.c.row_id).in_(keys[i:i + 400])))
+    now = datetime.utcnow()
+    connection.execute(
+        insert(table),
+        [{"entity": entity, "row_id": row_id, "op": op, "changed_at": now} for (entity, row_id), op in changes.items()],
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session: Session, flush_context) -> None:
+    if not TRACKED:
+        return
+    changes: dict[tuple[str, Optional[int]], str] = {}
+    for obj in session.new:
+        entity = TRACKED.get(type(obj))
+        if entity is not None:
+            changes[(entity, obj.id)] = "upsert"
+    for obj in session.dirty:
+        entity = TRACKED.get(type(obj))
+        if entity is not None and session.is_modified(obj, include_collections=False):
+            changes[(entity, obj.id)] = "upsert"
+    for obj in session.deleted:
+        entity = TRACKED.get(type(obj))
+        if entity is not None:
+            changes[(entity, obj.id)] = "delete"
+    _write_entries(session.connection(), changes)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk(orm_execute_state) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    entity = TRACKED.get(mapper.class_) if mapper is not None else None
+    if entity is not None:
+        _write_entries(orm_execute_state.session.connection(), {(entity, None): "reset"})
+
+
+async def ensure_autoincrement(conn) -> None:
+    """Rebuild a change_log table created before seq used AUTOINCREMENT"""
+
+    def rebuild(sync_conn) -> None:
+        if sync_conn.dialect.name != "sqlite":
+            return
+        ddl = sync_conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'change_log'"
+        ).scalar()
+        if ddl is None or "AUTOINCREMENT" in ddl.upper():
+            return
+        sync_conn.exec_driver_sql("DROP INDEX IF EXISTS ix_change_log_entity_row")
+        sync_conn.exec_driver_sql("ALTER TABLE change_log RENAME TO change_log_rebuild")
+        ChangeLogEntry.__table__.create(sync_conn)
+        sync_conn.exec_driver_sql(
+            "INSERT INTO change_log (seq, entity, row_id, op, changed_at) "
+            "SELECT seq, entity, row_id, op, changed_at FROM change_log_rebuild ORDER BY seq"
+        )
+        sync_conn.exec_driver_sql("DROP TABLE change_log_rebuild")
+        logger.info("Rebuilt change_log with AUTOINCREMENT sequence numbers")
+
+    await conn.run_sync(rebuild)
+
+
+async def head(db: AsyncSession) -> int:
+    return (await db.execute(select(func.max(ChangeLogEntry.seq)))).scalar() or 0
+
+
+async def ensure_backfilled(db: AsyncSession) -> None:
+    """Log every existing record of entities the feed hasn't seen yet (first run, or a
+    newly tracked model) so since=0 is a full snapshot and current clients pick them up"""
+    state = await db.get(ChangeFeedState, 1)
+    now = datetime.utcnow()
+    backfilled = []
+    for model, entity in TRACKED.items():
+        if state is not None and state.backfilled_at is not None:
+            seen = (await db.execute(
+                select(ChangeLogEntry.seq).where(ChangeLogEntry.entity == entity).limit(1)
+            )).scalar()
+            if seen is not None:
+                continue
+        backfilled.append(entity)
+        await db.execute(
+            insert(ChangeLogEntry).from_select(
+                ["entity", "row_id", "op", "changed_at"],
+                select(literal(entity), model.id, literal("upsert"), literal(now)).order_by(model.id),
+            )
+        )
+    if not backfilled:
+        return
+    if state is None:
+        state = ChangeFeedState(id=1, pruned_through=0)
+        db.add(state)
+    state.backfilled_at = now
+    await db.commit()
+    logger.info(f"Change feed backfilled {', '.join(backfilled)} through seq {await head(db)}")
+
+
+async def prune(db: AsyncSession, retention: timedelta = TOMBSTONE_RETENTION) -> int:
+    """Drop old tombstones/resets; clients older than the pruned seq must resync"""
+    cutoff = datetime.utcnow() - retention
+    old = ChangeLogEntry.op.in_(("delete", "reset")) & (ChangeLogEntry.changed_at < cutoff)
+    newest = (await db.execute(select(func.max(ChangeLogEntry.seq)).where(old))).scalar()
+    if newest is None:
+        return 0
+    result = await db.execute(delete(ChangeLogEntry).where(old))
+    state = await db.get(ChangeFeedState, 1)
+    if state is None:
+        state = ChangeFeedState(id=1)
+        db.add(state)
+    state.pruned_through = max(state.pruned_through or 0, newest)
+    await db.commit()
+    return result.rowcount or 0
+
+
+async def changes_since(
+    db: AsyncSession,
+    since: int,
+    limit: int = DEFAULT_LIMIT,
+    entities: Optional[set[str]] = None,
+) -> dict:
+    """Upserts (full rows) and tombstones (ids) after `since`, oldest first"""
+    limit = max(1, min(limit, MAX_LIMIT))
+    state = await db.get(ChangeFeedState, 1)
+    # since=0 is a fresh snapshot and needs no tombstones; anyone else behind the prune point resyncs
+    if since < 0 or (state is not None and 0 < since < (state.pruned_through or 0)):
+        return {"seq": await head(db), "reset": True, "has_more": False, "changes": {}, "resets": []}
+
+    query = select(ChangeLogEntry).where(ChangeLogEntry.seq > since)
+    if entities:
+        query = query.where(ChangeLogEntry.entity.in_(entities))
+    entries = (await db.execute(query.order_by(ChangeLogEntry.seq).limit(limit + 1))).scalars().all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    models = _models_by_entity()
+    changes: dict[str, dict[str, list]] = {}
+    resets: list[str] = []
+    upsert_ids: dict[str, list[int]] = {}
+    for entry in entries:
+        if entry.entity not in models:
+            continue
+        if entry.op == "reset":
+            resets.append(entry.entity)
+            continue
+        bucket = changes.setdefault(entry.entity, {"upserts": [], "deletes": []})
+        if entry.op == "delete":
+            bucket["deletes"].append(entry.row_id)
+        else:
+            upsert_ids.setdefault(entry.entity, []).append(entry.row_id)
+
+    for entity, ids in upsert_ids.items():
+        model = models[entity]
+        rows = {}
+        for i in range(0, len(ids), 500):
+            result = await db.execute(select(model).where(model.id.in_(ids[i:i + 500])))
+            rows.update({row.id: row for row in result.scalars().all()})
+        bucket = changes[entity]
+        for row_id in ids:
+            row = rows.get(row_id)
+            if row is None:
+                # Removed by a bulk statement after the upsert was logged
+                bucket["deletes"].append(row_id)
+            else:
+                bucket["upserts"].append(serialize(row))
+
+    return {
+        "seq": entries[-1].seq if entries else max(since, 0),
+        "reset": False,
+        "has_more": has_more,
+        "changes": changes,
+        "resets": sorted(set(resets)),
+    }
@@ -0,0 +1,304 @@
+"""
+Incremental pull-from-production by page-level delta.
+
+Production takes a consistent snapshot of its database with SQLite's backup API (a
+page-for-page copy, so unchanged pages stay byte-identical between snapshots) and
+publishes one hash per page. The dev instance keeps a mirror of the last snapshot it
+received, hashes its pages, asks for only the pages that differ and receives them as a
+zlib-compressed stream. The patched mirror is verified against the manifest before it
+replaces the old one, and is then installed into the dev database with the backup API,
+which swaps the content in a single write transaction.
+
+Both ends work on plain files, so a pull can be exercised locally with two databases:
+
+    python -m admin pull-db --source prod.db --db-path dev.db
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import shutil
+import sqlite3
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Protocol
+
+from loguru import logger
+
+
+HASH_SIZE = 16
+FRAME_HEADER = struct.Struct(">I")  # page number, followed by page_size bytes
+READ_CHUNK = 1024 * 1024
+COMPRESS_LEVEL = 6
+
+
+class DeltaError(Exception):
+    """A pull could not be applied; the dev database is unchanged"""
+
+
+class SnapshotChanged(DeltaError):
+    """The source took a newer snapshot between manifest and page fetch"""
+
+
+# === Pages and hashes ===
+
+def page_size_of(path: Path) -> int:
+    with open(path, "rb") as f:
+        header = f.read(100)
+    if len(header) < 100 or not header.startswith(b"SQLite format 3\x00"):
+        raise DeltaError(f"{path} is not a SQLite database")
+    size = struct.unpack(">H", header[16:18])[0]
+    return 65536 if size == 1 else size
+
+
+def page_hashes(path: Path, page_size: int) -> list[bytes]:
+    hashes = []
+    per_chunk = max(1, READ_CHUNK // page_size)
+    with open(path, "rb") as f:
+        while chunk := f.read(page_size * per_chunk):
+            for offset in range(0, len(chunk), page_size):
+                hashes.append(hashlib.blake2b(chunk[offset:offset + page_size], digest_size=HASH_SIZE).digest())
+    return hashes
+
+
+def to_ranges(pages: Iterable[int]) -> list[list[int]]:
+    """[1, 2, 3, 7] -> [[1, 3], [7, 1]] (start, count)"""
+    ranges: list[list[int]] = []
+    for page in pages:
+        if ranges and ranges[-1][0] + ranges[-1][1] == page:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([page, 1])
+    return ranges
+
+
+def from_ranges(ranges: Iterable[Iterable[int]]) -> Iterator[int]:
+    for start, count in ranges:
+        yield from range(start, start + count)
+
+
+def encode_frames(frames: Iterable[tuple[int, bytes]]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(COMPRESS_LEVEL)
+    for page, data in frames:
+        chunk = compressor.compress(FRAME_HEADER.pack(page) + data)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def decode_frames(chunks: Iterable[bytes], page_size: int) -> Iterator[tuple[int, bytes]]:
+    decompressor = zlib.decompressobj()
+    frame_size = FRAME_HEADER.size + page_size
+    buffer = b""
+    for chunk in chunks:
+        buffer += decompressor.decompress(chunk)
+        while len(buffer) >= frame_size:
+            (page,) = FRAME_HEADER.unpack_from(buffer)
+            yield page, buffer[FRAME_HEADER.size:frame_size]
+            buffer = buffer[frame_size:]
+    buffer += decompressor.flush()
+    if buffer:
+        raise DeltaError("Page stream ended mid-frame")
+
+
+# === Source (production) side ===
+
+class SnapshotSource:
+    """Serves manifests and pages from a backup-API snapshot of `db_path`"""
+
+    def __init__(self, db_path: Path, snapshot_path: Path):
+        self.db_path = Path(db_path)
+        self.snapshot_path = Path(snapshot_path)
+        # Shared between workers: the manifest may be served by one and the pages by another
+        self.id_path = self.snapshot_path.with_name(self.snapshot_path.name + ".id")
+
+    def _take_snapshot(self) -> None:
+        tmp = self.snapshot_path.with_name(self.snapshot_path.name + f".tmp{os.getpid()}")
+        tmp.unlink(missing_ok=True)
+        source = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        target = sqlite3.connect(tmp)
+        try:
+            source.backup(target)
+            # Self-contained single file, so page bytes are all there is to compare
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp, self.snapshot_path)
+
+    def manifest(self) -> dict:
+        self._take_snapshot()
+        page_size = page_size_of(self.snapshot_path)
+        hashes = page_hashes(self.snapshot_path, page_size)
+        snapshot_id = hashlib.blake2b(b"".join(hashes), digest_size=8).hexdigest()
+        self.id_path.write_text(snapshot_id)
+        return {"snapshot_id": snapshot_id, "page_size": page_size, "hashes": hashes}
+
+    def pages(self, snapshot_id: str, pages: Iterable[int]) -> Iterator[tuple[int, bytes]]:
+        try:
+            current = self.id_path.read_text().strip()
+        except OSError:
+            current = None
+        if current != snapshot_id:
+            raise SnapshotChanged("Snapshot was replaced; request a new manifest")
+        page_size = page_size_of(self.snapshot_path)
+        with open(self.snapshot_path, "rb") as f:
+            for page in pages:
+                f.seek((page - 1) * page_size)
+                data = f.read(page_size)
+                if len(data) != page_size:
+                    raise DeltaError(f"Page {page} is beyond the end of the snapshot")
+                yield page, data
+
+
+def manifest_to_json(manifest: dict) -> dict:
+    return {
+        "snapshot_id": manifest["snapshot_id"],
+        "page_size": manifest["page_size"],
+        "page_count": len(manifest["hashes"]),
+        "hashes": base64.b64encode(b"".join(manifest["hashes"])).decode(),
+    }
+
+
+def manifest_from_json(payload: dict) -> dict:
+    raw = base64.b64decode(payload["hashes"])
+    hashes = [raw[i:i + HASH_SIZE] for i in range(0, len(raw), HASH_SIZE)]
+    if len(hashes) != payload["page_count"]:
+        raise DeltaError("Manifest hash list is truncated")
+    return {"snapshot_id": payload["snapshot_id"], "page_size": payload["page_size"], "hashes": hashes}
+
+
+# === Transport ===
+
+class PageSource(Protocol):
+    def manifest(self) -> dict: ...
+
+    def pages(self, snapshot_id: str, pages: Iterable[int]) -> Iterator[tuple[int, bytes]]: ...
+
+
+class HttpSource:
+    """Talks to a production instance's /db-sync endpoints"""
+
+    def __init__(self, base_url: str, token: str, timeout: float = 300.0):
+        import httpx
+
+        self.client = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            headers={"X-Sync-Token": token},
+            timeout=httpx.Timeout(timeout, connect=10.0),
+        )
+        self._page_size = 0
+
+    def manifest(self) -> dict:
+        response = self.client.get("/db-sync/manifest/")
+        response.raise_for_status()
+        manifest = manifest_from_json(response.json())
+        self._page_size = manifest["page_size"]
+        return manifest
+
+    def pages(self, snapshot_id: str, pages: Iterable[int]) -> Iterator[tuple[int, bytes]]:
+        body = {"snapshot_id": snapshot_id, "ranges": to_ranges(pages)}
+        with self.client.stream("POST", "/db-sync/pages/", json=body) as response:
+            if response.status_code == 409:
+                raise SnapshotChanged("Snapshot was replaced; request a new manifest")
+            response.raise_for_status()
+            yield from decode_frames(response.iter_raw(), self._page_size)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+# === Destination (dev) side ===
+
+def _install(mirror: Path, dest_db: Path) -> None:
+    """Copy the mirror into the live dev database in one write transaction"""
+    source = sqlite3.connect(f"file:{mirror}?mode=ro", uri=True)
+    target = sqlite3.connect(dest_db, timeout=30)
+    try:
+        source.backup(target)
+    except sqlite3.OperationalError as e:
+        raise DeltaError(f"Could not install into {dest_db}: {e}") from e
+    finally:
+        target.close()
+        source.close()
+
+
+def pull(source: PageSource, dest_db: Path, mirror: Path, retries: int = 2) -> dict:
+    """Bring `dest_db` up to date with the source; returns transfer stats"""
+    started = time.monotonic()
+    dest_db, mirror = Path(dest_db), Path(mirror)
+    for attempt in range(retries + 1):
+        manifest = source.manifest()
+        try:
+            stats = _apply(source, manifest, mirror)
+            break
+        except SnapshotChanged:
+            if attempt == retries:
+                raise
+            logger.info("Source snapshot changed mid-pull; retrying")
+    _install(mirror, dest_db)
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    logger.info(
+        f"Pulled {stats['pages_transferred']}/{stats['page_count']} pages "
+        f"({stats['page_bytes']:,} bytes before compression) into {dest_db} in {stats['seconds']}s"
+    )
+    return stats
+
+
+def _apply(source: PageSource, manifest: dict, mirror: Path) -> dict:
+    page_size, remote = manifest["page_size"], manifest["hashes"]
+    local: list[bytes] = []
+    if mirror.exists():
+        try:
+            if page_size_of(mirror) == page_size:
+                local = page_hashes(mirror, page_size)
+        except DeltaError:
+            pass
+    wanted = [i + 1 for i, digest in enumerate(remote) if i >= len(local) or local[i] != digest]
+
+    tmp = mirror.with_name(mirror.name + ".tmp")
+    if local:
+        shutil.copyfile(mirror, tmp)
+    else:
+        tmp.write_bytes(b"")
+    received = 0
+    try:
+        with open(tmp, "r+b") as f:
+            f.truncate(len(remote) * page_size)
+            for page, data in source.pages(manifest["snapshot_id"], wanted):
+                f.seek((page - 1) * page_size)
+                f.write(data)
+                received += 1
+            f.flush()
+            os.fsync(f.fileno())
+        if received != len(wanted) or page_hashes(tmp, page_size) != remote:
+            raise DeltaError("Patched mirror does not match the source manifest")
+        conn = sqlite3.connect(f"file:{tmp}?mode=ro", uri=True)
+        try:
+            check = conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+        if check != "ok":
+            raise DeltaError(f"Patched mirror failed quick_check: {check}")
+        os.replace(tmp, mirror)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    return {
+        "page_size": page_size,
+        "page_count": len(remote),
+        "pages_transferred": received,
+        "page_bytes": received * page_size,
+        "full_copy": not local,
+    }
+
+
+def pull_local(source_db: Path, dest_db: Path, state_dir: Optional[Path] = None) -> dict:
+    """Pull between two local files (testing, or prod and dev on the same host)"""
+    state_dir = Path(state_dir or Path(dest_db).parent)
+    source = SnapshotSource(source_db, state_dir / ".pull-snapshot.db")
+    return pull(source, dest_db, state_dir / ".prod-mirror.db")
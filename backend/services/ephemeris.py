@@ -0,0 +1,226 @@
+"""
+Sun, moon and twilight ephemeris table.
+The values for a day only change with the date and the farm location, so a year of
+them is computed in one pass (on the blocking-IO pool) and kept as compact columnar
+arrays: one epoch-seconds column per event and a moon-phase column. Requests look a
+day up by its offset from the table start; the table is rebuilt when the location
+settings change or the horizon runs short.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from services.blocking_io import io_pool
+from services.settings_cache import settings_cache
+
+
+DAYS_BEHIND = 7  # so recent history (journal entries, last week's chart) is still a lookup
+DAYS_AHEAD = 366
+MIN_AHEAD = 30  # rebuild once the table covers fewer days than this
+SUN_EVENTS = ("dawn", "sunrise", "noon", "sunset", "dusk")
+MISSING = -1  # polar day/night: the event doesn't happen
+SYNODIC_PHASE_SCALE = 28.0  # astral.moon.phase() runs 0 .. 27.99
+
+# (upper bound on astral's 0-28 phase, name, emoji); quarters get a day either side
+MOON_PHASES = (
+    (1.0, "New Moon", "🌑"),
+    (6.0, "Waxing Crescent", "🌒"),
+    (8.0, "First Quarter", "🌓"),
+    (13.0, "Waxing Gibbous", "🌔"),
+    (15.0, "Full Moon", "🌕"),
+    (20.0, "Waning Gibbous", "🌖"),
+    (22.0, "Last Quarter", "🌗"),
+    (27.0, "Waning Crescent", "🌘"),
+    (SYNODIC_PHASE_SCALE, "New Moon", "🌑"),
+)
+
+
+def moon_phase_name(phase: float) -> tuple[str, str]:
+    for upper, name, emoji in MOON_PHASES:
+        if phase < upper:
+            return name, emoji
+    return MOON_PHASES[-1][1], MOON_PHASES[-1][2]
+
+
+def moon_illumination(phase: float) -> int:
+    """Illuminated fraction (percent) from the phase angle"""
+    return round((1 - math.cos(2 * math.pi * phase / SYNODIC_PHASE_SCALE)) / 2 * 100)
+
+
+def _format_time(moment: Optional[datetime]) -> Optional[str]:
+    return moment.strftime("%I:%M %p").lstrip("0") if moment else None
+
+
+class EphemerisTable:
+    """A contiguous run of days for one location; all lookups are array indexing"""
+
+    def __init__(self, location: tuple[float, float, str], start: date, events: dict[str, np.ndarray], moon: np.ndarray):
+        self.location = location
+        self.start = start
+        self.events = events
+        self.moon = moon
+        self.tz = ZoneInfo(location[2])
+
+    @property
+    def days(self) -> int:
+        return len(self.moon)
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=self.days - 1)
+
+    def covers(self, day: date) -> bool:
+        return 0 <= (day - self.start).days < self.days
+
+    def day(self, day: date) -> Optional[dict]:
+        index = (day - self.start).days
+        if not 0 <= index < self.days:
+            return None
+        values: dict = {"date": day}
+        for event, column in self.events.items():
+            ts = int(column[index])
+            values[event] = None if ts == MISSING else datetime.fromtimestamp(ts, self.tz)
+        values["moon_phase"] = float(self.moon[index])
+        return values
+
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.events.values()) + self.moon.nbytes
+
+
+def _build(latitude: float, longitude: float, tz_name: str, start: date, days: int) -> EphemerisTable:
+    """One pass over `days` days; astral's API is per-date, the storage is columnar"""
+    from astral import LocationInfo, moon
+    from astral import sun as astral_sun
+
+    tz = ZoneInfo(tz_name)
+    observer = LocationInfo(timezone=tz_name, latitude=latitude, longitude=longitude).observer
+    events = {event: np.full(days, MISSING, dtype=np.int64) for event in SUN_EVENTS}
+    phases = np.empty(days, dtype=np.float32)
+    functions = {event: getattr(astral_sun, event) for event in SUN_EVENTS}
+    for i in range(days):
+        day = start + timedelta(days=i)
+        for event, fn in functions.items():
+            try:
+                events[event][i] = int(fn(observer, date=day, tzinfo=tz).timestamp())
+            except ValueError:
+                pass  # sun never reaches the event's elevation on this day
+        phases[i] = moon.phase(day)
+    return EphemerisTable((latitude, longitude, tz_name), start, events, phases)
+
+
+class EphemerisCache:
+    """Process-wide table, rebuilt lazily when the location or date range goes stale"""
+
+    def __init__(self):
+        self._table: Optional[EphemerisTable] = None
+        self._settings_version: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self.builds = 0
+        self.last_build_seconds: Optional[float] = None
+
+    async def _location(self, db: AsyncSession) -> tuple[float, float, str]:
+        latitude = await settings_cache.get_float(db, "latitude", settings.latitude)
+        longitude = await settings_cache.get_float(db, "longitude", settings.longitude)
+        tz_name = await settings_cache.get(db, "timezone", settings.timezone) or settings.timezone
+        try:
+            ZoneInfo(tz_name)
+        except Exception:
+            logger.warning(f"Unknown timezone {tz_name!r}; using {settings.timezone}")
+            tz_name = settings.timezone
+        return round(latitude, 6), round(longitude, 6), tz_name
+
+    def _fresh(self, today: date) -> bool:
+        table = self._table
+        return (
+            table is not None
+            and self._settings_version == settings_cache.version
+            and table.covers(today)
+            and (table.end - today).days >= MIN_AHEAD
+        )
+
+    async def table(self, db: AsyncSession) -> EphemerisTable:
+        today = date.today()
+        if self._fresh(today):
+            return self._table
+        async with self._lock:
+            if self._fresh(today):
+                return self._table
+            version = settings_cache.version
+            location = await self._location(db)
+            table = self._table
+            # A settings change elsewhere (e.g. an API key) only needs the location re-read
+            if table is None or table.location != location or not table.covers(today) or (table.end - today).days < MIN_AHEAD:
+                started = time.monotonic()
+                table = await io_pool.run(
+                    _build, *location, today - timedelta(days=DAYS_BEHIND), DAYS_BEHIND + DAYS_AHEAD
+                )
+                self.last_build_seconds = round(time.monotonic() - started, 3)
+                self.builds += 1
+                logger.info(
+                    f"Ephemeris: {table.days} days for {location[0]}, {location[1]} "
+                    f"built in {self.last_build_seconds}s"
+                )
+                self._table = table
+            self._settings_version = version
+            return table
+
+    async def day(self, db: AsyncSession, day: Optional[date] = None) -> Optional[dict]:
+        """Sun events (tz-aware datetimes, None if they don't occur) and moon phase for a date"""
+        day = day or date.today()
+        table = await self.table(db)
+        return table.day(day)
+
+    async def days(self, db: AsyncSession, start: date, end: date) -> list[dict]:
+        """Dates outside the table are skipped; callers ask for at most a season or so"""
+        table = await self.table(db)
+        return [
+            values for offset in range((end - start).days + 1)
+            if (values := table.day(start + timedelta(days=offset))) is not None
+        ]
+
+    async def sun_moon(self, db: AsyncSession, now: Optional[datetime] = None) -> Optional[dict]:
+        """Today's values in the dashboard widget's shape"""
+        table = await self.table(db)
+        now = now or datetime.now(table.tz)
+        values = table.day(now.date())
+        if values is None:
+            return None
+        sunrise, sunset = values["sunrise"], values["sunset"]
+        name, emoji = moon_phase_name(values["moon_phase"])
+        day_length = int((sunset - sunrise).total_seconds() // 60) if sunrise and sunset else None
+        return {
+            "sunrise": _format_time(sunrise),
+            "sunset": _format_time(sunset),
+            "first_light": _format_time(values["dawn"]),
+            "last_light": _format_time(values["dusk"]),
+            "solar_noon": _format_time(values["noon"]),
+            "day_length_minutes": day_length,
+            "is_daytime": bool(sunrise and sunset and sunrise <= now < sunset),
+            "moon_phase": name,
+            "moon_emoji": emoji,
+            "moon_illumination": moon_illumination(values["moon_phase"]),
+        }
+
+    def stats(self) -> dict:
+        table = self._table
+        return {
+            "builds": self.builds,
+            "last_build_seconds": self.last_build_seconds,
+            "start": table.start.isoformat() if table else None,
+            "end": table.end.isoformat() if table else None,
+            "bytes": table.nbytes() if table else 0,
+        }
+
+
+ephemeris = EphemerisCache()
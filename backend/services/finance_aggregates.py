@@ -0,0 +1,346 @@
+"""
+Materialized monthly finance aggregates.
+Budget transactions, production and animal expenses, sales and orders are rolled up into
+finance_monthly_aggregates by (source, month, account, category, enterprise). Every flush
+that writes a ledger row recomputes just the months it touched, in the same transaction,
+so the aggregates are never stale; bulk statements whose rows can't be seen recompute the
+whole source. Summaries and charts then read a few hundred aggregate rows instead of
+years of ledger rows.
+
+Each source names its ledger model and columns explicitly, and `bind()` checks them
+against the mapped model at startup: a renamed model or column stops startup with a
+report instead of leaving the aggregates silently empty. Amounts are stored signed
+(negative is money out), following each source's `direction`.
+`python -m admin rebuild-finance-aggregates` recomputes everything.
+"""
+
+from __future__ import annotations
+
+import importlib
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import chain
+from typing import Literal, Optional
+
+from loguru import logger
+from sqlalchemy import (
+    DateTime, String, Table, and_, case, cast, delete, event, func, insert, inspect, literal, or_, select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.base import NO_VALUE
+
+from models.finance_aggregate import FinanceAggregateState, FinanceMonthlyAggregate
+
+
+AGGREGATE_VERSION = 2  # bump when sources or grouping change so the next startup rebuilds
+GROUP_COLUMNS = ("month", "account_id", "category", "enterprise")
+UNKNOWN = object()  # a written row whose month can't be read; recompute the whole source
+
+
+class FinanceAggregateError(Exception):
+    """A source's ledger model or columns don't exist"""
+
+
+@dataclass(frozen=True)
+class AggregateSource:
+    """One ledger and how its rows roll up.
+
+    `direction` is the sign convention: "signed" when the ledger stores money out as
+    negative amounts, "in" or "out" when every row is a positive amount of income or
+    spending. `amounts` are coalesced in order (an order's final total, else its estimate).
+    """
+    name: str
+    model: str  # module.Class
+    date: str
+    amounts: tuple[str, ...]
+    direction: Literal["signed", "in", "out"]
+    account: Optional[str] = None
+    category: Optional[str] = None
+    enterprise: Optional[str] = None
+
+
+SOURCES = (
+    AggregateSource(
+        "budget", "models.budget.BudgetTransaction", "transaction_date", ("amount",), "signed",
+        account="account_id", category="category_id",
+    ),
+    AggregateSource(
+        "expenses", "models.production.Expense", "expense_date", ("amount",), "out",
+        category="category", enterprise="scope",
+    ),
+    AggregateSource(
+        "animal_expenses", "models.livestock.AnimalExpense", "expense_date", ("amount",), "out",
+        category="expense_type",
+    ),
+    AggregateSource(
+        "sales", "models.production.Sale", "sale_date", ("total_price",), "in",
+        category="category",
+    ),
+    AggregateSource(
+        "orders", "models.production.Order", "order_date", ("final_total", "estimated_total"), "in",
+        category="portion_type",
+    ),
+)
+FARM_SOURCES = ("expenses", "animal_expenses", "sales", "orders")
+
+
+@dataclass
+class BoundSource:
+    """A source bound to its mapped model's table and columns"""
+    source: AggregateSource
+    table: Table
+    date: object
+    amounts: list
+    account: Optional[object] = None
+    category: Optional[object] = None
+    enterprise: Optional[object] = None
+
+    def _bound(self, day: date):
+        if isinstance(self.date.type, DateTime):
+            return datetime.combine(day, datetime.min.time())
+        return day
+
+    def month_ranges(self, months: set[str]):
+        ranges = []
+        for month in sorted(months):
+            year, number = int(month[:4]), int(month[5:7])
+            start = date(year, number, 1)
+            end = date(year + number // 12, number % 12 + 1, 1)
+            ranges.append(and_(self.date >= self._bound(start), self.date < self._bound(end)))
+        return or_(*ranges)
+
+    def signed_amount(self):
+        amount = func.coalesce(*self.amounts, 0)
+        return -amount if self.source.direction == "out" else amount
+
+    def aggregate_query(self, months: Optional[set[str]] = None):
+        month = func.strftime("%Y-%m", self.date)
+        amount = self.signed_amount()
+        account = func.coalesce(self.account, 0) if self.account is not None else literal(0)
+        category = func.coalesce(cast(self.category, String), "") if self.category is not None else literal("")
+        enterprise = func.coalesce(cast(self.enterprise, String), "") if self.enterprise is not None else literal("")
+        groups = [month] + [expr for expr, column in (
+            (account, self.account), (category, self.category), (enterprise, self.enterprise),
+        ) if column is not None]
+        query = (
+            select(
+                literal(self.source.name), month, account, category, enterprise,
+                func.sum(amount),
+                func.sum(case((amount > 0, amount), else_=0)),
+                func.sum(case((amount < 0, amount), else_=0)),
+                func.count(),
+            )
+            .where(self.date.is_not(None))
+            .group_by(*groups)
+        )
+        if months is not None:
+            query = query.where(self.month_ranges(months))
+        return query
+
+
+def _bind(source: AggregateSource) -> BoundSource:
+    module_name, _, class_name = source.model.rpartition(".")
+    try:
+        model = getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError) as e:
+        raise FinanceAggregateError(f"{source.name}: no model {source.model} ({e})") from e
+    columns = inspect(model).columns
+    wanted = [source.date, *source.amounts, source.account, source.category, source.enterprise]
+    missing = [name for name in wanted if name is not None and name not in columns]
+    if missing:
+        raise FinanceAggregateError(f"{source.name}: {source.model} has no column {', '.join(missing)}")
+    column = lambda name: columns[name] if name is not None else None
+    return BoundSource(
+        source, model.__table__, columns[source.date], [columns[name] for name in source.amounts],
+        account=column(source.account), category=column(source.category), enterprise=column(source.enterprise),
+    )
+
+
+_bound: dict[str, BoundSource] = {}  # ledger table name -> source; empty until bind()
+
+
+def bind() -> list[BoundSource]:
+    """Bind every source to its model; raises with all problems at once if any is missing"""
+    bound, problems = [], []
+    for source in SOURCES:
+        try:
+            bound.append(_bind(source))
+        except FinanceAggregateError as e:
+            problems.append(str(e))
+    if problems:
+        raise FinanceAggregateError("Finance aggregate sources don't match the models:\n  " + "\n  ".join(problems))
+    _bound.clear()
+    _bound.update({b.table.name: b for b in bound})
+    return bound
+
+
+def _bound_for(table) -> Optional[BoundSource]:
+    bound = _bound.get(getattr(table, "name", None))
+    return bound if bound is not None and bound.table is table else None
+
+
+def _month(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m")
+    text = str(value)[:7]
+    return text if len(text) == 7 and text[4] == "-" and text[:4].isdigit() else None
+
+
+AGGREGATE_COLUMNS = ("source", "month", "account_id", "category", "enterprise", "total", "inflow", "outflow", "count")
+
+
+def refresh(connection, bound: BoundSource, months: Optional[set[str]] = None) -> None:
+    """Recompute `months` (all months if None) of one source from its ledger"""
+    if months is not None and not months:
+        return
+    table = FinanceMonthlyAggregate.__table__
+    condition = table.c.source == bound.source.name
+    if months is not None:
+        condition = condition & table.c.month.in_(sorted(months))
+    connection.execute(delete(table).where(condition))
+    connection.execute(insert(table).from_select(AGGREGATE_COLUMNS, bound.aggregate_query(months)))
+
+
+def _merge(touched: dict, bound: BoundSource, months) -> None:
+    name = bound.source.name
+    current = touched.get(name, (bound, set()))[1]
+    if months is UNKNOWN or current is None:
+        touched[name] = (bound, None)
+    else:
+        touched[name] = (bound, current | {m for m in months if m})
+
+
+def _months_of(obj, bound: BoundSource):
+    """Months a flushed row was in before and after the write"""
+    attr = inspect(obj).attrs[bound.source.date]
+    history = attr.history
+    values = list(chain(history.added or (), history.deleted or (), history.unchanged or ()))
+    if not values:
+        if attr.loaded_value is NO_VALUE:
+            return UNKNOWN
+        values = [attr.loaded_value]
+    return {_month(value) for value in values}
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_on_flush(session: Session, flush_context) -> None:
+    touched: dict[str, tuple] = {}
+    for obj in chain(session.new, session.dirty, session.deleted):
+        bound = _bound_for(getattr(obj, "__table__", None))
+        if bound is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        _merge(touched, bound, _months_of(obj, bound))
+    if touched:
+        connection = session.connection()
+        for bound, months in touched.values():
+            refresh(connection, bound, months)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _refresh_on_bulk(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    bound = _bound_for(getattr(orm_execute_state.statement, "table", None))
+    if bound is None:
+        return None
+    months = UNKNOWN
+    params = orm_execute_state.parameters
+    if orm_execute_state.is_insert and params:
+        rows = params if isinstance(params, (list, tuple)) else [params]
+        keys = {bound.source.date, bound.date.name}
+        found = [next((row[k] for k in keys if k in row), UNKNOWN) for row in rows]
+        if UNKNOWN not in found:
+            months = {_month(value) for value in found}
+    result = orm_execute_state.invoke_statement()
+    refresh(
+        orm_execute_state.session.connection(), bound,
+        None if months is UNKNOWN else {m for m in months if m},
+    )
+    return result
+
+
+# === Rebuild ===
+
+def rebuild(connection) -> dict[str, int]:
+    """Recompute every source from scratch; returns aggregate rows per source"""
+    table = FinanceMonthlyAggregate.__table__
+    connection.execute(delete(table))
+    counts = {}
+    for bound in bind():
+        refresh(connection, bound)
+        counts[bound.source.name] = connection.execute(
+            select(func.count()).select_from(table).where(table.c.source == bound.source.name)
+        ).scalar()
+    state_table = FinanceAggregateState.__table__
+    connection.execute(delete(state_table))
+    connection.execute(insert(state_table).values(id=1, version=AGGREGATE_VERSION, rebuilt_at=datetime.utcnow()))
+    return counts
+
+
+async def ensure_built(db: AsyncSession) -> None:
+    """Bind the sources (raising if a model changed), then rebuild on first run or a new definition"""
+    bind()
+    state = await db.get(FinanceAggregateState, 1)
+    if state is not None and state.version == AGGREGATE_VERSION:
+        return
+    counts = await db.run_sync(lambda session: rebuild(session.connection()))
+    await db.commit()
+    logger.info(f"Finance aggregates rebuilt: {counts}")
+
+
+# === Reads ===
+
+async def summarize(
+    db: AsyncSession,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+    sources: Optional[list[str]] = None,
+    group_by: tuple[str, ...] = ("month",),
+) -> list[dict]:
+    """Totals per source and the requested groups; months are YYYY-MM, both ends inclusive"""
+    agg = FinanceMonthlyAggregate
+    groups = [agg.source] + [getattr(agg, g) for g in GROUP_COLUMNS if g in group_by]
+    query = select(
+        *groups,
+        func.sum(agg.total).label("total"),
+        func.sum(agg.inflow).label("inflow"),
+        func.sum(agg.outflow).label("outflow"),
+        func.sum(agg.count).label("count"),
+    )
+    if start_month:
+        query = query.where(agg.month >= start_month)
+    if end_month:
+        query = query.where(agg.month <= end_month)
+    if sources:
+        query = query.where(agg.source.in_(sources))
+    result = await db.execute(query.group_by(*groups).order_by(*groups))
+    return [
+        {
+            **{key: value for key, value in row._mapping.items() if key not in ("total", "inflow", "outflow")},
+            "total": round(row.total or 0, 2),
+            "inflow": round(row.inflow or 0, 2),
+            "outflow": round(row.outflow or 0, 2),
+        }
+        for row in result
+    ]
+
+
+async def month_totals(db: AsyncSession, month: str) -> dict:
+    """Income, spending and net for one YYYY-MM month.
+
+    Farm ledgers are summed together; the household budget is kept apart because its
+    bank imports can include the same purchases as the farm expense ledger.
+    """
+    by_source = {row["source"]: row for row in await summarize(db, month, month, group_by=())}
+
+    def totals(names: tuple[str, ...]) -> dict:
+        income = sum(by_source[name]["inflow"] for name in names if name in by_source)
+        spending = -sum(by_source[name]["outflow"] for name in names if name in by_source)
+        return {"income": round(income, 2), "spending": round(spending, 2), "net": round(income - spending, 2)}
+
+    return {"month": month, "farm": totals(FARM_SOURCES), "budget": totals(("budget",))}
@@ -0,0 +1,194 @@
+"""
+Response pipeline: fast JSON rendering, strong ETags with 304s, and compression.
+
+`FastJSONResponse` is the app's default response class; it renders the already-validated
+response_model output with orjson. `ResponseOptimizationMiddleware` then tags JSON GET
+responses with a content-hash ETag, answers matching If-None-Match with 304, and
+compresses bodies above a size threshold with brotli (when installed) or gzip.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+MIN_COMPRESS_SIZE = 1024  # bytes; smaller bodies aren't worth the CPU or the header
+MAX_BUFFER_SIZE = 8 * 1024 * 1024  # larger JSON bodies stream through untouched
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4  # near gzip speed on the Pi, noticeably smaller output
+OFFLOAD_SIZE = 256 * 1024  # compress bodies this large on the blocking-IO pool
+
+stats = {"not_modified": 0, "br": 0, "gzip": 0, "bytes_saved": 0}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    if "*" in accepted:
+        accepted.add("gzip")
+    return accepted
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, ignoring the per-encoding suffix, as If-None-Match requires"""
+    if if_none_match.strip() == "*":
+        return True
+    base = _strip_suffix(etag.removeprefix("W/"))
+    return any(
+        _strip_suffix(tag.strip().removeprefix("W/")) == base
+        for tag in if_none_match.split(",")
+    )
+
+
+def _strip_suffix(tag: str) -> str:
+    for suffix in ("-br\"", "-gz\""):
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)] + '"'
+    return tag
+
+
+def _compress_sync(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+async def _compress(body: bytes, encoding: str) -> bytes:
+    if len(body) < OFFLOAD_SIZE:
+        return _compress_sync(body, encoding)
+    from services.blocking_io import io_pool
+
+    return await io_pool.run(_compress_sync, body, encoding)
+
+
+class ResponseOptimizationMiddleware:
+    """Pure ASGI so bodies are buffered once, without BaseHTTPMiddleware's stream copies"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_COMPRESS_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        start: Optional[Message] = None
+        chunks: list[bytes] = []
+        size = 0
+        passthrough = False
+
+        async def wrapped_send(message: Message) -> None:
+            nonlocal start, size, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                eligible = (
+                    message["status"] == 200
+                    and headers.get("content-type", "").startswith("application/json")
+                    and "content-encoding" not in headers
+                )
+                if not eligible:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            if size > MAX_BUFFER_SIZE:
+                passthrough = True
+                await send(start)
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": message.get("more_body", False)})
+                chunks.clear()
+                return
+            if not message.get("more_body", False):
+                await self._finish(start, b"".join(chunks), request_headers, send)
+
+        await self.app(scope, receive, wrapped_send)
+
+    async def _finish(self, start: Message, body: bytes, request_headers: Headers, send: Send) -> None:
+        headers = MutableHeaders(raw=list(start["headers"]))
+        etag = headers.get("etag") or '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        headers["etag"] = etag
+        if "cache-control" not in headers:
+            # Let clients keep the body but revalidate every time; revalidation is a cheap 304
+            headers["cache-control"] = "private, no-cache"
+        headers.append("vary", "Accept-Encoding")
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            stats["not_modified"] += 1
+            for name in ("content-length", "content-type"):
+                if name in headers:
+                    del headers[name]
+            await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if len(body) >= self.minimum_size:
+            accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+            encoded, encoding = None, None
+            if brotli is not None and "br" in accepted:
+                encoding = "br"
+            elif "gzip" in accepted:
+                encoding = "gzip"
+            if encoding is not None:
+                encoded = await _compress(body, encoding)
+            if encoded is not None and len(encoded) < len(body):
+                stats[encoding] += 1
+                stats["bytes_saved"] += len(body) - len(encoded)
+                body = encoded
+                headers["content-encoding"] = encoding
+                # A strong ETag names one exact byte sequence, so each encoding gets its own
+                headers["etag"] = etag[:-1] + ("-br" if encoding == "br" else "-gz") + '"'
+
+        headers["content-length"] = str(len(body))
+        await send({**start, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,266 @@
+"""
+Image derivative pipeline for uploaded photos and receipts.
+Each upload gets a thumbnail and a medium WebP variant, written once under its content
+hash (data/derived/ab/<hash>-thumb.webp), so identical uploads share files and the
+hashed URLs can be cached by browsers forever. Variants are made on first request, by a
+background backfill over the upload directories, or by upload handlers calling
+`derive_upload()`. List endpoints resolve many filenames to thumbnail URLs with one
+query via `thumbnail_urls()`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.database import async_session
+from models.image_derivative import ImageDerivative
+from services.blocking_io import io_pool
+
+
+# kind -> upload directories under data_dir (first existing wins)
+UPLOAD_DIRS = {
+    "plants": ("plant_photos",),
+    "animals": ("animal_photos",),
+    "seeds": ("seed_photos",),
+    "journal": ("journal_photos", "garden_journal_photos"),
+    "team": ("team_logos", "team_photos"),
+    "receipts": ("receipts", "expense_receipts"),
+    "animal_receipts": ("animal_receipts", "animal_expense_receipts"),
+}
+PRIVATE_KINDS = {"receipts", "animal_receipts"}  # served to editors only, never by hash
+VARIANTS = {"thumb": 320, "medium": 1024}  # longest side, pixels
+WEBP_QUALITY = {"thumb": 72, "medium": 80}
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+BACKFILL_BATCH = 100
+PRUNE_GRACE = 3600  # seconds; newer variant files may belong to a row that hasn't committed yet
+DERIVED_NAME_RE = re.compile(r"^([0-9a-f]{32})-(thumb|medium)\.webp$")
+
+
+def derived_dir() -> Path:
+    return settings.data_dir / "derived"
+
+
+def derived_path(content_hash: str, variant: str) -> Path:
+    return derived_dir() / content_hash[:2] / f"{content_hash}-{variant}.webp"
+
+
+def derived_url(content_hash: str, variant: str) -> str:
+    return f"/images/derived/{content_hash}-{variant}.webp"
+
+
+def upload_dir(kind: str) -> Optional[Path]:
+    for name in UPLOAD_DIRS.get(kind, ()):
+        path = settings.data_dir / name
+        if path.is_dir():
+            return path
+    return None
+
+
+def source_path(kind: str, filename: str) -> Optional[Path]:
+    """SECURITY: basename only, resolved inside the kind's upload directory"""
+    directory = upload_dir(kind)
+    if directory is None or filename != os.path.basename(filename) or filename.startswith("."):
+        return None
+    path = (directory / filename).resolve()
+    if path.parent != directory.resolve() or not path.is_file() or path.suffix.lower() not in IMAGE_SUFFIXES:
+        return None
+    return path
+
+
+def _derive_sync(path: Path) -> dict:
+    """Decode once, write each variant (skipping ones already on disk for this content)"""
+    from PIL import Image, ImageOps
+
+    data = path.read_bytes()
+    content_hash = hashlib.sha256(data).hexdigest()[:32]
+    variants = {}
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        # JPEG: let libjpeg decode at a reduced scale; a 12 MP photo decodes ~4x faster
+        image.draft("RGB", (VARIANTS["medium"] * 2, VARIANTS["medium"] * 2))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "P") else "RGB")
+        for variant, longest in VARIANTS.items():
+            target = derived_path(content_hash, variant)
+            if target.exists():
+                # Reused for this upload: restart the prune grace period until its row commits
+                os.utime(target)
+            else:
+                copy = image.copy()
+                copy.thumbnail((longest, longest), Image.LANCZOS)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp = target.with_name(target.name + f".tmp{os.getpid()}")
+                copy.save(tmp, "WEBP", quality=WEBP_QUALITY[variant], method=4)
+                os.replace(tmp, target)
+            with Image.open(target) as saved:
+                variants[variant] = {"width": saved.width, "height": saved.height, "bytes": target.stat().st_size}
+    return {"content_hash": content_hash, "width": width, "height": height, "variants": variants}
+
+
+def _is_current(row: ImageDerivative, stat: os.stat_result) -> bool:
+    if row.source_size != stat.st_size or row.source_mtime != stat.st_mtime:
+        return False
+    if row.error:
+        return True  # unchanged and known-bad; don't retry
+    return all(derived_path(row.content_hash, v).exists() for v in VARIANTS)
+
+
+async def _derive_row(db: AsyncSession, kind: str, filename: str, path: Path, row: Optional[ImageDerivative]) -> ImageDerivative:
+    stat = path.stat()
+    if row is None:
+        row = ImageDerivative(kind=kind, filename=filename)
+        db.add(row)
+    row.source_size, row.source_mtime = stat.st_size, stat.st_mtime
+    try:
+        result = await io_pool.run(_derive_sync, path)
+    except Exception as e:  # Pillow raises a zoo of types for corrupt or unsupported files
+        logger.warning(f"Image derivatives failed for {kind}/{filename}: {e}")
+        row.error = str(e)[:255]
+        row.content_hash = row.variants = None
+        return row
+    row.error = None
+    row.content_hash = result["content_hash"]
+    row.width, row.height = result["width"], result["height"]
+    row.variants = json.dumps(result["variants"])
+    return row
+
+
+async def ensure(db: AsyncSession, kind: str, filename: str) -> Optional[ImageDerivative]:
+    """Current derivatives for an upload, generating them if missing or stale"""
+    path = source_path(kind, filename)
+    if path is None:
+        return None
+    row = (await db.execute(
+        select(ImageDerivative).where(ImageDerivative.kind == kind, ImageDerivative.filename == filename)
+    )).scalar_one_or_none()
+    if row is not None and _is_current(row, path.stat()):
+        return row
+    row = await _derive_row(db, kind, filename, path, row)
+    await db.commit()
+    return row
+
+
+async def derive_upload(kind: str, filename: str) -> None:
+    """For upload handlers: derive right after saving, in its own session"""
+    async with async_session() as db:
+        await ensure(db, kind, filename)
+
+
+async def is_private(db: AsyncSession, content_hash: str) -> bool:
+    """True when only receipts have this content; the same bytes uploaded as a photo stay public"""
+    kinds = set((await db.execute(
+        select(ImageDerivative.kind).where(ImageDerivative.content_hash == content_hash)
+    )).scalars())
+    return not kinds or kinds <= PRIVATE_KINDS
+
+
+async def thumbnail_urls(
+    db: AsyncSession, kind: str, filenames: list[Optional[str]], variant: str = "thumb"
+) -> dict[str, Optional[str]]:
+    """filename -> immutable variant URL (None until derived) for a page of list results"""
+    names = {os.path.basename(f) for f in filenames if f}
+    if not names:
+        return {}
+    rows = (await db.execute(
+        select(ImageDerivative.filename, ImageDerivative.content_hash)
+        .where(ImageDerivative.kind == kind, ImageDerivative.filename.in_(names))
+    )).all()
+    found = {name: derived_url(content_hash, variant) for name, content_hash in rows if content_hash}
+    return {name: found.get(name) for name in names}
+
+
+def _list_uploads(kind: str) -> list[tuple[str, float, int]]:
+    directory = upload_dir(kind)
+    if directory is None:
+        return []
+    listed = []
+    for entry in os.scandir(directory):
+        if entry.is_file(follow_symlinks=False) and Path(entry.name).suffix.lower() in IMAGE_SUFFIXES:
+            stat = entry.stat()
+            listed.append((entry.name, stat.st_mtime, stat.st_size))
+    return listed
+
+
+async def backfill(limit: int = BACKFILL_BATCH) -> int:
+    """Derive variants for new or changed uploads, at most `limit` per run"""
+    done = 0
+    async with async_session() as db:
+        for kind in UPLOAD_DIRS:
+            uploads = await io_pool.run(_list_uploads, kind)
+            if not uploads:
+                continue
+            rows = {
+                row.filename: row
+                for row in (await db.execute(select(ImageDerivative).where(ImageDerivative.kind == kind))).scalars()
+            }
+            for filename, mtime, size in uploads:
+                row = rows.get(filename)
+                if row is not None and row.source_mtime == mtime and row.source_size == size:
+                    continue
+                path = source_path(kind, filename)
+                if path is None:
+                    continue
+                await _derive_row(db, kind, filename, path, row)
+                await db.commit()
+                done += 1
+                if done >= limit:
+                    return done
+    if done:
+        logger.info(f"Image derivatives: backfilled {done} uploads")
+    await prune_orphans()
+    return done
+
+
+def _remove_unreferenced(referenced: set[str], grace: float = PRUNE_GRACE) -> int:
+    removed = 0
+    root = derived_dir()
+    if not root.is_dir():
+        return 0
+    cutoff = time.time() - grace
+    for path in root.glob("*/*.webp"):
+        match = DERIVED_NAME_RE.match(path.name)
+        if not match or match.group(1) in referenced:
+            continue
+        try:
+            if path.stat().st_mtime > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+async def prune_orphans() -> int:
+    """Forget deleted uploads and remove variant files no upload refers to any more.
+
+    Files written or reused within PRUNE_GRACE are kept: an upload being derived right
+    now has its variants on disk before its row commits.
+    """
+    async with async_session() as db:
+        rows = (await db.execute(select(ImageDerivative.id, ImageDerivative.kind, ImageDerivative.filename))).all()
+        present = {kind: {name for name, _, _ in await io_pool.run(_list_uploads, kind)} for kind in UPLOAD_DIRS}
+        gone = [row.id for row in rows if row.filename not in present.get(row.kind, set())]
+        for i in range(0, len(gone), 500):
+            await db.execute(delete(ImageDerivative).where(ImageDerivative.id.in_(gone[i:i + 500])))
+        await db.commit()
+        referenced = set((await db.execute(
+            select(ImageDerivative.content_hash).where(ImageDerivative.content_hash.is_not(None))
+        )).scalars())
+    removed = await io_pool.run(_remove_unreferenced, referenced)
+    if gone or removed:
+        logger.info(f"Image derivatives: dropped {len(gone)} deleted uploads, {removed} unused files")
+    return removed
@@ -0,0 +1,194 @@
+"""
+Per-job scheduler instrumentation.
+Listens to APScheduler events to record run-duration histograms, last success, failures,
+misfires and overlaps for every job, and applies max_instances / coalesce / misfire
+policies so a slow weather poll or CalDAV sync cannot stack up behind itself.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from apscheduler.events import (
+    EVENT_JOB_ADDED,
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+)
+from loguru import logger
+
+
+# Upper bounds (seconds) of the duration histogram buckets; the last bucket is open-ended
+DURATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300)
+
+
+@dataclass(frozen=True)
+class JobPolicy:
+    max_instances: int = 1
+    coalesce: bool = True
+    misfire_grace_time: int = 300  # seconds a late run may still start
+
+
+DEFAULT_POLICY = JobPolicy()
+
+# Matched against job ids by substring, first match wins
+JOB_POLICIES = (
+    # Stale readings are worthless; skip rather than catch up
+    ("weather", JobPolicy(max_instances=1, coalesce=True, misfire_grace_time=60)),
+    # Overlapping syncs fight over the same remote calendar
+    ("caldav", JobPolicy(max_instances=1, coalesce=True, misfire_grace_time=600)),
+    ("calendar", JobPolicy(max_instances=1, coalesce=True, misfire_grace_time=600)),
+    # Reminders/digests should still go out after the Pi wakes from a stall, but only once
+    ("reminder", JobPolicy(max_instances=1, coalesce=True, misfire_grace_time=6 * 3600)),
+    ("digest", JobPolicy(max_instances=1, coalesce=True, misfire_grace_time=6 * 3600)),
+    # Passes are idempotent; one catch-up run covers any number of missed ones
+    ("care_horizon", JobPolicy(max_instances=1, coalesce=True, misfire_grace_time=3600)),
+    ("image_derivatives", JobPolicy(max_instances=1, coalesce=True, misfire_grace_time=3600)),
+)
+
+
+def policy_for(job_id: str) -> JobPolicy:
+    lowered = job_id.lower()
+    for fragment, policy in JOB_POLICIES:
+        if fragment in lowered:
+            return policy
+    return DEFAULT_POLICY
+
+
+@dataclass
+class JobStats:
+    runs: int = 0
+    failures: int = 0
+    misfires: int = 0
+    overlaps: int = 0
+    last_success_at: Optional[datetime] = None
+    last_failure_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    last_duration: Optional[float] = None
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+    histogram: list[int] = field(default_factory=lambda: [0] * (len(DURATION_BUCKETS) + 1))
+
+    def observe(self, duration: float) -> None:
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if duration <= bound:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+    def to_dict(self) -> dict:
+        completed = self.runs + self.failures
+        labels = [f"le_{b}s" for b in DURATION_BUCKETS] + ["inf"]
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "misfires": self.misfires,
+            "overlaps": self.overlaps,
+            "last_success_at": self.last_success_at.isoformat() if self.last_success_at else None,
+            "last_failure_at": self.last_failure_at.isoformat() if self.last_failure_at else None,
+            "last_error": self.last_error,
+            "last_duration_s": round(self.last_duration, 3) if self.last_duration is not None else None,
+            "mean_duration_s": round(self.total_duration / completed, 3) if completed else None,
+            "max_duration_s": round(self.max_duration, 3),
+            "duration_histogram": dict(zip(labels, self.histogram)),
+        }
+
+
+class JobMetrics:
+    """APScheduler listener that keeps JobStats per job id"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, JobStats] = {}
+        self._started: dict[tuple, float] = {}
+        self._scheduler = None
+
+    def _job(self, job_id: str) -> JobStats:
+        stats = self._stats.get(job_id)
+        if stats is None:
+            stats = self._stats[job_id] = JobStats()
+        return stats
+
+    def _apply_policy(self, job) -> None:
+        policy = policy_for(job.id)
+        if (job.max_instances, job.coalesce, job.misfire_grace_time) != (
+            policy.max_instances, policy.coalesce, policy.misfire_grace_time
+        ):
+            job.modify(
+                max_instances=policy.max_instances,
+                coalesce=policy.coalesce,
+                misfire_grace_time=policy.misfire_grace_time,
+            )
+
+    def attach(self, scheduler) -> None:
+        """Start listening and apply policies to existing (and later-added) jobs"""
+        self._scheduler = scheduler
+        scheduler.add_listener(
+            self._on_event,
+            EVENT_JOB_ADDED | EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR
+            | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES,
+        )
+        for job in scheduler.get_jobs():
+            self._apply_policy(job)
+
+    def detach(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.remove_listener(self._on_event)
+            self._scheduler = None
+
+    def _on_event(self, event) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            if event.code == EVENT_JOB_ADDED:
+                job = self._scheduler.get_job(event.job_id, event.jobstore) if self._scheduler else None
+                if job is not None:
+                    self._apply_policy(job)
+                return
+
+            stats = self._job(event.job_id)
+            if event.code == EVENT_JOB_SUBMITTED:
+                for run_time in event.scheduled_run_times:
+                    self._started[(event.job_id, run_time)] = now
+            elif event.code in (EVENT_JOB_EXECUTED, EVENT_JOB_ERROR):
+                started = self._started.pop((event.job_id, event.scheduled_run_time), None)
+                if started is not None:
+                    stats.observe(now - started)
+                if event.code == EVENT_JOB_EXECUTED:
+                    stats.runs += 1
+                    stats.last_success_at = datetime.utcnow()
+                else:
+                    stats.failures += 1
+                    stats.last_failure_at = datetime.utcnow()
+                    stats.last_error = repr(event.exception)[:300]
+            elif event.code == EVENT_JOB_MISSED:
+                stats.misfires += 1
+                self._started.pop((event.job_id, event.scheduled_run_time), None)
+                logger.warning(f"Scheduler job {event.job_id} missed its {event.scheduled_run_time} run")
+            elif event.code == EVENT_JOB_MAX_INSTANCES:
+                stats.overlaps += 1
+                for run_time in event.scheduled_run_times:
+                    self._started.pop((event.job_id, run_time), None)
+                logger.warning(f"Scheduler job {event.job_id} still running; skipped overlapping run")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            jobs = {job_id: stats.to_dict() for job_id, stats in sorted(self._stats.items())}
+        if self._scheduler is not None:
+            for job in self._scheduler.get_jobs():
+                entry = jobs.setdefault(job.id, JobStats().to_dict())
+                entry["next_run_at"] = job.next_run_time.isoformat() if job.next_run_time else None
+                entry["max_instances"] = job.max_instances
+                entry["coalesce"] = job.coalesce
+        return jobs
+
+
+job_metrics = JobMetrics()
@@ -0,0 +1,128 @@
+"""
+Leader election for multi-worker deployments.
+Every uvicorn worker runs the lifespan, but only one may own the scheduler. Workers compete
+for an exclusive flock on a lock file; the kernel drops the lock when the holder exits, so a
+follower takes over within one retry interval if the leader dies.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import os
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+
+RETRY_INTERVAL = 5.0  # seconds between follower attempts
+
+
+def detect_workers() -> Optional[int]:
+    """uvicorn's worker count as launched: --workers on the supervisor's command line, else WEB_CONCURRENCY"""
+    try:
+        import psutil
+
+        cmdline = psutil.Process(os.getppid()).cmdline()
+    except Exception:
+        cmdline = []
+    for i, arg in enumerate(cmdline):
+        value = None
+        if arg == "--workers" and i + 1 < len(cmdline):
+            value = cmdline[i + 1]
+        elif arg.startswith("--workers="):
+            value = arg.split("=", 1)[1]
+        if value is not None and value.isdigit():
+            return int(value)
+    # uvicorn's default for --workers
+    concurrency = os.environ.get("WEB_CONCURRENCY", "")
+    return int(concurrency) if concurrency.isdigit() else None
+
+
+class LeaderElection:
+    """Non-blocking flock-based election with promote/demote callbacks"""
+
+    def __init__(self, lock_path: Path, retry_interval: float = RETRY_INTERVAL):
+        self.lock_path = Path(lock_path)
+        self.retry_interval = retry_interval
+        self._fd: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._on_elected: Optional[Callable[[], Awaitable[None]]] = None
+        self._on_demoted: Optional[Callable[[], Awaitable[None]]] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """Take the lock if nobody holds it. Safe to call repeatedly."""
+        if self._fd is not None:
+            return True
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        # Record the holder for operators; the lock itself is what matters
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        logger.info(f"Worker {os.getpid()} elected leader ({self.lock_path})")
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def holder_pid(self) -> Optional[int]:
+        try:
+            return int(self.lock_path.read_text().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+    async def _campaign(self) -> None:
+        while not self.is_leader:
+            await asyncio.sleep(self.retry_interval)
+            if self.try_acquire() and self._on_elected:
+                try:
+                    await self._on_elected()
+                except Exception as e:
+                    logger.error(f"Leader startup failed, releasing leadership: {e}")
+                    self.release()
+
+    async def start(
+        self,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        """Run `on_elected` now if we win, otherwise keep campaigning in the background"""
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        if self.try_acquire():
+            await on_elected()
+        else:
+            logger.info(f"Worker {os.getpid()} is a follower (leader pid {self.holder_pid()})")
+            self._task = asyncio.create_task(self._campaign())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader and self._on_demoted:
+            await self._on_demoted()
+        self.release()
+
+    def status(self) -> dict:
+        return {"is_leader": self.is_leader, "pid": os.getpid(), "leader_pid": self.holder_pid()}
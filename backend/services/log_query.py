@@ -0,0 +1,308 @@
+"""
+Log tail and search over the loguru files written by main.py, current and rotated.
+Files are read backwards from the end in fixed-size blocks, so the last N matching entries
+cost roughly N entries of IO rather than the whole file. Level and time-range queries use
+a sidecar index per file (logs/.index/) that records, for each ~64 KB block of whole
+entries, its byte offset, first/last timestamp and a bitmask of the levels it contains;
+blocks that can't match are never read. Rotated files are indexed once; the live file's
+index is extended from where it left off.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from loguru import logger
+
+
+# SECURITY: Fixed directory and file names only - callers pick a key, never a path
+LOGS_DIR = Path(__file__).resolve().parent.parent / "logs"
+INDEX_DIR = LOGS_DIR / ".index"
+LOG_FILES = {"app": "isaac.log", "debug": "debug.log"}
+
+BLOCK_SIZE = 64 * 1024
+INDEX_VERSION = 1
+MAX_LINES = 2000
+MAX_SCAN_BYTES = 64 * 1024 * 1024  # unindexed (text-only) scans stop here
+LEVELS = ("TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL")
+OTHER_LEVEL_BIT = 1 << len(LEVELS)
+
+# Matches main.py's file format: "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+ENTRY_RE = re.compile(rb"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) \| (\w+) *\| (.*)$")
+
+
+def _level_bit(level: str) -> int:
+    try:
+        return 1 << LEVELS.index(level.upper())
+    except ValueError:
+        return OTHER_LEVEL_BIT
+
+
+@dataclass
+class LogEntry:
+    timestamp: str
+    level: str
+    source: str
+    message: str
+    file: str
+
+    def as_dict(self) -> dict:
+        return {
+            "timestamp": self.timestamp,
+            "level": self.level,
+            "source": self.source,
+            "message": self.message,
+            "file": self.file,
+        }
+
+
+def _make_entry(header: re.Match, continuation: list[bytes], file: str) -> LogEntry:
+    rest = header.group(3).decode("utf-8", errors="replace")
+    source, sep, message = rest.partition(" - ")
+    if not sep:
+        source, message = "", rest
+    if continuation:
+        message += "\n" + "\n".join(line.decode("utf-8", errors="replace") for line in continuation)
+    return LogEntry(header.group(1).decode(), header.group(2).decode(), source, message, file)
+
+
+def read_entries_reverse(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[LogEntry]:
+    """Entries in bytes [start, end) newest first; `start` must be an entry boundary"""
+    with open(path, "rb") as f:
+        if end is None:
+            end = f.seek(0, os.SEEK_END)
+        position = end
+        carry = b""  # partial first line of the block read last
+        continuation: list[bytes] = []  # lines after a header, collected newest first
+        while position > start:
+            size = min(BLOCK_SIZE, position - start)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + carry).split(b"\n")
+            # lines[0] may continue in the previous block, unless we've reached `start`
+            carry = lines.pop(0) if position > start else b""
+            for line in reversed(lines):
+                match = ENTRY_RE.match(line)
+                if match:
+                    yield _make_entry(match, continuation[::-1], path.name)
+                    continuation = []
+                elif line:
+                    continuation.append(line)
+        if carry:
+            match = ENTRY_RE.match(carry)
+            if match:
+                yield _make_entry(match, continuation[::-1], path.name)
+
+
+# === Sidecar index ===
+
+def _index_path(path: Path) -> Path:
+    return INDEX_DIR / (path.name + ".idx")
+
+
+def _scan_blocks(path: Path, offset: int) -> tuple[list[list], int]:
+    """Forward scan from `offset` (an entry boundary) to the last complete line.
+
+    Returns blocks [offset, first_ts, last_ts, level_mask] and the end offset covered.
+    """
+    blocks: list[list] = []
+    current: Optional[list] = None
+    with open(path, "rb") as f:
+        f.seek(offset)
+        position = offset
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # writer is mid-line; pick it up next time
+            match = ENTRY_RE.match(line.rstrip(b"\n"))
+            if match:
+                stamp = match.group(1).decode()
+                if current is None or position - current[0] >= BLOCK_SIZE:
+                    current = [position, stamp, stamp, 0]
+                    blocks.append(current)
+                current[2] = stamp
+                current[3] |= _level_bit(match.group(2).decode())
+            elif current is None:
+                # Leading continuation lines (e.g. file starts mid-traceback) join the first block
+                current = [position, "", "", 0]
+                blocks.append(current)
+            position += len(line)
+    return blocks, position
+
+
+def load_index(path: Path) -> dict:
+    """Index for `path`, built or extended as needed and persisted"""
+    stat = path.stat()
+    sidecar = _index_path(path)
+    index = None
+    try:
+        index = json.loads(sidecar.read_text())
+    except (OSError, ValueError):
+        pass
+    valid = (
+        index is not None
+        and index.get("version") == INDEX_VERSION
+        and index.get("inode") == stat.st_ino
+        and index.get("size", 0) <= stat.st_size
+    )
+    if valid and index["size"] == stat.st_size:
+        return index
+    if valid and index["blocks"]:
+        # Rescan from the start of the last (possibly partial) block
+        last = index["blocks"].pop()
+        blocks, covered = _scan_blocks(path, last[0])
+        index["blocks"].extend(blocks)
+    else:
+        blocks, covered = _scan_blocks(path, 0)
+        index = {"version": INDEX_VERSION, "inode": stat.st_ino, "blocks": blocks}
+    index["size"] = covered
+
+    try:
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = sidecar.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(json.dumps(index, separators=(",", ":")))
+        os.replace(tmp, sidecar)
+    except OSError as e:
+        logger.debug(f"Could not write log index {sidecar}: {e}")
+    return index
+
+
+def prune_indexes() -> int:
+    """Remove sidecars whose log file has been deleted by retention or clear-logs"""
+    removed = 0
+    if not INDEX_DIR.is_dir():
+        return 0
+    for sidecar in INDEX_DIR.iterdir():
+        if sidecar.is_file() and not (LOGS_DIR / sidecar.name.removesuffix(".idx")).exists():
+            try:
+                sidecar.unlink()
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+# === Queries ===
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def log_files(log_file: str) -> list[Path]:
+    """The live file followed by its rotated copies, newest first"""
+    name = LOG_FILES.get(log_file)
+    if name is None:
+        raise ValueError(f"Unknown log file: {log_file}")
+    stem, suffix = name.rsplit(".", 1)
+    files = [p for p in LOGS_DIR.glob(f"{stem}.*.{suffix}") if p.is_file() and not p.is_symlink()]
+    files.sort(key=_mtime, reverse=True)
+    current = LOGS_DIR / name
+    return ([current] if current.is_file() else []) + files
+
+
+def _ranges(
+    path: Path, level_bit: Optional[int], since: Optional[str], until: Optional[str]
+) -> tuple[list[tuple[int, int]], bool]:
+    """Byte ranges that may hold matching entries, newest first (adjacent blocks merged),
+    and whether the file reaches back past `since` (so older files can be skipped)"""
+    index = load_index(path)
+    blocks = index["blocks"]
+    ranges: list[tuple[int, int]] = []
+    # The live file may have grown past the index since it was loaded; that tail is read unfiltered
+    file_end = path.stat().st_size
+    if file_end > index["size"]:
+        ranges.append((index["size"], file_end))
+    for i in range(len(blocks) - 1, -1, -1):
+        offset, first, last, mask = blocks[i]
+        end = blocks[i + 1][0] if i + 1 < len(blocks) else index["size"]
+        if since is not None and last and last < since:
+            return ranges, True  # everything older is older still
+        if level_bit is not None and not mask & level_bit:
+            continue
+        if until is not None and first and first > until:
+            continue
+        if ranges and ranges[-1][0] == end:
+            ranges[-1] = (offset, ranges[-1][1])
+        else:
+            ranges.append((offset, end))
+    reached = since is not None and bool(blocks) and bool(blocks[0][1]) and blocks[0][1] < since
+    return ranges, reached
+
+
+def query_logs(
+    log_file: str = "app",
+    lines: int = 100,
+    level: Optional[str] = None,
+    search: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict:
+    """Last `lines` matching entries across the live and rotated files, oldest first.
+
+    `level` is an exact level name; `search` a case-insensitive substring of the message
+    or source. Blocking; run it on io_pool.
+    """
+    lines = max(1, min(lines, MAX_LINES))
+    level = level.upper() if level else None
+    needle = search.lower() if search else None
+    since_s = since.strftime("%Y-%m-%d %H:%M:%S") if since else None
+    until_s = until.strftime("%Y-%m-%d %H:%M:%S") if until else None
+    indexed = level is not None or since is not None or until is not None
+
+    found: list[LogEntry] = []
+    scanned = 0  # upper bound on bytes read by unindexed scans
+    truncated = False
+    done = False
+    past_since = False  # this file reaches back past `since`, so older files can't match
+    files = log_files(log_file)
+    prune_indexes()
+    for path in files:
+        try:
+            if indexed:
+                ranges, past_since = _ranges(path, _level_bit(level) if level else None, since_s, until_s)
+            else:
+                ranges = [(0, path.stat().st_size)]
+        except OSError:
+            continue  # rotated away or deleted mid-query
+        for start, end in ranges:
+            if not indexed and scanned + (end - start) > MAX_SCAN_BYTES:
+                start = max(start, end - (MAX_SCAN_BYTES - scanned))
+                truncated = done = True
+            scanned += end - start
+            try:
+                for entry in read_entries_reverse(path, start, end):
+                    if until_s is not None and entry.timestamp > until_s:
+                        continue
+                    if since_s is not None and entry.timestamp < since_s:
+                        done = True
+                        break
+                    if level is not None and entry.level != level:
+                        continue
+                    if needle is not None and needle not in entry.message.lower() and needle not in entry.source.lower():
+                        continue
+                    found.append(entry)
+                    if len(found) >= lines:
+                        done = True
+                        break
+            except OSError:
+                break
+            if done:
+                break
+        if done or past_since:
+            break
+
+    return {
+        "log_file": log_file,
+        "files": [p.name for p in files],
+        "count": len(found),
+        "truncated": truncated,
+        "entries": [entry.as_dict() for entry in reversed(found)],
+    }
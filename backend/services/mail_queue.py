@@ -0,0 +1,286 @@
+"""
+Queued, pooled email delivery.
+Callers enqueue rows in outbound_emails inside their own transaction; one worker (on the leader) delivers them over a
+single authenticated SMTP connection, retries with exponential backoff, and merges alerts
+that share a coalesce key within a short window into one digest.
+
+Server settings come from EmailService, the same source the direct senders use.
+For local testing point SMTP_HOST/SMTP_PORT at a sink, e.g.
+    python -m aiosmtpd -n -l localhost:1025
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from itertools import groupby
+from typing import Optional
+
+import aiosmtplib
+from loguru import logger
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.mail_queue import OutboundEmail
+from services.email import EmailService, ConfigurationError
+
+
+POLL_INTERVAL = 5.0  # seconds between queue scans when nothing wakes the worker
+COALESCE_WINDOW = timedelta(minutes=2)  # how long an alert waits for siblings
+MAX_ATTEMPTS = 6
+RETRY_BASE = 30  # seconds; doubles per attempt
+RETRY_MAX = 3600
+IDLE_DISCONNECT = 60  # seconds; providers drop idle sessions anyway
+SEND_TIMEOUT = 30.0
+SUBJECT_PREFIX = "[Isaac] "
+_WAKE_KEY = "mail_queue_wake"
+
+
+async def enqueue_email(
+    db: AsyncSession,
+    subject: str,
+    body: str,
+    to: str,
+    html: bool = False,
+    no_prefix: bool = False,
+    coalesce_key: Optional[str] = None,
+) -> OutboundEmail:
+    """Queue an email in the caller's transaction; the worker is woken once the caller commits"""
+    email = OutboundEmail(
+        to=to,
+        subject=subject,
+        body=body,
+        html=html,
+        no_prefix=no_prefix,
+        coalesce_key=coalesce_key,
+    )
+    db.add(email)
+    await db.flush()
+    db.sync_session.info[_WAKE_KEY] = True
+    return email
+
+
+# Wake the worker only once the row is visible to its session; a rolled-back alert never sends
+@event.listens_for(Session, "after_commit")
+def _wake_on_commit(session: Session) -> None:
+    if session.info.pop(_WAKE_KEY, False):
+        mail_worker.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_WAKE_KEY, None)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_MAX, RETRY_BASE * 2 ** max(0, attempts - 1)))
+
+
+def build_digest(rows: list[OutboundEmail]) -> tuple[str, str, bool]:
+    """Merge several queued alerts into one subject/body"""
+    if len(rows) == 1:
+        return rows[0].subject, rows[0].body, rows[0].html
+    subjects = "; ".join(dict.fromkeys(r.subject for r in rows))
+    subject = f"{len(rows)} alerts: {subjects}"
+    if len(subject) > 200:
+        subject = subject[:197] + "..."
+    html = all(r.html for r in rows)
+    if html:
+        body = "<hr>".join(f"<h3>{r.subject}</h3>{r.body}" for r in rows)
+    else:
+        body = "\n\n".join(f"== {r.subject} ==\n{r.body}" for r in rows)
+    return subject, body, html
+
+
+def build_message(sender: str, to: str, subject: str, body: str, html: bool) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = to
+    message["Subject"] = subject
+    # Some providers reject or spam-score mail without these; the pooled client does not add them
+    message["Date"] = formatdate(localtime=True)
+    message["Message-ID"] = make_msgid(domain=sender.rpartition("@")[2] or None)
+    message.set_content(body, subtype="html" if html else "plain")
+    return message
+
+
+class MailQueueWorker:
+    """Background delivery loop holding one reusable SMTP session"""
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._last_used = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.stats = {"sent": 0, "digests": 0, "retries": 0, "failed": 0, "connections": 0}
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    async def _smtp_config(self, db: AsyncSession) -> Optional[dict]:
+        """Connection settings from EmailService; None when email is not configured"""
+        try:
+            service = await EmailService.get_configured_service(db)
+        except ConfigurationError:
+            return None
+        return {
+            "host": service.smtp_host,
+            "port": int(service.smtp_port),
+            "user": service.smtp_user,
+            "password": service.smtp_password,
+            "sender": service.smtp_from or service.smtp_user,
+        }
+
+    async def _connection(self, config: dict) -> aiosmtplib.SMTP:
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+        smtp = aiosmtplib.SMTP(
+            hostname=config["host"],
+            port=config["port"],
+            use_tls=config["port"] == 465,
+            timeout=SEND_TIMEOUT,
+        )
+        await smtp.connect()
+        if config["user"] and config["password"]:
+            await smtp.login(config["user"], config["password"])
+        self._smtp = smtp
+        self.stats["connections"] += 1
+        return smtp
+
+    async def _disconnect(self) -> None:
+        if self._smtp is not None:
+            try:
+                if self._smtp.is_connected:
+                    await self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    async def _send(self, config: dict, to: str, subject: str, body: str, html: bool) -> None:
+        message = build_message(config["sender"], to, subject, body, html)
+        try:
+            smtp = await self._connection(config)
+            await smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # The pooled session went stale; reconnect once
+            self._smtp = None
+            smtp = await self._connection(config)
+            await smtp.send_message(message)
+        self._last_used = time.monotonic()
+
+    def _ready_groups(self, rows: list[OutboundEmail], now: datetime) -> list[list[OutboundEmail]]:
+        """Split due rows into send groups; coalescible rows wait out their window"""
+        groups = []
+        plain = [r for r in rows if not r.coalesce_key]
+        groups.extend([r] for r in plain)
+        keyed = sorted((r for r in rows if r.coalesce_key), key=lambda r: (r.to, r.coalesce_key, r.id))
+        for _, members in groupby(keyed, key=lambda r: (r.to, r.coalesce_key)):
+            members = list(members)
+            if now - min(m.created_at for m in members) >= COALESCE_WINDOW:
+                groups.append(members)
+        return groups
+
+    async def process_due(self) -> int:
+        """Deliver everything that is due; returns the number of messages sent"""
+        from models.database import async_session
+
+        now = datetime.utcnow()
+        sent = 0
+        async with (self._session_factory or async_session)() as db:
+            result = await db.execute(
+                select(OutboundEmail)
+                .where(OutboundEmail.status == "pending")
+                .where(OutboundEmail.next_attempt_at <= now)
+                .order_by(OutboundEmail.id)
+                .limit(200)
+            )
+            rows = result.scalars().all()
+            if not rows:
+                return 0
+
+            config = await self._smtp_config(db)
+            if config is None:
+                await db.execute(
+                    update(OutboundEmail)
+                    .where(OutboundEmail.id.in_([r.id for r in rows]))
+                    .values(status="failed", last_error="SMTP not configured")
+                )
+                await db.commit()
+                logger.debug(f"Email not configured; dropped {len(rows)} queued messages")
+                return 0
+
+            for group in self._ready_groups(rows, now):
+                subject, body, html = build_digest(group)
+                head = group[0]
+                if not head.no_prefix:
+                    subject = SUBJECT_PREFIX + subject
+                try:
+                    await self._send(config, head.to, subject, body, html)
+                except Exception as e:
+                    await self._disconnect()
+                    for row in group:
+                        row.attempts += 1
+                        row.last_error = str(e)[:500]
+                        if row.attempts >= MAX_ATTEMPTS:
+                            row.status = "failed"
+                            self.stats["failed"] += 1
+                        else:
+                            row.next_attempt_at = now + _retry_delay(row.attempts)
+                            self.stats["retries"] += 1
+                    logger.warning(f"Email to {head.to} failed (attempt {head.attempts}): {e}")
+                else:
+                    for row in group:
+                        row.status = "sent"
+                        row.sent_at = datetime.utcnow()
+                        row.attempts += 1
+                        row.digest_id = head.id if len(group) > 1 else None
+                    sent += 1
+                    self.stats["sent"] += 1
+                    if len(group) > 1:
+                        self.stats["digests"] += 1
+                # Commit per group so a crash never re-sends what already went out
+                await db.commit()
+        return sent
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.process_due()
+            except Exception as e:
+                logger.warning(f"Mail queue pass failed: {e}")
+            if self._smtp is not None and time.monotonic() - self._last_used > IDLE_DISCONNECT:
+                await self._disconnect()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._disconnect()
+
+    def status(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "connected": self._smtp is not None and self._smtp.is_connected,
+            **self.stats,
+        }
+
+
+mail_worker = MailQueueWorker()
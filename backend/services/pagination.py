@@ -0,0 +1,191 @@
+"""
+Shared keyset pagination and sparse field selection for list endpoints.
+
+A router opts in with the `page_params` dependency and one `paginate()` call:
+
+    @router.get("/")
+    async def list_plants(page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_db)):
+        query = select(Plant).where(Plant.is_active == True)
+        return await paginate(db, query, page, sort=[Plant.name], response_model=PlantResponse)
+
+Cursors are opaque and bound to the sort they were issued for. Sort keys must be
+non-null (wrap nullable columns in func.coalesce); the primary key is always appended
+as a tiebreaker so every row has a unique, stable position.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel, create_model
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import UnaryExpression
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+@dataclass
+class PageParams:
+    cursor: Optional[str]
+    limit: int
+    fields: Optional[list[str]]
+
+
+def page_params(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name"),
+) -> PageParams:
+    wanted = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    return PageParams(cursor=cursor, limit=limit, fields=wanted)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return getattr(value, "value", value)
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def _sort_signature(keys: Sequence) -> str:
+    text = "|".join(f"{_column(key)}:{_is_desc(key)}" for key in keys)
+    return hashlib.sha1(text.encode()).hexdigest()[:8]
+
+
+def encode_cursor(values: Sequence[Any], signature: str) -> str:
+    payload = json.dumps({"s": signature, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, signature: str, length: int) -> list[Any]:
+    """Key values from a cursor issued for `signature`; any malformed cursor is a 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if payload.get("s") != signature:
+        raise HTTPException(status_code=400, detail="Cursor does not match this listing's sort order")
+    try:
+        values = [_decode_value(v) for v in payload["v"]]
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != length:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _is_desc(key) -> bool:
+    return isinstance(key, UnaryExpression) and getattr(key.modifier, "__name__", "") == "desc_op"
+
+
+def _column(key):
+    return key.element if isinstance(key, UnaryExpression) else key
+
+
+def keyset_predicate(keys: Sequence, values: Sequence[Any]):
+    """Rows strictly after `values` in (mixed asc/desc) key order"""
+    clauses = []
+    for i, key in enumerate(keys):
+        column = _column(key)
+        step = column < values[i] if _is_desc(key) else column > values[i]
+        clauses.append(and_(*[_column(k) == values[j] for j, k in enumerate(keys[:i])], step))
+    return or_(*clauses)
+
+
+@lru_cache(maxsize=256)
+def project_model(model: type[BaseModel], fields: Optional[tuple[str, ...]]) -> type[BaseModel]:
+    """Response model narrowed to `fields` (all fields when None)"""
+    if not fields:
+        return model
+    subset = {
+        name: (info.annotation, info)
+        for name, info in model.model_fields.items()
+        if name in fields
+    }
+    return create_model(f"{model.__name__}Partial", __config__=model.model_config, **subset)
+
+
+def _select_fields(fields: Optional[list[str]], allowed: set[str], required: set[str]) -> Optional[list[str]]:
+    if not fields:
+        return None
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*required, *fields]))
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    page: PageParams,
+    sort: Sequence,
+    response_model: Optional[type[BaseModel]] = None,
+) -> dict:
+    """One page of `query` (a select of a single mapped class) in keyset order.
+
+    `fields` narrows the SELECT to those columns and the response to those fields.
+    Returns {"items", "next_cursor", "limit"}; next_cursor is None on the last page.
+    """
+    entity = query.column_descriptions[0]["entity"]
+    table_columns = {c.key: c for c in entity.__table__.columns}
+    pk = entity.__mapper__.primary_key[0]
+    keys = [*sort, pk]
+    signature = _sort_signature(keys)
+
+    allowed = set(table_columns)
+    if response_model is not None:
+        allowed &= set(response_model.model_fields)
+    fields = _select_fields(page.fields, allowed, {pk.key})
+
+    # Sort keys ride along as labelled columns so cursors work for expressions too
+    key_columns = [_column(k).label(f"_k{i}") for i, k in enumerate(keys)]
+    if fields is not None:
+        # Same FROM/WHERE, narrower SELECT list
+        query = query.with_only_columns(*[table_columns[f] for f in fields], *key_columns)
+    else:
+        query = query.add_columns(*key_columns)
+    if page.cursor:
+        query = query.where(keyset_predicate(keys, decode_cursor(page.cursor, signature, len(keys))))
+    query = query.order_by(None).order_by(*keys).limit(page.limit + 1)
+
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > page.limit
+    rows = rows[:page.limit]
+
+    model = project_model(response_model, tuple(fields) if fields else None) if response_model else None
+    items = []
+    for row in rows:
+        if fields is not None:
+            data = {f: getattr(row, f) for f in fields}
+        else:
+            data = row[0] if model is not None else {key: getattr(row[0], key) for key in table_columns}
+        items.append(model.model_validate(data, from_attributes=True).model_dump(mode="json") if model else data)
+
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor([getattr(rows[-1], f"_k{i}") for i in range(len(keys))], signature)
+    return {"items": items, "next_cursor": next_cursor, "limit": page.limit}
@@ -0,0 +1,362 @@
+"""
+Plant database import client (PFAF, Permapeople).
+One pooled httpx client is shared by every search and import. Fetched pages are cached
+on disk and revalidated with ETag / Last-Modified, so a repeat lookup usually costs a
+304 or nothing at all; parsed records are cached next to the page they came from and
+reused while the page is unchanged. Pages are parsed with lxml XPath directly rather
+than through BeautifulSoup trees, and bulk imports fetch concurrently under a cap.
+
+Tests and offline runs pass `transport=recorded_transport(fixtures_dir)` to replay
+recorded pages without touching the network.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import quote_plus, urljoin, urlparse
+
+import httpx
+from loguru import logger
+from lxml import html as lxml_html
+
+from config import settings
+from services.blocking_io import io_pool
+
+
+PARSER_VERSION = 1  # bump when a parser changes so cached records are re-parsed
+FRESH_FOR = 24 * 3600  # seconds a cached page is served without revalidating
+BULK_CONCURRENCY = 4  # be polite to small volunteer-run sites
+MAX_BULK = 50
+USER_AGENT = "Isaac-Farm-Assistant/1.0 (+plant import)"
+
+
+class PlantImportError(Exception):
+    """A page couldn't be fetched or didn't look like a plant record"""
+
+
+# === Parsing ===
+
+def _text(node) -> str:
+    return " ".join(node.text_content().split()) if node is not None else ""
+
+
+def _first(tree, xpath: str) -> str:
+    found = tree.xpath(xpath)
+    if not found:
+        return ""
+    value = found[0]
+    return " ".join(value.split()) if isinstance(value, str) else _text(value)
+
+
+def _pairs(tree) -> dict[str, str]:
+    """Label/value pairs from definition lists and two-column table rows"""
+    pairs: dict[str, str] = {}
+    for row in tree.xpath("//tr[count(th|td) = 2]"):
+        label, value = row.xpath("th|td")
+        key = _text(label).rstrip(":").strip().lower()
+        if key and key not in pairs:
+            pairs[key] = _text(value)
+    for term in tree.xpath("//dt"):
+        definition = term.getnext()
+        key = _text(term).rstrip(":").strip().lower()
+        if definition is not None and definition.tag == "dd" and key and key not in pairs:
+            pairs[key] = _text(definition)
+    return pairs
+
+
+_ZONE_RE = re.compile(r"(\d{1,2})\s*(?:-|to)\s*(\d{1,2})")
+
+
+def _hardiness(value: str) -> Optional[str]:
+    match = _ZONE_RE.search(value or "")
+    return f"{match.group(1)}-{match.group(2)}" if match else None
+
+
+def parse_pfaf_record(tree, url: str) -> dict:
+    by_id = lambda suffix: _first(tree, f"//*[@id='ContentPlaceHolder1_{suffix}']")
+    latin = by_id("lbldisplatinname") or _first(tree, "//h1")
+    if not latin:
+        raise PlantImportError("Not a PFAF plant page")
+    return {
+        "source": "pfaf",
+        "source_url": url,
+        "name": by_id("lblCommanName") or latin,
+        "latin_name": latin,
+        "family": by_id("lblFamily") or None,
+        "hardiness_zones": _hardiness(by_id("lblUSDAhardiness")),
+        "description": by_id("txtSummary") or None,
+        "edible_uses": by_id("txtEdibleUses") or None,
+        "medicinal_uses": by_id("txtMediUses") or None,
+        "cultivation": by_id("txtCultivationDetails") or None,
+        "propagation": by_id("txtPropagation") or None,
+    }
+
+
+def parse_pfaf_search(tree, base_url: str) -> list[dict]:
+    results = []
+    for link in tree.xpath("//table//a[contains(@href, 'Plant.aspx?LatinName=')]"):
+        row = link.getparent().getparent()
+        cells = row.xpath("td") if row is not None else []
+        results.append({
+            "source": "pfaf",
+            "url": urljoin(base_url, link.get("href")),
+            "latin_name": _text(link),
+            "name": _text(cells[1]) if len(cells) > 1 else _text(link),
+        })
+    return results
+
+
+def parse_permapeople_record(tree, url: str) -> dict:
+    name = _first(tree, "//h1")
+    if not name:
+        raise PlantImportError("Not a Permapeople plant page")
+    pairs = _pairs(tree)
+    return {
+        "source": "permapeople",
+        "source_url": url,
+        "name": name,
+        "latin_name": pairs.get("latin name") or pairs.get("scientific name") or _first(tree, "//h1/following-sibling::*[1]") or None,
+        "family": pairs.get("family") or None,
+        "hardiness_zones": _hardiness(pairs.get("usda hardiness zone", "")),
+        "description": _first(tree, "//meta[@name='description']/@content") or None,
+        "edible_uses": pairs.get("edible parts") or pairs.get("edible uses") or None,
+        "medicinal_uses": pairs.get("medicinal") or None,
+        "cultivation": pairs.get("growth") or pairs.get("soil type") or None,
+        "propagation": pairs.get("propagation") or None,
+        "sun": pairs.get("light requirement") or None,
+        "water": pairs.get("water requirement") or None,
+    }
+
+
+def parse_permapeople_search(tree, base_url: str) -> list[dict]:
+    results = []
+    seen = set()
+    for link in tree.xpath("//a[starts-with(@href, '/plants/')]"):
+        href = urljoin(base_url, link.get("href"))
+        name = _text(link)
+        if href in seen or not name:
+            continue
+        seen.add(href)
+        results.append({"source": "permapeople", "url": href, "name": name, "latin_name": None})
+    return results
+
+
+@dataclass(frozen=True)
+class PlantSource:
+    name: str
+    host: str
+    search_url: Callable[[str], str]
+    parse_search: Callable
+    parse_record: Callable
+
+
+SOURCES = {
+    "pfaf": PlantSource(
+        "pfaf", "pfaf.org",
+        lambda q: f"https://pfaf.org/user/DatabaseSearhResult.aspx?LatinName={quote_plus(q)}",
+        parse_pfaf_search, parse_pfaf_record,
+    ),
+    "permapeople": PlantSource(
+        "permapeople", "permapeople.org",
+        lambda q: f"https://permapeople.org/search?q={quote_plus(q)}",
+        parse_permapeople_search, parse_permapeople_record,
+    ),
+}
+
+
+def source_for(url: str) -> PlantSource:
+    host = (urlparse(url).hostname or "").removeprefix("www.")
+    for source in SOURCES.values():
+        if host == source.host:
+            return source
+    raise PlantImportError(f"Unsupported plant database: {host or url}")
+
+
+# === Disk cache ===
+
+class PageCache:
+    """Page bodies (gzip) plus validators, and parsed records keyed by body hash"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _paths(self, url: str) -> tuple[Path, Path, Path]:
+        key = hashlib.sha1(url.encode()).hexdigest()
+        base = self.directory / key[:2] / key
+        return base.with_suffix(".meta.json"), base.with_suffix(".html.gz"), base.with_suffix(".record.json")
+
+    def load(self, url: str) -> tuple[Optional[dict], Optional[bytes]]:
+        meta_path, body_path, _ = self._paths(url)
+        try:
+            return json.loads(meta_path.read_text()), gzip.decompress(body_path.read_bytes())
+        except (OSError, ValueError):
+            return None, None
+
+    def store(self, url: str, meta: dict, body: Optional[bytes] = None) -> None:
+        meta_path, body_path, _ = self._paths(url)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        if body is not None:
+            body_path.write_bytes(gzip.compress(body, compresslevel=6))
+        meta_path.write_text(json.dumps(meta))
+
+    def load_record(self, url: str, body_hash: str) -> Optional[dict]:
+        _, _, record_path = self._paths(url)
+        try:
+            cached = json.loads(record_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if cached.get("body_hash") != body_hash or cached.get("parser_version") != PARSER_VERSION:
+            return None
+        return cached["record"]
+
+    def store_record(self, url: str, body_hash: str, record: dict) -> None:
+        _, _, record_path = self._paths(url)
+        record_path.parent.mkdir(parents=True, exist_ok=True)
+        record_path.write_text(json.dumps({"body_hash": body_hash, "parser_version": PARSER_VERSION, "record": record}))
+
+
+# === Client ===
+
+class PlantImportClient:
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        fresh_for: float = FRESH_FOR,
+        concurrency: int = BULK_CONCURRENCY,
+    ):
+        self.cache = PageCache(cache_dir or settings.data_dir / "cache" / "plant_import")
+        self.transport = transport
+        self.fresh_for = fresh_for
+        self.concurrency = concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {"fresh": 0, "revalidated": 0, "fetched": 0, "records_cached": 0, "records_parsed": 0}
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self.transport,
+                timeout=httpx.Timeout(20.0, connect=5.0),
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+                headers={"User-Agent": USER_AGENT},
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, url: str) -> bytes:
+        """Page body, from cache when fresh, revalidated when stale"""
+        meta, body = await io_pool.run(self.cache.load, url)
+        if meta is not None and body is not None and time.time() - meta["fetched_at"] < self.fresh_for:
+            self.stats["fresh"] += 1
+            return body
+
+        headers = {}
+        if meta is not None and body is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            response = await self._http().get(url, headers=headers)
+        except httpx.HTTPError as e:
+            if body is not None:
+                logger.warning(f"Plant import fetch failed, serving stale copy of {url}: {e}")
+                return body
+            raise PlantImportError(f"Could not reach {urlparse(url).hostname}: {e}") from e
+
+        if response.status_code == 304 and body is not None:
+            self.stats["revalidated"] += 1
+            meta["fetched_at"] = time.time()
+            await io_pool.run(self.cache.store, url, meta)
+            return body
+        if response.status_code != 200:
+            raise PlantImportError(f"{urlparse(url).hostname} returned {response.status_code}")
+
+        self.stats["fetched"] += 1
+        body = response.content
+        meta = {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "fetched_at": time.time(),
+        }
+        await io_pool.run(self.cache.store, url, meta, body)
+        return body
+
+    async def search(self, query: str, sources: Optional[list[str]] = None) -> list[dict]:
+        """Search each source concurrently; a failing source is logged and skipped"""
+        wanted = [SOURCES[name] for name in (sources or SOURCES) if name in SOURCES]
+
+        async def one(source: PlantSource) -> list[dict]:
+            url = source.search_url(query)
+            body = await self.fetch(url)
+            return await io_pool.run(lambda: source.parse_search(lxml_html.document_fromstring(body), url))
+
+        results = []
+        for source, found in zip(wanted, await asyncio.gather(*(one(s) for s in wanted), return_exceptions=True)):
+            if isinstance(found, Exception):
+                logger.warning(f"Plant search on {source.name} failed: {found}")
+                continue
+            results.extend(found)
+        return results
+
+    async def record(self, url: str) -> dict:
+        """Parsed plant record for a source page URL"""
+        source = source_for(url)
+        body = await self.fetch(url)
+        body_hash = hashlib.sha1(body).hexdigest()
+        cached = await io_pool.run(self.cache.load_record, url, body_hash)
+        if cached is not None:
+            self.stats["records_cached"] += 1
+            return cached
+        record = await io_pool.run(lambda: source.parse_record(lxml_html.document_fromstring(body), url))
+        self.stats["records_parsed"] += 1
+        await io_pool.run(self.cache.store_record, url, body_hash, record)
+        return record
+
+    async def records(self, urls: list[str]) -> list[dict]:
+        """Bulk import: records fetched concurrently (capped); failures reported per URL"""
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def one(url: str) -> dict:
+            async with limit:
+                try:
+                    return {"url": url, "record": await self.record(url)}
+                except PlantImportError as e:
+                    return {"url": url, "error": str(e)}
+
+        return await asyncio.gather(*(one(url) for url in dict.fromkeys(urls)))
+
+
+def recorded_transport(directory: Path) -> httpx.MockTransport:
+    """Replay pages recorded under `directory`: index.json maps URL -> {"file", "headers"?, "status"?}"""
+    directory = Path(directory)
+    index = json.loads((directory / "index.json").read_text())
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        entry = index.get(str(request.url))
+        if entry is None:
+            return httpx.Response(404)
+        headers = entry.get("headers", {})
+        etag = headers.get("etag") or headers.get("ETag")
+        if etag and request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(entry.get("status", 200), headers=headers, content=(directory / entry["file"]).read_bytes())
+
+    return httpx.MockTransport(handler)
+
+
+plant_import_client = PlantImportClient()
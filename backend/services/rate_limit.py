@@ -0,0 +1,167 @@
+"""
+Rate-limit state stores.
+A single worker keeps sliding windows in memory. With several uvicorn workers each process
+would only see its share of a client's requests, so the windows move to a SQLite file that
+all workers share (on /dev/shm when available, so it never touches the SD card).
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from config import settings
+
+
+SHARED_MEMORY_DIR = Path("/dev/shm")
+CLEANUP_INTERVAL = 300  # seconds
+LOCK_TIMEOUT = 0.25  # seconds to wait for another worker's write lock before failing open
+FAILURE_LOG_INTERVAL = 60  # seconds between "store unavailable" warnings
+
+
+class MemoryRateLimitStore:
+    """Per-process sliding windows (the original single-worker behaviour)"""
+
+    blocking = False
+
+    def __init__(self, window: int):
+        self.window = window
+        self._requests = defaultdict(list)
+        self._writes = defaultdict(list)
+        self._last_cleanup = time.monotonic()
+
+    def check_and_record(self, client_ip: str, is_write: bool, global_limit: int, write_limit: int) -> Optional[str]:
+        """Record one request; return "global" or "write" if it exceeds a limit instead"""
+        now = time.monotonic()
+        cutoff = now - self.window
+
+        # Periodic cleanup of stale IPs (every 5 minutes)
+        if now - self._last_cleanup > CLEANUP_INTERVAL:
+            stale = [ip for ip, ts in self._requests.items() if not ts or ts[-1] < cutoff]
+            for ip in stale:
+                self._requests.pop(ip, None)
+                self._writes.pop(ip, None)
+            self._last_cleanup = now
+
+        # Clean old entries for this IP
+        self._requests[client_ip] = [t for t in self._requests[client_ip] if t > cutoff]
+        if len(self._requests[client_ip]) >= global_limit:
+            return "global"
+
+        if is_write:
+            self._writes[client_ip] = [t for t in self._writes[client_ip] if t > cutoff]
+            if len(self._writes[client_ip]) >= write_limit:
+                return "write"
+            self._writes[client_ip].append(now)
+
+        self._requests[client_ip].append(now)
+        return None
+
+
+class SQLiteRateLimitStore:
+    """Sliding windows shared by every worker through one small SQLite file.
+
+    Timestamps are wall-clock (time.time) because monotonic clocks are not comparable
+    across processes. Calls block on the file lock, so callers run them off the event loop.
+    If the store is locked or unavailable the request is let through: a missed count is
+    better than an error page.
+    """
+
+    blocking = True
+
+    def __init__(self, window: int, path: Path):
+        self.window = window
+        self.path = Path(path)
+        self._local = threading.local()
+        self._last_cleanup = 0.0
+        self._last_failure_log = 0.0
+        self.failures = 0
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_hits ("
+            " client_ip TEXT NOT NULL, ts REAL NOT NULL, is_write INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_rate_limit_hits_ip_ts ON rate_limit_hits (client_ip, ts)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=LOCK_TIMEOUT, isolation_level=None)
+            # Losing rate-limit history on power loss is fine; an fsync per request is not
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def check_and_record(self, client_ip: str, is_write: bool, global_limit: int, write_limit: int) -> Optional[str]:
+        try:
+            conn = self._conn()
+            # IMMEDIATE takes the write lock up front so check + insert is atomic across workers
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            self._failed(e)
+            return None
+        try:
+            exceeded = self._check_locked(conn, client_ip, is_write, global_limit, write_limit)
+            conn.execute("COMMIT")
+            return exceeded
+        except sqlite3.Error as e:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            self._failed(e)
+            return None
+
+    def _check_locked(self, conn, client_ip: str, is_write: bool, global_limit: int, write_limit: int) -> Optional[str]:
+        now = time.time()
+        cutoff = now - self.window
+        if now - self._last_cleanup > CLEANUP_INTERVAL:
+            conn.execute("DELETE FROM rate_limit_hits WHERE ts <= ?", (cutoff,))
+            self._last_cleanup = now
+
+        total, writes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(is_write), 0) FROM rate_limit_hits"
+            " WHERE client_ip = ? AND ts > ?",
+            (client_ip, cutoff),
+        ).fetchone()
+        if total >= global_limit:
+            return "global"
+        if is_write and writes >= write_limit:
+            return "write"
+
+        conn.execute(
+            "INSERT INTO rate_limit_hits (client_ip, ts, is_write) VALUES (?, ?, ?)",
+            (client_ip, now, int(is_write)),
+        )
+        return None
+
+    def _failed(self, error: Exception) -> None:
+        self.failures += 1
+        now = time.monotonic()
+        if now - self._last_failure_log > FAILURE_LOG_INTERVAL:
+            self._last_failure_log = now
+            logger.warning(f"Rate-limit store unavailable, letting requests through: {error} ({self.failures} so far)")
+
+
+def shared_store_path() -> Path:
+    if SHARED_MEMORY_DIR.is_dir():
+        return SHARED_MEMORY_DIR / "isaac-ratelimit.db"
+    return settings.data_dir / "ratelimit.db"
+
+
+def create_rate_limit_store(window: int, workers: Optional[int] = None):
+    """In-memory for one worker, shared SQLite when uvicorn runs several"""
+    workers = settings.workers if workers is None else workers
+    if workers > 1:
+        return SQLiteRateLimitStore(window, shared_store_path())
+    return MemoryRateLimitStore(window)
@@ -0,0 +1,205 @@
+"""
+Global full-text search over farm entities (SQLite FTS5).
+One FTS5 table holds a title and body per searchable row. SQLite triggers on each source
+table keep it in sync inside the writing transaction, so every router's writes are
+covered without touching them. Source columns are matched against the live schema at
+startup; a change to the resulting DDL rebuilds the index.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+
+INDEX_TABLE = "search_index"
+META_TABLE = "search_index_meta"
+ENTITY_SLOTS = 16  # rowid = source id * 16 + entity code, so deletes hit the rowid b-tree
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Private-use sentinels survive html.escape; swapped for <mark> after escaping
+HIT_START, HIT_END = "\ue000", "\ue001"
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    entity: str
+    code: int
+    tables: tuple[str, ...]  # first existing table wins
+    title: tuple[str, ...]  # candidate columns; missing ones are skipped
+    body: tuple[str, ...]
+
+
+SOURCES = (
+    SearchSource("plants", 1, ("plants",), ("name", "variety"),
+                 ("latin_name", "scientific_name", "location", "description", "notes")),
+    SearchSource("animals", 2, ("animals",), ("name",),
+                 ("breed", "color", "tag_number", "microchip", "location", "notes")),
+    SearchSource("tasks", 3, ("tasks",), ("title",), ("description", "location", "notes")),
+    SearchSource("seeds", 4, ("seeds",), ("name", "variety"),
+                 ("supplier", "source", "brand", "description", "notes")),
+    SearchSource("equipment", 5, ("equipment",), ("name",),
+                 ("make", "model", "serial_number", "location", "notes")),
+    SearchSource("vehicles", 6, ("vehicles",), ("name",),
+                 ("make", "model", "vin", "license_plate", "notes")),
+    SearchSource("journal", 7, ("journal_entries", "garden_journal", "journal"), ("title",),
+                 ("content", "body", "entry", "notes")),
+)
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _concat(columns: list[str], prefix: str) -> str:
+    if not columns:
+        return "''"
+    return " || ' ' || ".join(f"coalesce({prefix}.{_quote(c)}, '')" for c in columns)
+
+
+async def _table_columns(conn: AsyncConnection, table: str) -> set[str]:
+    rows = await conn.execute(text(f"PRAGMA table_info({_quote(table)})"))
+    return {row[1] for row in rows}
+
+
+async def _resolve(conn: AsyncConnection) -> list[tuple[SearchSource, str, list[str], list[str], bool]]:
+    """(source, table, title columns, body columns, has is_active) for tables present"""
+    resolved = []
+    for source in SOURCES:
+        for table in source.tables:
+            columns = await _table_columns(conn, table)
+            if "id" not in columns:
+                continue
+            title = [c for c in source.title if c in columns]
+            body = [c for c in source.body if c in columns]
+            if title or body:
+                resolved.append((source, table, title, body, "is_active" in columns))
+            break
+    return resolved
+
+
+def _trigger_ddl(source: SearchSource, table: str, title: list[str], body: list[str], has_active: bool) -> list[str]:
+    name = f"{INDEX_TABLE}_{source.entity}"
+
+    def insert_row(prefix: str) -> str:
+        active = f" WHERE {prefix}.is_active" if has_active else ""
+        return (
+            f"INSERT INTO {INDEX_TABLE}(rowid, entity, row_id, title, body) "
+            f"SELECT {prefix}.id * {ENTITY_SLOTS} + {source.code}, '{source.entity}', {prefix}.id, "
+            f"{_concat(title, prefix)}, {_concat(body, prefix)}{active};"
+        )
+
+    delete_row = f"DELETE FROM {INDEX_TABLE} WHERE rowid = old.id * {ENTITY_SLOTS} + {source.code};"
+    return [
+        f"CREATE TRIGGER {name}_ai AFTER INSERT ON {_quote(table)} BEGIN {insert_row('new')} END",
+        f"CREATE TRIGGER {name}_au AFTER UPDATE ON {_quote(table)} BEGIN {delete_row} {insert_row('new')} END",
+        f"CREATE TRIGGER {name}_ad AFTER DELETE ON {_quote(table)} BEGIN {delete_row} END",
+    ]
+
+
+async def ensure_search_index(conn: AsyncConnection, force: bool = False) -> bool:
+    """Create or rebuild the index and its triggers when the schema changed; True if rebuilt"""
+    resolved = await _resolve(conn)
+    ddl = [stmt for args in resolved for stmt in _trigger_ddl(*args)]
+    digest = hashlib.sha1("\n".join(ddl).encode()).hexdigest()
+
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT)"))
+    current = (await conn.execute(text(f"SELECT value FROM {META_TABLE} WHERE key = 'ddl_hash'"))).scalar()
+    exists = (await conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": INDEX_TABLE}
+    )).scalar()
+    if exists and current == digest and not force:
+        return False
+
+    started = time.monotonic()
+    triggers = await conn.execute(
+        text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE :prefix"),
+        {"prefix": f"{INDEX_TABLE}_%"},
+    )
+    for (trigger,) in triggers.all():
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {_quote(trigger)}"))
+    await conn.execute(text(f"DROP TABLE IF EXISTS {INDEX_TABLE}"))
+    await conn.execute(text(
+        f"CREATE VIRTUAL TABLE {INDEX_TABLE} USING fts5("
+        "entity UNINDEXED, row_id UNINDEXED, title, body, "
+        "tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3')"
+    ))
+    for source, table, title, body, has_active in resolved:
+        active = " WHERE s.is_active" if has_active else ""
+        await conn.execute(text(
+            f"INSERT INTO {INDEX_TABLE}(rowid, entity, row_id, title, body) "
+            f"SELECT s.id * {ENTITY_SLOTS} + {source.code}, '{source.entity}', s.id, "
+            f"{_concat(title, 's')}, {_concat(body, 's')} FROM {_quote(table)} s{active}"
+        ))
+    for stmt in ddl:
+        await conn.execute(text(stmt))
+    await conn.execute(text(f"INSERT INTO {INDEX_TABLE}({INDEX_TABLE}) VALUES ('optimize')"))
+    await conn.execute(
+        text(f"INSERT OR REPLACE INTO {META_TABLE} (key, value) VALUES ('ddl_hash', :digest)"),
+        {"digest": digest},
+    )
+    logger.info(
+        f"Search index rebuilt over {', '.join(s.entity for s, *_ in resolved)} "
+        f"in {(time.monotonic() - started) * 1000:.0f}ms"
+    )
+    return True
+
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match(query: str) -> Optional[str]:
+    """User text -> FTS5 query: every word must match, the last one as a prefix"""
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{t}"' for t in tokens[:-1]] + [f'"{tokens[-1]}"*']
+    return " ".join(terms)
+
+
+def _render(fragment: Optional[str]) -> str:
+    return html.escape(fragment or "").replace(HIT_START, "<mark>").replace(HIT_END, "</mark>")
+
+
+async def search(
+    db: AsyncSession,
+    query: str,
+    entities: Optional[set[str]] = None,
+    limit: int = DEFAULT_LIMIT,
+) -> list[dict]:
+    """Ranked hits; title weighs ten times the body. Highlights are HTML-escaped with <mark>."""
+    match = build_match(query)
+    if match is None:
+        return []
+    params = {"match": match, "limit": max(1, min(limit, MAX_LIMIT)), "start": HIT_START, "end": HIT_END}
+    where = f"{INDEX_TABLE} MATCH :match"
+    if entities:
+        names = sorted(entities)
+        where += " AND entity IN (" + ", ".join(f":e{i}" for i in range(len(names))) + ")"
+        params.update({f"e{i}": name for i, name in enumerate(names)})
+    rows = await db.execute(text(
+        f"SELECT entity, row_id, "
+        f"highlight({INDEX_TABLE}, 2, :start, :end) AS title, "
+        f"snippet({INDEX_TABLE}, 3, :start, :end, '…', 12) AS snippet, "
+        f"bm25({INDEX_TABLE}, 0.0, 0.0, 10.0, 1.0) AS rank "
+        f"FROM {INDEX_TABLE} WHERE {where} ORDER BY rank LIMIT :limit"
+    ), params)
+    return [
+        {
+            "entity": row.entity,
+            "id": row.row_id,
+            "title": _render(row.title),
+            "snippet": _render(row.snippet),
+            "score": round(-row.rank, 4),
+        }
+        for row in rows
+    ]
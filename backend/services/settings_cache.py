@@ -0,0 +1,191 @@
+"""
+In-process AppSetting cache.
+Loads every setting row once, keeps decrypted values in memory, and is updated
+write-through when a session that changed AppSetting rows commits. `version` increases on
+every change so other caches can key off it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from models.settings import AppSetting
+from services.encryption import ENCRYPTED_PREFIX
+
+
+_PENDING_KEY = "settings_cache_pending"
+_RELOAD = object()  # pending marker: bulk statement touched app_settings, reload everything
+_DELETED = object()
+
+TRUE_VALUES = ("true", "1", "yes", "on")
+STAMP_CHECK_INTERVAL = 1.0  # seconds between cross-worker stamp checks
+
+
+class SettingsCache:
+    """Typed, versioned view over the app_settings table"""
+
+    def __init__(self):
+        self._values: Optional[dict[str, Optional[str]]] = None
+        self._lock = asyncio.Lock()
+        self.version = 0
+        # Multi-worker mode: a file whose mtime changes whenever any worker commits a setting
+        self.stamp_path: Optional[Path] = None
+        self._seen_stamp: Optional[int] = None
+        self._stamp_checked_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._values is not None
+
+    async def _resolve(self, db: AsyncSession, key: str) -> Optional[str]:
+        # routers.settings.get_setting owns decryption and built-in defaults
+        from routers.settings import get_setting
+
+        return await get_setting(db, key)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Read all rows in one query; only encrypted rows need an extra decrypt lookup"""
+        async with self._lock:
+            result = await db.execute(select(AppSetting.key, AppSetting.value))
+            values: dict[str, Optional[str]] = {}
+            for key, value in result.all():
+                if value and value.startswith(ENCRYPTED_PREFIX):
+                    try:
+                        value = await self._resolve(db, key)
+                    except Exception as e:
+                        logger.warning(f"Settings cache could not decrypt {key}: {e}")
+                        value = None
+                values[key] = value
+            self._values = values
+            self.version += 1
+
+    def _stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_stamp(self) -> None:
+        """Drop the cache if another worker committed a setting since we last looked"""
+        now = time.monotonic()
+        if now - self._stamp_checked_at < STAMP_CHECK_INTERVAL:
+            return
+        self._stamp_checked_at = now
+        stamp = self._stamp()
+        if stamp != self._seen_stamp:
+            self._seen_stamp = stamp
+            self.invalidate()
+
+    def _touch_stamp(self) -> None:
+        try:
+            self.stamp_path.parent.mkdir(parents=True, exist_ok=True)
+            self.stamp_path.write_text(f"{os.getpid()} {self.version}\n")
+            self._seen_stamp = self._stamp()
+        except OSError as e:
+            logger.warning(f"Could not update settings stamp {self.stamp_path}: {e}")
+
+    async def get(self, db: AsyncSession, key: str, default: Optional[str] = None) -> Optional[str]:
+        if self.stamp_path is not None:
+            self._check_stamp()
+        values = self._values
+        if values is None:
+            await self.load(db)
+            values = self._values
+        if key not in values:
+            # Remember misses too, so a missing row costs one lookup per version, not per request
+            values[key] = await self._resolve(db, key)
+        value = values[key]
+        return default if value in (None, "") else value
+
+    async def get_float(self, db: AsyncSession, key: str, default: float) -> float:
+        value = await self.get(db, key)
+        try:
+            return float(value) if value is not None else default
+        except ValueError:
+            return default
+
+    async def get_int(self, db: AsyncSession, key: str, default: int) -> int:
+        value = await self.get(db, key)
+        try:
+            return int(float(value)) if value is not None else default
+        except ValueError:
+            return default
+
+    async def get_bool(self, db: AsyncSession, key: str, default: bool) -> bool:
+        value = await self.get(db, key)
+        if value is None:
+            return default
+        return value.strip().lower() in TRUE_VALUES
+
+    def apply(self, changes: dict) -> None:
+        """Write committed changes through to the cache and bump the version"""
+        if self._values is not None:
+            if _RELOAD in changes.values():
+                self._values = None
+            else:
+                for key, value in changes.items():
+                    if value is _DELETED or (value and value.startswith(ENCRYPTED_PREFIX)):
+                        # Encrypted values are re-resolved (decrypted) on next read
+                        self._values.pop(key, None)
+                    else:
+                        self._values[key] = value
+        self.version += 1
+        if self.stamp_path is not None:
+            self._touch_stamp()
+
+    def invalidate(self) -> None:
+        """Drop everything; the next read reloads from the database"""
+        self._values = None
+        self.version += 1
+
+
+settings_cache = SettingsCache()
+
+
+def _pending(session: Session) -> dict:
+    return session.info.setdefault(_PENDING_KEY, {})
+
+
+@event.listens_for(AppSetting, "after_insert")
+@event.listens_for(AppSetting, "after_update")
+def _record_write(mapper, connection, target: AppSetting) -> None:
+    session = object_session(target)
+    if session is not None:
+        _pending(session)[target.key] = target.value
+
+
+@event.listens_for(AppSetting, "after_delete")
+def _record_delete(mapper, connection, target: AppSetting) -> None:
+    session = object_session(target)
+    if session is not None:
+        _pending(session)[target.key] = _DELETED
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk(orm_execute_state) -> None:
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is AppSetting:
+        _pending(orm_execute_state.session)["*"] = _RELOAD
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_on_commit(session: Session) -> None:
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        settings_cache.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,375 @@
+"""
+Budget statement import jobs.
+pdfplumber/pdfminer are pure Python and CPU-bound, so statement pages are extracted in a
+small process pool (one task per page) while the request streams per-page progress.
+The raw page text is memoized by file hash, so re-uploading a statement skips extraction;
+category suggestions and duplicate flags are worked out again on every upload, against
+the budget rules and transactions as they are now. Confirmed transactions are inserted
+with one executemany.
+
+The budget models are named explicitly below and `bind()` checks them at startup, so a
+renamed model or column stops startup instead of failing on the first upload.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+from sqlalchemy import DateTime, and_, delete, insert, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.statement_import import StatementTextCache
+from services import statement_parser
+
+
+MAX_POOL_WORKERS = 2  # leave cores for uvicorn on a Pi
+MAX_FILE_SIZE = 20 * 1024 * 1024
+MAX_CACHED_STATEMENTS = 50
+
+# module.Class -> columns the import reads or writes
+BUDGET_MODELS = {
+    "transaction": ("models.budget.BudgetTransaction", (
+        "account_id", "transaction_date", "description", "amount", "transaction_type", "category_id", "import_hash",
+    )),
+    "rule": ("models.budget.BudgetRule", ("id", "pattern", "match_type", "category_id", "priority")),
+    "category": ("models.budget.BudgetCategory", ("id", "name")),
+}
+
+
+class StatementModelError(Exception):
+    """The budget models don't have the columns the import needs"""
+
+
+class StatementPool:
+    """Lazily started process pool; spawn, so workers don't inherit the loop or DB handles"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or max(1, min(MAX_POOL_WORKERS, (os.cpu_count() or 2) - 1))
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _ensure_started(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def submit(self, fn, *args) -> asyncio.Future:
+        return asyncio.wrap_future(self._ensure_started().submit(fn, *args))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+statement_pool = StatementPool()
+
+_models: dict[str, type] = {}  # empty until bind()
+
+
+def bind() -> dict[str, type]:
+    """Resolve BUDGET_MODELS; raises with all problems at once if any is missing"""
+    models, problems = {}, []
+    for key, (path, wanted) in BUDGET_MODELS.items():
+        module_name, _, class_name = path.rpartition(".")
+        try:
+            model = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as e:
+            problems.append(f"{key}: no model {path} ({e})")
+            continue
+        missing = [name for name in wanted if name not in inspect(model).columns]
+        if missing:
+            problems.append(f"{key}: {path} has no column {', '.join(missing)}")
+        models[key] = model
+    if problems:
+        raise StatementModelError("Statement import doesn't match the budget models:\n  " + "\n  ".join(problems))
+    _models.clear()
+    _models.update(models)
+    return models
+
+
+def _model(key: str) -> type:
+    return _models.get(key) or bind()[key]
+
+
+async def extract_pages(path: str, pool: Optional[StatementPool] = None) -> AsyncIterator[dict]:
+    """Extract every page in the pool: `started`, one `progress` per finished page, then
+    {"type": "pages", "texts": [...]} in page order"""
+    pool = pool or statement_pool
+    total = await pool.submit(statement_parser.page_count, path)
+    yield {"type": "started", "pages": total}
+
+    futures = [pool.submit(statement_parser.extract_page, path, i) for i in range(total)]
+    texts: list[Optional[str]] = [None] * total
+    done = 0
+    try:
+        for completed in asyncio.as_completed(futures):
+            page = await completed
+            texts[page["page"] - 1] = page["text"]
+            done += 1
+            yield {"type": "progress", "page": page["page"], "done": done, "pages": total}
+    finally:
+        # Error or client gone: drop pages that haven't started
+        for future in futures:
+            future.cancel()
+    yield {"type": "pages", "texts": texts}
+
+
+def _resolve_year(month_day: str, period: Optional[tuple[str, str]], statement_year: Optional[int]) -> date:
+    month, day = (int(part) for part in month_day.split("/"))
+    if period:
+        start, end = date.fromisoformat(period[0]), date.fromisoformat(period[1])
+        # A Dec-Jan statement: months before the start month belong to the end year
+        year = start.year if month >= start.month else end.year
+    else:
+        year = statement_year or datetime.now().year
+    return date(year, month, day)
+
+
+def import_hash(account_id: int, txn_date: date, amount: float, original_description: str, occurrence: int) -> str:
+    """Stable id of one statement line; `occurrence` separates identical lines on one statement"""
+    key = f"{account_id}|{txn_date.isoformat()}|{amount:.2f}|{original_description}|{occurrence}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def suggest_category(description: str, rules: list) -> Optional[tuple[int, str]]:
+    """(category_id, name) of the highest-priority matching rule; rules are (pattern, match_type, category_id, name)"""
+    text = description.lower()
+    for pattern, match_type, category_id, name in rules:
+        if match_type == "regex":
+            try:
+                matched = re.search(pattern, description, re.IGNORECASE) is not None
+            except re.error:
+                continue
+        elif match_type == "starts_with":
+            matched = text.startswith(pattern.lower())
+        else:
+            matched = pattern.lower() in text
+        if matched:
+            return category_id, name
+    return None
+
+
+def build_preview(
+    texts: list[str],
+    account_id: int,
+    statement_year: Optional[int],
+    rules: list,
+    existing_hashes: set[str],
+    existing_rows: set[tuple[str, float, str]],
+) -> dict:
+    """Preview rows in the shape /budget/import/chase/ returns, from extracted page text.
+
+    A row is a duplicate when its import_hash was imported before, or the account already
+    has a transaction with the same date, amount and description (entered by hand or
+    imported through another path).
+    """
+    period = next((p for p in map(statement_parser.statement_period, texts) if p), None)
+    transactions, seen = [], {}
+    for page, text in enumerate(texts, start=1):
+        for line in statement_parser.parse_lines(text):
+            try:
+                txn_date = _resolve_year(line["month_day"], period, statement_year)
+            except ValueError:
+                continue  # e.g. 02/30 from a misread line
+            amount = line["amount"]
+            key = (txn_date.isoformat(), round(amount, 2), line["original_description"])
+            occurrence = seen[key] = seen.get(key, -1) + 1
+            txn_hash = import_hash(account_id, txn_date, amount, line["original_description"], occurrence)
+            described = {(txn_date.isoformat(), round(amount, 2), d) for d in (line["description"], line["original_description"])}
+            suggestion = suggest_category(line["description"], rules)
+            transactions.append({
+                "date": txn_date.isoformat(),
+                "description": line["description"],
+                "original_description": line["original_description"],
+                "amount": amount,
+                "transaction_type": "debit" if amount < 0 else "credit",
+                "import_hash": txn_hash,
+                "suggested_category_id": suggestion[0] if suggestion else None,
+                "suggested_category_name": suggestion[1] if suggestion else None,
+                "is_duplicate": txn_hash in existing_hashes or not described.isdisjoint(existing_rows),
+                "page": page,
+            })
+    return {
+        "period": period,
+        "transactions": transactions,
+        "total": len(transactions),
+        "duplicates": sum(t["is_duplicate"] for t in transactions),
+    }
+
+
+def _day(value) -> str:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat() if isinstance(value, date) else str(value)[:10]
+
+
+async def _rules(db: AsyncSession) -> list:
+    Rule, Category = _model("rule"), _model("category")
+    rows = await db.execute(
+        select(Rule.pattern, Rule.match_type, Rule.category_id, Category.name)
+        .join(Category, Category.id == Rule.category_id)
+        .order_by(Rule.priority.desc(), Rule.id)
+    )
+    return [tuple(row) for row in rows]
+
+
+async def _existing(db: AsyncSession, account_id: int, dates: list[date]) -> tuple[set[str], set[tuple]]:
+    Transaction = _model("transaction")
+    if not dates:
+        return set(), set()
+    rows = await db.execute(
+        select(Transaction.import_hash, Transaction.transaction_date, Transaction.amount, Transaction.description)
+        .where(and_(
+            Transaction.account_id == account_id,
+            Transaction.transaction_date >= min(dates),
+            Transaction.transaction_date <= max(dates),
+        ))
+    )
+    hashes, described = set(), set()
+    for txn_hash, txn_date, amount, description in rows:
+        if txn_hash:
+            hashes.add(txn_hash)
+        described.add((_day(txn_date), round(float(amount), 2), description))
+    return hashes, described
+
+
+async def preview(db: AsyncSession, texts: list[str], account_id: int, statement_year: Optional[int]) -> dict:
+    """Categorize and flag duplicates against the current rules and transactions"""
+    rules = await _rules(db)
+    draft = build_preview(texts, account_id, statement_year, rules, set(), set())
+    dates = [date.fromisoformat(t["date"]) for t in draft["transactions"]]
+    hashes, described = await _existing(db, account_id, dates)
+    return build_preview(texts, account_id, statement_year, rules, hashes, described)
+
+
+async def _cached_texts(db: AsyncSession, file_hash: str) -> Optional[list[str]]:
+    entry = await db.get(StatementTextCache, file_hash)
+    if entry is None or entry.extractor_version != statement_parser.EXTRACTOR_VERSION:
+        return None
+    texts = json.loads(entry.texts)
+    entry.last_used_at = datetime.utcnow()
+    await db.commit()
+    return texts
+
+
+async def _remember(db: AsyncSession, file_hash: str, texts: list[str]) -> None:
+    await db.merge(StatementTextCache(
+        file_hash=file_hash,
+        extractor_version=statement_parser.EXTRACTOR_VERSION,
+        pages=len(texts),
+        texts=json.dumps(texts),
+        last_used_at=datetime.utcnow(),
+    ))
+    keep = select(StatementTextCache.file_hash).order_by(StatementTextCache.last_used_at.desc()).limit(MAX_CACHED_STATEMENTS)
+    await db.execute(delete(StatementTextCache).where(StatementTextCache.file_hash.not_in(keep)))
+    await db.commit()
+
+
+async def parse_statement(
+    db: AsyncSession,
+    data: bytes,
+    account_id: int,
+    statement_year: Optional[int] = None,
+) -> AsyncIterator[dict]:
+    """Progress events for one upload, ending with {"type": "done", ...} or {"type": "error"}"""
+    if len(data) > MAX_FILE_SIZE:
+        yield {"type": "error", "detail": "Statement file is too large"}
+        return
+    if not data.startswith(b"%PDF"):
+        yield {"type": "error", "detail": "Not a PDF file"}
+        return
+
+    file_hash = hashlib.sha256(data).hexdigest()
+    texts = await _cached_texts(db, file_hash)
+    cached = texts is not None
+    if cached:
+        yield {"type": "started", "pages": len(texts), "cached": True}
+    else:
+        tmp_dir = settings.data_dir / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(suffix=".pdf", dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            async for event in extract_pages(tmp_name):
+                if event["type"] == "pages":
+                    texts = event["texts"]
+                else:
+                    yield {**event, "cached": False} if event["type"] == "started" else event
+        except Exception as e:
+            logger.warning(f"Statement extraction failed: {e}")
+            yield {"type": "error", "detail": "Could not read the PDF"}
+            return
+        finally:
+            Path(tmp_name).unlink(missing_ok=True)
+        await _remember(db, file_hash, texts)
+
+    result = await preview(db, texts, account_id, statement_year)
+    yield {"type": "done", "file_hash": file_hash, "cached": cached, "pages": len(texts), **result}
+
+
+def _coerce(column, value):
+    """A preview value in the column's Python type (enum member, datetime for DateTime)"""
+    if value is None:
+        return None
+    enum_class = getattr(column.type, "enum_class", None)
+    if enum_class is not None:
+        return enum_class(value)
+    if isinstance(column.type, DateTime) and not isinstance(value, datetime):
+        return datetime.combine(value, time())
+    return value
+
+
+async def insert_transactions(db: AsyncSession, account_id: int, transactions: list[dict]) -> dict:
+    """Insert confirmed preview rows in one statement; rows whose import_hash is already
+    in the account (a double submit, or a re-import) are skipped"""
+    Transaction = _model("transaction")
+    columns = inspect(Transaction).columns
+    hashes = [t["import_hash"] for t in transactions if t.get("import_hash")]
+    existing = set()
+    if hashes:
+        existing = set((await db.execute(
+            select(Transaction.import_hash)
+            .where(Transaction.account_id == account_id)
+            .where(Transaction.import_hash.in_(hashes))
+        )).scalars())
+
+    rows, skipped = [], 0
+    for txn in transactions:
+        if txn.get("import_hash") and txn["import_hash"] in existing:
+            skipped += 1
+            continue
+        existing.add(txn.get("import_hash"))
+        row = {
+            "account_id": account_id,
+            "transaction_date": _coerce(columns["transaction_date"], date.fromisoformat(str(txn["date"])[:10])),
+            "description": txn["description"],
+            "amount": txn["amount"],
+            "transaction_type": _coerce(columns["transaction_type"], txn["transaction_type"]),
+            "category_id": txn.get("category_id"),
+            "import_hash": txn.get("import_hash"),
+        }
+        if "original_description" in columns:
+            row["original_description"] = txn.get("original_description")
+        rows.append(row)
+
+    if rows:
+        await db.execute(insert(Transaction), rows)
+    await db.commit()
+    return {"imported": len(rows), "skipped_duplicates": skipped, "errors": 0}
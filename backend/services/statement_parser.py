@@ -0,0 +1,75 @@
+"""
+Bank statement page extraction and Chase line parsing.
+`page_count` and `extract_page` run inside the import process pool; the module is kept
+free of app imports (database, settings, routers) so spawned pool workers start quickly
+and never touch the event loop or the SQLite engine.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from typing import Optional
+
+
+EXTRACTOR_VERSION = 1  # bump when extraction changes so memoized page text is re-extracted
+
+# "01/15  Card Purchase 01/14 Tractor Supply #123  -45.67  1,234.56" (amount, optional balance)
+TRANSACTION_RE = re.compile(
+    r"^(?P<date>\d{2}/\d{2})\s+(?P<description>.+?)\s+"
+    r"(?P<amount>-?\$?[\d,]+\.\d{2})(?:\s+(?P<balance>-?\$?[\d,]+\.\d{2}))?$"
+)
+# Checking: "December 15, 2023 through January 14, 2024"
+PERIOD_LONG_RE = re.compile(r"([A-Z][a-z]+ \d{1,2}, \d{4})\s*through\s*([A-Z][a-z]+ \d{1,2}, \d{4})")
+# Credit card: "Opening/Closing Date 12/15/23 - 01/14/24"
+PERIOD_SHORT_RE = re.compile(r"Opening/Closing Date\s+(\d{2}/\d{2}/\d{2})\s*-\s*(\d{2}/\d{2}/\d{2})")
+# "Card Purchase 01/14 " / "Recurring Card Purchase With Pin 01/14 " prefixes Chase puts before the merchant
+CARD_PREFIX_RE = re.compile(r"^(?:Recurring\s+)?Card Purchase(?:\s+With Pin)?\s+\d{2}/\d{2}\s+", re.IGNORECASE)
+
+
+def page_count(path: str) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def extract_page(path: str, index: int) -> dict:
+    """Raw text of one page; the expensive pdfminer layout pass, nothing app-specific"""
+    import pdfplumber
+
+    with pdfplumber.open(path, pages=[index + 1]) as pdf:
+        return {"page": index + 1, "text": pdf.pages[0].extract_text() or ""}
+
+
+def _amount(text: str) -> float:
+    return float(text.replace("$", "").replace(",", ""))
+
+
+def statement_period(text: str) -> Optional[tuple[str, str]]:
+    """(start, end) ISO dates if the text states the statement period"""
+    match = PERIOD_LONG_RE.search(text)
+    if match:
+        start, end = (datetime.strptime(m, "%B %d, %Y").date() for m in match.groups())
+        return start.isoformat(), end.isoformat()
+    match = PERIOD_SHORT_RE.search(text)
+    if match:
+        start, end = (datetime.strptime(m, "%m/%d/%y").date() for m in match.groups())
+        return start.isoformat(), end.isoformat()
+    return None
+
+
+def parse_lines(text: str) -> list[dict]:
+    """Transaction lines on one page, with month/day dates; years are resolved by the caller"""
+    transactions = []
+    for line in text.splitlines():
+        match = TRANSACTION_RE.match(line.strip())
+        if match:
+            original = " ".join(match.group("description").split())
+            transactions.append({
+                "month_day": match.group("date"),
+                "original_description": original,
+                "description": CARD_PREFIX_RE.sub("", original) or original,
+                "amount": _amount(match.group("amount")),
+            })
+    return transactions
@@ -0,0 +1,199 @@
+"""
+Background storage monitor.
+Samples disk, database, log and upload sizes on an interval so /dashboard/storage/
+can answer from memory, and keeps a short history for growth-rate projections.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import shutil
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from config import settings
+from services.blocking_io import io_pool
+
+
+# SECURITY: All paths are hardcoded constants or derived from server config - no user input accepted
+ISAAC_LOGS_DIR = Path("/opt/isaac/logs")
+APP_LOGS_DIR = Path(__file__).resolve().parent.parent / "logs"
+
+SAMPLE_INTERVAL = 300  # seconds
+HISTORY_SIZE = 288 * 7  # one week of 5-minute samples
+MIN_PROJECTION_SPAN = 3600  # need an hour of history before projecting growth
+
+
+def database_path() -> Path:
+    """Resolve the SQLite file behind settings.database_url"""
+    db_path = settings.database_url.replace("sqlite+aiosqlite:///", "").replace("+aiosqlite", "")
+    return Path(db_path).resolve()
+
+
+@dataclass(frozen=True)
+class StorageSample:
+    sampled_at: datetime
+    disk_total_bytes: int
+    disk_used_bytes: int
+    disk_available_bytes: int
+    database_bytes: int
+    logs_bytes: int
+    uploads_bytes: int
+
+    @property
+    def disk_usage_percent(self) -> float:
+        if self.disk_total_bytes <= 0:
+            return 0.0
+        return (self.disk_used_bytes / self.disk_total_bytes) * 100
+
+
+def _safe_get_size(path: Path) -> int:
+    """
+    Get file size safely.
+    SECURITY: Rejects symlinks to prevent traversal attacks.
+    """
+    try:
+        if path.exists() and path.is_file() and not path.is_symlink():
+            return path.stat().st_size
+    except (OSError, PermissionError):
+        pass
+    return 0
+
+
+def _safe_dir_size(dir_path: Path, recursive: bool = False) -> int:
+    """
+    Get total size of regular files in directory.
+    SECURITY: Only counts regular files, rejects symlinks (files and directories).
+    """
+    total = 0
+    try:
+        if dir_path.exists() and dir_path.is_dir() and not dir_path.is_symlink():
+            for f in dir_path.iterdir():
+                if f.is_symlink():
+                    continue
+                if f.is_file():
+                    try:
+                        total += f.stat().st_size
+                    except (OSError, PermissionError):
+                        pass
+                elif recursive and f.is_dir():
+                    total += _safe_dir_size(f, recursive=True)
+    except (OSError, PermissionError):
+        pass
+    return total
+
+
+def _uploads_size(data_dir: Path) -> int:
+    """Photo and receipt directories live beside the database (plant_photos/, animal_photos/, ...)"""
+    total = 0
+    try:
+        if data_dir.exists() and data_dir.is_dir():
+            for entry in data_dir.iterdir():
+                if entry.is_dir() and not entry.is_symlink():
+                    total += _safe_dir_size(entry, recursive=True)
+    except (OSError, PermissionError):
+        pass
+    return total
+
+
+def take_sample() -> StorageSample:
+    """Measure everything once. Blocking - run off the event loop."""
+    try:
+        total, used, free = shutil.disk_usage("/")
+    except OSError:
+        total, used, free = 0, 0, 0
+
+    db_path = database_path()
+    # WAL mode keeps recent writes in -wal until checkpoint; it can rival the main file
+    database_bytes = sum(_safe_get_size(Path(f"{db_path}{suffix}")) for suffix in ("", "-wal", "-shm"))
+    logs_bytes = _safe_dir_size(ISAAC_LOGS_DIR)
+    if APP_LOGS_DIR != ISAAC_LOGS_DIR:
+        logs_bytes += _safe_dir_size(APP_LOGS_DIR)
+
+    return StorageSample(
+        sampled_at=datetime.utcnow(),
+        disk_total_bytes=total,
+        disk_used_bytes=used,
+        disk_available_bytes=free,
+        database_bytes=database_bytes,
+        logs_bytes=logs_bytes,
+        uploads_bytes=_uploads_size(db_path.parent),
+    )
+
+
+class StorageMonitor:
+    """Periodic storage sampler with an in-memory time series"""
+
+    def __init__(self, interval: int = SAMPLE_INTERVAL, history_size: int = HISTORY_SIZE):
+        self.interval = interval
+        self.history: deque[StorageSample] = deque(maxlen=history_size)
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def latest(self) -> Optional[StorageSample]:
+        return self.history[-1] if self.history else None
+
+    async def refresh(self) -> StorageSample:
+        """Take a sample now on the blocking-I/O pool and record it"""
+        async with self._lock:
+            sample = await io_pool.run(take_sample)
+            self.history.append(sample)
+            return sample
+
+    async def get_snapshot(self) -> StorageSample:
+        """Latest cached sample; only measures inline if nothing has been sampled yet"""
+        return self.latest or await self.refresh()
+
+    def growth_bytes_per_day(self) -> Optional[float]:
+        """Least-squares slope of disk usage over the recorded history"""
+        if len(self.history) < 2:
+            return None
+        first = self.history[0].sampled_at
+        xs = [(s.sampled_at - first).total_seconds() for s in self.history]
+        if xs[-1] - xs[0] < MIN_PROJECTION_SPAN:
+            return None
+        ys = [s.disk_used_bytes for s in self.history]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        if var_x == 0:
+            return None
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+        return slope * 86400
+
+    def days_until_full(self) -> Optional[float]:
+        latest = self.latest
+        growth = self.growth_bytes_per_day()
+        if latest is None or growth is None or growth <= 0:
+            return None
+        return latest.disk_available_bytes / growth
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Storage sample failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+storage_monitor = StorageMonitor()
@@ -0,0 +1,185 @@
+"""
+Downsampled weather history for trend charts.
+Readings for the requested range are loaded once as columnar numpy arrays and reduced to
+the target point count with LTTB (shape-preserving line) or min/max/avg buckets (band
+charts). Results are cached per range, resolution and method; ranges that reach the
+present expire after one poll interval. Timestamps in the output are epoch milliseconds (UTC).
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models.weather import WeatherReading
+from services.blocking_io import io_pool
+
+
+METRICS = (
+    "temp_outdoor", "feels_like", "dew_point", "humidity_outdoor", "temp_indoor", "humidity_indoor",
+    "wind_speed", "wind_gust", "rain_rate", "rain_daily", "uv_index", "solar_radiation",
+    "pressure_relative",
+)
+MIN_POINTS = 10
+MAX_POINTS = 5000
+CACHE_SIZE = 64
+
+
+def available_metrics() -> list[str]:
+    columns = set(WeatherReading.__table__.columns.keys())
+    return [m for m in METRICS if m in columns]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets; returns indices of the kept points"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Interior points split into threshold - 2 equal-count buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    next_means_x = np.empty(threshold - 2)
+    next_means_y = np.empty(threshold - 2)
+    # Average of the following bucket, precomputed for every bucket at once
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    following_start = edges[1:]
+    following_end = np.append(edges[2:], n)
+    counts = np.maximum(following_end - following_start, 1)
+    next_means_x[:] = (cum_x[following_end] - cum_x[following_start]) / counts
+    next_means_y[:] = (cum_y[following_end] - cum_y[following_start]) / counts
+    next_means_x[-1], next_means_y[-1] = x[-1], y[-1]
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        bx, by = x[lo:hi], y[lo:hi]
+        # Twice the triangle area for every candidate in the bucket, vectorized
+        area = np.abs((x[a] - next_means_x[i]) * (by - y[a]) - (x[a] - bx) * (next_means_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_buckets(x: np.ndarray, y: np.ndarray, buckets: int) -> dict[str, list]:
+    """Equal-time buckets with min, max and mean per bucket (empty buckets omitted)"""
+    if len(x) == 0:
+        return {"t": [], "min": [], "max": [], "avg": []}
+    edges = np.linspace(x[0], x[-1], buckets + 1)
+    index = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, buckets - 1)
+    starts = np.flatnonzero(np.diff(np.concatenate(([-1], index))))
+    counts = np.diff(np.append(starts, len(x)))
+    return {
+        "t": edges[index[starts]].astype(np.int64).tolist(),
+        "min": np.minimum.reduceat(y, starts).tolist(),
+        "max": np.maximum.reduceat(y, starts).tolist(),
+        "avg": np.round(np.add.reduceat(y, starts) / counts, 3).tolist(),
+    }
+
+
+def _downsample(times: np.ndarray, columns: dict[str, np.ndarray], points: int, method: str) -> dict:
+    series = {}
+    for metric, values in columns.items():
+        valid = ~np.isnan(values)
+        x, y = times[valid], values[valid]
+        if method == "minmax":
+            series[metric] = minmax_buckets(x, y, points)
+        else:
+            keep = lttb(x, y, points)
+            series[metric] = {"t": x[keep].astype(np.int64).tolist(), "v": y[keep].tolist()}
+    return series
+
+
+class WeatherHistoryCache:
+    """LRU of downsampled results keyed by (range, resolution, method, metrics)"""
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self._entries: OrderedDict[tuple, tuple[Optional[float], dict]] = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: tuple) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires is not None and time.monotonic() > expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, value: dict, ttl: Optional[float]) -> None:
+        self._entries[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+
+history_cache = WeatherHistoryCache()
+
+
+def _floor(value: datetime, step: timedelta) -> datetime:
+    return value - (value - datetime.min) % step
+
+
+async def downsampled_history(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    points: int,
+    metrics: list[str],
+    method: str = "lttb",
+) -> dict:
+    points = max(MIN_POINTS, min(points, MAX_POINTS))
+    now = datetime.utcnow()
+    step = timedelta(seconds=settings.weather_poll_interval)
+    live = end >= now - step
+    if live:
+        # Align "up to now" ranges to the poll interval so repeated kiosk requests share an entry
+        end, start = _floor(now, step), _floor(start, step)
+    key = (start, end, points, method, tuple(metrics))
+    cached = history_cache.get(key)
+    if cached is not None:
+        history_cache.stats["hits"] += 1
+        return cached
+    history_cache.stats["misses"] += 1
+
+    query_end = now if live else end
+    columns = [getattr(WeatherReading, m) for m in metrics]
+    rows = (await db.execute(
+        select(WeatherReading.reading_time, *columns)
+        .where(WeatherReading.reading_time >= start)
+        .where(WeatherReading.reading_time <= query_end)
+        .order_by(WeatherReading.reading_time)
+    )).all()
+
+    raw_count = len(rows)
+    if rows:
+        transposed = list(zip(*rows))
+        # Naive UTC datetimes -> epoch milliseconds; None -> NaN
+        times = np.array(transposed[0], dtype="datetime64[ms]").astype(np.int64).astype(np.float64)
+        arrays = {m: np.array(transposed[i + 1], dtype=np.float64) for i, m in enumerate(metrics)}
+        series = await io_pool.run(_downsample, times, arrays, points, method)
+    else:
+        series = {m: ({"t": [], "min": [], "max": [], "avg": []} if method == "minmax" else {"t": [], "v": []}) for m in metrics}
+
+    result = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "method": method,
+        "points": points,
+        "raw_count": raw_count,
+        "series": series,
+    }
+    history_cache.put(key, result, ttl=step.total_seconds() if live else None)
+    return result
@@ -0,0 +1,369 @@
+"""
+Adaptive Ambient Weather poller.
+Polls faster when conditions are changing (near frost, high wind, rapid temperature swings)
+and slower when they are stable. Reuses one pooled HTTP client, sends conditional requests,
+skips readings the station has already reported, and writes readings in batches.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+from loguru import logger
+from sqlalchemy import insert, or_, select
+
+from config import settings
+
+
+DEVICES_PATH = "/v1/devices"
+
+# Ambient Weather lastData field -> WeatherReading column
+FIELD_MAP = {
+    "tempf": "temp_outdoor",
+    "feelsLike": "feels_like",
+    "dewPoint": "dew_point",
+    "humidity": "humidity_outdoor",
+    "tempinf": "temp_indoor",
+    "humidityin": "humidity_indoor",
+    "windspeedmph": "wind_speed",
+    "windgustmph": "wind_gust",
+    "winddir": "wind_direction",
+    "hourlyrainin": "rain_rate",
+    "dailyrainin": "rain_daily",
+    "uv": "uv_index",
+    "solarradiation": "solar_radiation",
+    "baromrelin": "pressure_relative",
+    "baromabsin": "pressure_absolute",
+}
+
+FROST_MARGIN = 5.0  # °F above frost_warning_temp that counts as "near frost"
+WIND_FRACTION = 0.8  # fraction of wind_warning_speed that counts as "high wind"
+RAPID_CHANGE = 2.0  # °F between consecutive readings
+STABLE_CHANGE = 0.5  # °F spread over the recent window that counts as stable
+BACKOFF_FACTOR = 1.5
+MAX_BUFFER = 1000  # readings kept across failed flushes before the oldest are dropped
+ALERT_DURATION = timedelta(hours=6)  # alerts raised from readings expire unless re-raised
+
+
+def parse_reading(data: dict) -> Optional[dict[str, Any]]:
+    """Convert an Ambient Weather lastData payload into WeatherReading column values"""
+    stamp = data.get("dateutc")
+    if stamp is None:
+        return None
+    reading = {
+        "reading_time": datetime.fromtimestamp(stamp / 1000, tz=timezone.utc).replace(tzinfo=None),
+    }
+    for source, column in FIELD_MAP.items():
+        if data.get(source) is not None:
+            reading[column] = data[source]
+    return reading
+
+
+def alert_conditions(reading: dict, thresholds: dict[str, float]) -> list[dict[str, str]]:
+    """Alerts a single reading warrants; freeze supersedes frost"""
+    alerts = []
+    temp = reading.get("temp_outdoor")
+    if temp is not None:
+        if temp <= thresholds["freeze_warning_temp"]:
+            alerts.append({
+                "alert_type": "freeze",
+                "severity": "critical",
+                "title": "Freeze Warning",
+                "message": f"Outdoor temperature is {temp:.1f}°F",
+            })
+        elif temp <= thresholds["frost_warning_temp"]:
+            alerts.append({
+                "alert_type": "frost",
+                "severity": "warning",
+                "title": "Frost Warning",
+                "message": f"Outdoor temperature is {temp:.1f}°F",
+            })
+        elif temp >= thresholds["heat_warning_temp"]:
+            alerts.append({
+                "alert_type": "heat",
+                "severity": "warning",
+                "title": "Heat Warning",
+                "message": f"Outdoor temperature is {temp:.1f}°F",
+            })
+    wind = max(reading.get("wind_speed") or 0, reading.get("wind_gust") or 0)
+    if wind >= thresholds["wind_warning_speed"]:
+        alerts.append({
+            "alert_type": "wind",
+            "severity": "warning",
+            "title": "High Wind Warning",
+            "message": f"Wind at {wind:.0f} mph",
+        })
+    rain = reading.get("rain_daily")
+    if rain is not None and rain >= thresholds["rain_warning_inches"]:
+        alerts.append({
+            "alert_type": "rain",
+            "severity": "warning",
+            "title": "Heavy Rain Warning",
+            "message": f"{rain:.2f} in of rain today",
+        })
+    return alerts
+
+
+def _severity(enum_class, name: str):
+    for member in enum_class:
+        if member.name.lower() == name or str(member.value).lower() == name:
+            return member
+    return list(enum_class)[-1]
+
+
+async def evaluate_alerts(rows: list[dict], session_factory=None) -> int:
+    """on_flush hook: raise WeatherAlerts for the newest flushed reading.
+
+    An alert type that is already active is left alone, so a cold night produces one
+    frost alert (and one queued email) rather than one per reading.
+    """
+    from models.database import async_session
+    from models.weather import WeatherAlert
+    from services.mail_queue import enqueue_email
+    from services.settings_cache import settings_cache
+
+    if not rows:
+        return 0
+    now = datetime.utcnow()
+    async with (session_factory or async_session)() as db:
+        thresholds = {
+            key: await settings_cache.get_float(db, key, getattr(settings, key))
+            for key in (
+                "frost_warning_temp", "freeze_warning_temp", "heat_warning_temp",
+                "wind_warning_speed", "rain_warning_inches",
+            )
+        }
+        wanted = alert_conditions(rows[-1], thresholds)
+        if not wanted:
+            return 0
+        result = await db.execute(
+            select(WeatherAlert.alert_type)
+            .where(WeatherAlert.is_active == True)
+            .where(or_(WeatherAlert.expires_at > now, WeatherAlert.expires_at.is_(None)))
+        )
+        active = set(result.scalars().all())
+        severity_enum = WeatherAlert.__table__.columns["severity"].type.enum_class
+        raised = [a for a in wanted if a["alert_type"] not in active]
+        for alert in raised:
+            db.add(WeatherAlert(
+                alert_type=alert["alert_type"],
+                severity=_severity(severity_enum, alert["severity"]),
+                title=alert["title"],
+                message=alert["message"],
+                is_active=True,
+                created_at=now,
+                expires_at=now + ALERT_DURATION,
+            ))
+        await db.commit()
+
+        admin_email = await settings_cache.get(db, "admin_email") if raised else None
+        for alert in raised:
+            if admin_email:
+                # Alerts raised together (or within the window) go out as one digest
+                await enqueue_email(
+                    db, subject=alert["title"], body=alert["message"], to=admin_email,
+                    coalesce_key="weather_alert",
+                )
+        await db.commit()
+    return len(raised)
+
+
+class AdaptiveWeatherPoller:
+    """Background polling loop with adaptive interval and batched writes"""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        app_key: Optional[str] = None,
+        base_interval: Optional[int] = None,
+        min_interval: Optional[int] = None,
+        max_interval: Optional[int] = None,
+        session_factory=None,
+        on_flush: Optional[Callable[[list[dict]], Awaitable[None]]] = None,
+    ):
+        self.base_url = (base_url or settings.awn_api_base_url).rstrip("/")
+        self.api_key = api_key or settings.awn_api_key
+        self.app_key = app_key or settings.awn_app_key
+        self.base_interval = base_interval or settings.weather_poll_interval
+        self.min_interval = min_interval or settings.weather_poll_min_interval
+        self.max_interval = max_interval or settings.weather_poll_max_interval
+        self.interval = float(self.base_interval)
+        self._session_factory = session_factory
+        self._on_flush = on_flush
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._last_stamp: Optional[int] = None
+        self._buffer: list[dict] = []
+        self.recent: deque[dict] = deque(maxlen=6)
+        self.stats = {"polls": 0, "not_modified": 0, "duplicates": 0, "written": 0, "errors": 0}
+
+    @property
+    def latest(self) -> Optional[dict]:
+        return self.recent[-1] if self.recent else None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(max_connections=2, max_keepalive_connections=1),
+            )
+        return self._client
+
+    async def fetch(self) -> Optional[dict]:
+        """One conditional request; returns the newest unseen reading or None"""
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+
+        response = await self._get_client().get(
+            DEVICES_PATH,
+            params={"applicationKey": self.app_key, "apiKey": self.api_key},
+            headers=headers,
+        )
+        self.stats["polls"] += 1
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            return None
+        response.raise_for_status()
+        self._etag = response.headers.get("ETag", self._etag)
+        self._last_modified = response.headers.get("Last-Modified", self._last_modified)
+
+        devices = response.json()
+        if not devices:
+            return None
+        data = devices[0].get("lastData") or {}
+        stamp = data.get("dateutc")
+        # The station only reports every minute or so; polling faster returns the same sample
+        if stamp is None or (self._last_stamp is not None and stamp <= self._last_stamp):
+            self.stats["duplicates"] += 1
+            return None
+        self._last_stamp = stamp
+        return parse_reading(data)
+
+    def next_interval(self) -> float:
+        """Shorten near frost/high wind/rapid change, lengthen when stable"""
+        latest = self.latest
+        if latest is None:
+            return float(self.base_interval)
+
+        temp = latest.get("temp_outdoor")
+        wind = max(latest.get("wind_speed") or 0, latest.get("wind_gust") or 0)
+        temps = [r["temp_outdoor"] for r in self.recent if r.get("temp_outdoor") is not None]
+
+        near_frost = temp is not None and temp <= settings.frost_warning_temp + FROST_MARGIN
+        high_wind = wind >= settings.wind_warning_speed * WIND_FRACTION
+        rapid = len(temps) >= 2 and abs(temps[-1] - temps[-2]) >= RAPID_CHANGE
+        if near_frost or high_wind or rapid:
+            return float(self.min_interval)
+
+        stable = len(temps) == self.recent.maxlen and max(temps) - min(temps) <= STABLE_CHANGE
+        if stable:
+            return min(float(self.max_interval), max(self.interval, self.base_interval) * BACKOFF_FACTOR)
+        return float(self.base_interval)
+
+    def _should_flush(self) -> bool:
+        if not self._buffer:
+            return False
+        # Never let the stored "latest reading" lag more than the configured base interval
+        span = (self._buffer[-1]["reading_time"] - self._buffer[0]["reading_time"]).total_seconds()
+        return span >= self.base_interval or self.interval >= self.base_interval
+
+    async def flush(self) -> int:
+        if not self._buffer:
+            return 0
+        from models.database import async_session
+        from models.weather import WeatherReading
+
+        rows, self._buffer = self._buffer, []
+        columns = set(WeatherReading.__table__.columns.keys())
+        values = [{k: v for k, v in row.items() if k in columns} for row in rows]
+        try:
+            async with (self._session_factory or async_session)() as db:
+                await db.execute(insert(WeatherReading), values)
+                await db.commit()
+        except Exception:
+            # Keep the readings for the next flush; readings polled meanwhile go after them
+            self._buffer = (rows + self._buffer)[-MAX_BUFFER:]
+            raise
+        self.stats["written"] += len(values)
+        if self._on_flush:
+            try:
+                await self._on_flush(rows)
+            except Exception as e:
+                logger.warning(f"Weather flush hook failed: {e}")
+        return len(values)
+
+    async def poll_once(self) -> Optional[dict]:
+        reading = await self.fetch()
+        if reading is not None:
+            self.recent.append(reading)
+            self._buffer.append(reading)
+        self.interval = self.next_interval()
+        if self._should_flush():
+            await self.flush()
+        return reading
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Weather poll failed: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def _resolve_keys(self) -> None:
+        """Keys entered in Settings (stored encrypted) take precedence over .env"""
+        from models.database import async_session
+        from services.settings_cache import settings_cache
+
+        async with (self._session_factory or async_session)() as db:
+            self.api_key = await settings_cache.get(db, "awn_api_key", self.api_key)
+            self.app_key = await settings_cache.get(db, "awn_app_key", self.app_key)
+
+    async def start(self) -> None:
+        try:
+            await self._resolve_keys()
+        except Exception as e:
+            logger.warning(f"Could not read Ambient Weather keys from settings: {e}")
+        if not (self.api_key and self.app_key):
+            logger.info("Adaptive weather polling disabled: Ambient Weather keys not configured")
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Could not flush buffered weather readings: {e}")
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def status(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_s": round(self.interval),
+            "buffered": len(self._buffer),
+            **self.stats,
+        }
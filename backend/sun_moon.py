@@ -0,0 +1,51 @@
+"""
+Sun and Moon API Routes
+Sunrise, sunset, civil twilight and moon phase, looked up from the precomputed
+ephemeris table instead of recomputed per request
+"""
+
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import get_db
+from services import ephemeris as ephemeris_service
+from services.ephemeris import ephemeris
+
+
+router = APIRouter(prefix="/weather/sun-moon", tags=["Weather"])
+
+MAX_RANGE_DAYS = 120
+
+
+@router.get("/")
+async def get_sun_moon(db: AsyncSession = Depends(get_db)):
+    """Today's sun and moon values in the dashboard widget's shape"""
+    return await ephemeris.sun_moon(db)
+
+
+@router.get("/days/")
+async def get_sun_moon_days(
+    start: Optional[date] = Query(None, description="Defaults to today"),
+    end: Optional[date] = Query(None, description="Defaults to 30 days after start"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Daily sun events (ISO datetimes in the farm's timezone) and moon phase for planning views"""
+    start = start or date.today()
+    end = end or start + timedelta(days=30)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+    days = []
+    for values in await ephemeris.days(db, start, end):
+        name, emoji = ephemeris_service.moon_phase_name(values["moon_phase"])
+        days.append({
+            **{key: value.isoformat() if value else None for key, value in values.items() if key != "moon_phase"},
+            "moon_phase": name,
+            "moon_emoji": emoji,
+            "moon_illumination": ephemeris_service.moon_illumination(values["moon_phase"]),
+        })
+    return {"days": days}
@@ -0,0 +1,225 @@
+"""
+Synthetic farm data for load and performance testing.
+Fills a scratch database with plants, animals, tasks and weather history at a chosen scale.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Iterator
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass(frozen=True)
+class Scale:
+    """Row counts for one synthetic dataset"""
+    plants: int
+    animals: int
+    tasks: int
+    weather_days: int
+    alerts: int = 10
+
+
+# "farm" is the size we expect a long-running homestead to reach:
+# thousands of plants, hundreds of animals, 100k+ tasks, three years of 5-minute readings.
+SCALES = {
+    "tiny": Scale(plants=50, animals=10, tasks=500, weather_days=7, alerts=3),
+    "small": Scale(plants=300, animals=30, tasks=5_000, weather_days=60),
+    "medium": Scale(plants=1_500, animals=120, tasks=30_000, weather_days=365),
+    "farm": Scale(plants=5_000, animals=400, tasks=120_000, weather_days=3 * 365, alerts=25),
+}
+
+READING_INTERVAL = timedelta(minutes=5)
+BATCH_SIZE = 5_000
+
+PLANT_NAMES = [
+    ("Tomato", ["Cherokee Purple", "Brandywine", "Sun Gold", "Roma"]),
+    ("Pepper", ["Jalapeno", "California Wonder", "Habanero"]),
+    ("Mango", ["Keitt", "Glenn", "Nam Doc Mai"]),
+    ("Avocado", ["Hass", "Lula", "Monroe"]),
+    ("Banana", ["Dwarf Cavendish", "Ice Cream", "Mysore"]),
+    ("Citrus", ["Meyer Lemon", "Persian Lime", "Satsuma"]),
+    ("Fig", ["Celeste", "Brown Turkey", "LSU Purple"]),
+    ("Blueberry", ["Emerald", "Sunshine Blue", "Jewel"]),
+    ("Moringa", ["PKM-1"]),
+    ("Basil", ["Genovese", "Thai", "Holy"]),
+]
+LOCATIONS = ["Front Yard", "Back Orchard", "Greenhouse", "Raised Bed", "Food Forest", "Pasture Edge"]
+ANIMAL_NAMES = [
+    "Bella", "Duke", "Rosie", "Clover", "Biscuit", "Maple", "Ranger", "Hazel", "Pepper", "Willow",
+    "Scout", "Daisy", "Buck", "Ginger", "Moose", "Penny", "Otis", "Juniper", "Cocoa", "Tucker",
+]
+TASK_TITLES = [
+    "Water {x}", "Fertilize {x}", "Prune {x}", "Check {x} for pests", "Harvest {x}",
+    "Feed {x}", "Refill water for {x}", "Clean stall for {x}", "Change oil on {x}", "Inspect {x}",
+]
+
+
+def _columns(model) -> set[str]:
+    return set(model.__table__.columns.keys())
+
+
+def _filtered(rows: list[dict[str, Any]], columns: set[str]) -> list[dict[str, Any]]:
+    """Drop generated keys that the model does not define"""
+    return [{k: v for k, v in row.items() if k in columns} for row in rows]
+
+
+def _batched(rows: Iterator[dict[str, Any]], size: int = BATCH_SIZE) -> Iterator[list[dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _plant_rows(scale: Scale, rng: random.Random, today: date) -> Iterator[dict[str, Any]]:
+    for i in range(scale.plants):
+        name, varieties = rng.choice(PLANT_NAMES)
+        frost_sensitive = rng.random() < 0.4
+        min_temp = float(rng.randint(25, 45))
+        yield {
+            "name": f"{name} {i + 1}",
+            "variety": rng.choice(varieties),
+            "location": rng.choice(LOCATIONS),
+            "frost_sensitive": frost_sensitive,
+            "min_temp": min_temp,
+            "needs_cover_below_temp": min_temp + 2 if frost_sensitive and rng.random() < 0.5 else None,
+            "is_active": rng.random() < 0.95,
+            "date_planted": today - timedelta(days=rng.randint(0, 5 * 365)),
+            "notes": "synthetic",
+        }
+
+
+def _animal_rows(scale: Scale, rng: random.Random, today: date, animal_types: list) -> Iterator[dict[str, Any]]:
+    for i in range(scale.animals):
+        yield {
+            "name": f"{rng.choice(ANIMAL_NAMES)} {i + 1}",
+            "animal_type": rng.choice(animal_types),
+            "is_active": rng.random() < 0.95,
+            "birth_date": today - timedelta(days=rng.randint(60, 12 * 365)),
+            "next_farrier_date": today + timedelta(days=rng.randint(-14, 60)),
+            "next_worming_date": today + timedelta(days=rng.randint(-14, 90)),
+            "notes": "synthetic",
+        }
+
+
+def _task_rows(
+    scale: Scale,
+    rng: random.Random,
+    now: datetime,
+    categories: list,
+    task_types: list,
+) -> Iterator[dict[str, Any]]:
+    today = now.date()
+    for i in range(scale.tasks):
+        undated = rng.random() < 0.05
+        # Most tasks are history; a tail sits in the coming months so calendars have content
+        due = None if undated else today + timedelta(days=int(rng.triangular(-3 * 365, 120, 30)))
+        completed = due is not None and due < today and rng.random() < 0.9
+        created = now - timedelta(days=rng.randint(0, 3 * 365), minutes=rng.randint(0, 1440))
+        yield {
+            "title": rng.choice(TASK_TITLES).format(x=rng.choice(PLANT_NAMES)[0]),
+            "description": "synthetic" if rng.random() < 0.3 else None,
+            "task_type": rng.choice(task_types),
+            "category": rng.choice(categories),
+            "priority": rng.randint(1, 3),
+            "due_date": due,
+            "due_time": f"{rng.randint(6, 18):02d}:00" if rng.random() < 0.3 else None,
+            "location": rng.choice(LOCATIONS) if rng.random() < 0.2 else None,
+            "is_completed": completed,
+            "completed_at": created + timedelta(days=1) if completed else None,
+            "is_active": rng.random() < 0.98,
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def _weather_rows(scale: Scale, rng: random.Random, now: datetime) -> Iterator[dict[str, Any]]:
+    """Five-minute readings with seasonal and daily temperature cycles plus noise"""
+    start = now.replace(second=0, microsecond=0) - timedelta(days=scale.weather_days)
+    steps = int(timedelta(days=scale.weather_days) / READING_INTERVAL)
+    rain_today = 0.0
+    for step in range(steps):
+        t = start + step * READING_INTERVAL
+        if t.hour == 0 and t.minute == 0:
+            rain_today = 0.0
+        day_of_year = t.timetuple().tm_yday
+        seasonal = 72 + 13 * math.sin(2 * math.pi * (day_of_year - 105) / 365)
+        daily = 9 * math.sin(2 * math.pi * (t.hour * 60 + t.minute - 540) / 1440)
+        temp = round(seasonal + daily + rng.gauss(0, 1.5), 1)
+        if rng.random() < 0.01:
+            rain_today = round(rain_today + rng.uniform(0.01, 0.2), 2)
+        wind = round(max(0.0, rng.gauss(6, 4)), 1)
+        yield {
+            "reading_time": t,
+            "temp_outdoor": temp,
+            "feels_like": temp,
+            "humidity_outdoor": max(20, min(100, int(75 - daily * 2 + rng.gauss(0, 5)))),
+            "wind_speed": wind,
+            "wind_gust": round(wind + abs(rng.gauss(3, 2)), 1),
+            "wind_direction": rng.randint(0, 359),
+            "rain_daily": rain_today,
+            "uv_index": max(0, int(daily)) if 7 <= t.hour <= 19 else 0,
+            "pressure_relative": round(rng.gauss(30.0, 0.1), 2),
+        }
+
+
+def _alert_rows(scale: Scale, rng: random.Random, now: datetime, severities: list) -> Iterator[dict[str, Any]]:
+    for i in range(scale.alerts):
+        active = i < max(1, scale.alerts // 5)
+        yield {
+            "alert_type": rng.choice(["frost", "freeze", "wind", "heat", "rain"]),
+            "severity": rng.choice(severities),
+            "title": f"Synthetic alert {i + 1}",
+            "message": "synthetic",
+            "is_active": active,
+            "created_at": now - timedelta(hours=rng.randint(0, 24 * 30)),
+            "expires_at": now + timedelta(hours=rng.randint(1, 48)) if active else now - timedelta(days=1),
+        }
+
+
+async def _insert_batches(db: AsyncSession, model, rows: Iterator[dict[str, Any]]) -> int:
+    columns = _columns(model)
+    count = 0
+    for batch in _batched(rows):
+        await db.execute(insert(model), _filtered(batch, columns))
+        count += len(batch)
+    return count
+
+
+async def seed_database(db: AsyncSession, scale: Scale, seed: int = 42, now: datetime | None = None) -> dict[str, int]:
+    """Insert one synthetic dataset and return the row count per table.
+
+    Deterministic for a given seed and reference time, so benchmark fixtures are reproducible.
+    """
+    from models.plants import Plant
+    from models.livestock import Animal, AnimalType
+    from models.tasks import Task, TaskCategory, TaskType
+    from models.weather import WeatherReading, WeatherAlert
+
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    today = now.date()
+    severity_enum = WeatherAlert.__table__.columns["severity"].type.enum_class
+
+    counts = {
+        "plants": await _insert_batches(db, Plant, _plant_rows(scale, rng, today)),
+        "animals": await _insert_batches(db, Animal, _animal_rows(scale, rng, today, list(AnimalType))),
+        "tasks": await _insert_batches(
+            db, Task, _task_rows(scale, rng, now, list(TaskCategory), list(TaskType))
+        ),
+        "weather_readings": await _insert_batches(db, WeatherReading, _weather_rows(scale, rng, now)),
+        "weather_alerts": await _insert_batches(
+            db, WeatherAlert, _alert_rows(scale, rng, now, list(severity_enum))
+        ),
+    }
+    await db.commit()
+    return counts
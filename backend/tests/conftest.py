@@ -0,0 +1,14 @@
+"""
+Shared test setup.
+models.database binds its engine when first imported, so the scratch database and data
+directory are configured here, before any test module imports app code.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+_SCRATCH = Path(tempfile.mkdtemp(prefix="isaac-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_SCRATCH / 'test.db'}"
+os.environ["DATA_DIR"] = str(_SCRATCH / "data")
+(_SCRATCH / "data").mkdir()
@@ -0,0 +1,46 @@
+"""Calendar bucket cache invalidation follows commits, not flushes"""
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip("models.tasks", reason="needs the full backend models")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models.database import Base
+from models.tasks import Task, TaskType
+from services.calendar_buckets import calendar_buckets
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'calendar.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _event() -> Task:
+    return Task(title="Farrier", due_date=date(2026, 5, 1), task_type=TaskType.EVENT, is_active=True)
+
+
+async def test_invalidates_on_commit_only(session_factory):
+    async with session_factory() as db:
+        version = calendar_buckets.version
+        db.add(_event())
+        await db.flush()
+        assert calendar_buckets.version == version
+        await db.commit()
+        assert calendar_buckets.version == version + 1
+
+
+async def test_rollback_discards_pending_invalidation(session_factory):
+    async with session_factory() as db:
+        version = calendar_buckets.version
+        db.add(_event())
+        await db.flush()
+        await db.rollback()
+        await db.commit()
+        assert calendar_buckets.version == version
@@ -0,0 +1,164 @@
+"""Care horizon: watermarks, extending the horizon, regenerating changed schedules, adopting legacy reminders"""
+
+import sys
+import types
+from datetime import date, datetime, timedelta
+
+import pytest
+
+pytest.importorskip("models.tasks", reason="needs the full backend models")
+
+from sqlalchemy import Boolean, Column, Date, DateTime, Integer, String, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from models.care_horizon import CareOccurrence, CareScheduleWatermark
+from models.tasks import Task, TaskCategory
+from services import care_horizon as care
+from services.care_horizon import ANIMAL_SCHEDULES, CareHorizonError, CareHorizonGenerator, _enum_value
+
+
+Herd = declarative_base()
+
+
+class Animal(Herd):
+    __tablename__ = "animals"
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100))
+    is_active = Column(Boolean, default=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    next_worming_date = Column(Date)
+    worming_frequency_days = Column(Integer)
+    next_farrier_date = Column(Date)
+    hoof_trim_frequency_days = Column(Integer)
+    next_vaccination_date = Column(Date)
+    vaccination_frequency_days = Column(Integer)
+    next_dental_date = Column(Date)
+    dental_frequency_days = Column(Integer)
+
+
+TODAY = date.today()
+
+
+@pytest.fixture
+async def herd(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'care.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Herd.metadata.create_all)
+        for table in (Task.__table__, CareScheduleWatermark.__table__, CareOccurrence.__table__):
+            await conn.run_sync(table.create)
+    monkeypatch.setattr(care, "_bound", [("animal", Animal, ANIMAL_SCHEDULES, "animal_id", "animal_care")])
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    yield sessions
+    await engine.dispose()
+
+
+async def _reminders(sessions) -> list[tuple[str, date, bool]]:
+    async with sessions() as db:
+        tasks = (await db.execute(select(Task).order_by(Task.due_date, Task.id))).scalars().all()
+        return [(t.title, t.due_date, t.is_completed) for t in tasks]
+
+
+async def _add_bessie(sessions, **schedule) -> None:
+    async with sessions() as db:
+        db.add(Animal(id=1, name="Bessie", **schedule))
+        await db.commit()
+
+
+async def test_first_pass_materializes_through_the_horizon_and_sets_the_watermark(herd):
+    await _add_bessie(herd, next_worming_date=TODAY + timedelta(days=2), worming_frequency_days=10)
+    generator = CareHorizonGenerator(horizon_days=30, session_factory=herd)
+
+    result = await generator.run_pass()
+    assert result["full"] and result["regenerated"] == 1 and result["created"] == 3
+    assert [r[1] for r in await _reminders(herd)] == [TODAY + timedelta(days=d) for d in (2, 12, 22)]
+    async with herd() as db:
+        watermark = (await db.execute(select(CareScheduleWatermark))).scalar_one()
+    assert watermark.next_due == TODAY + timedelta(days=32)
+    assert watermark.generated_through == TODAY + timedelta(days=30)
+
+    # Nothing changed and nothing new entered the horizon
+    again = await generator.run_pass()
+    assert not again["full"] and again["regenerated"] == 0 and again["created"] == 0
+
+
+async def test_a_longer_horizon_extends_without_regenerating(herd):
+    await _add_bessie(herd, next_worming_date=TODAY + timedelta(days=2), worming_frequency_days=10)
+    generator = CareHorizonGenerator(horizon_days=30, session_factory=herd)
+    await generator.run_pass()
+
+    generator.horizon_days = 50
+    result = await generator.run_pass()
+    assert result["regenerated"] == 0 and result["created"] == 2
+    assert [r[1] for r in await _reminders(herd)] == [TODAY + timedelta(days=d) for d in (2, 12, 22, 32, 42)]
+
+
+async def test_a_changed_schedule_regenerates_pending_reminders_and_keeps_completed_ones(herd):
+    await _add_bessie(herd, next_worming_date=TODAY + timedelta(days=2), worming_frequency_days=10)
+    generator = CareHorizonGenerator(horizon_days=30, session_factory=herd)
+    await generator.run_pass()
+
+    async with herd() as db:
+        first = (await db.execute(select(Task).order_by(Task.due_date))).scalars().first()
+        first.is_completed = True
+        animal = await db.get(Animal, 1)
+        animal.worming_frequency_days = 14
+        animal.updated_at = datetime.utcnow()
+        await db.commit()
+
+    result = await generator.run_pass()
+    assert result["regenerated"] == 1
+    reminders = await _reminders(herd)
+    assert reminders[0] == ("Worm: Bessie", TODAY + timedelta(days=2), True)
+    # The completed reminder stays (and isn't recreated); the pending ones follow the new interval
+    assert [r[1] for r in reminders[1:]] == [TODAY + timedelta(days=d) for d in (16, 30)]
+
+
+async def test_legacy_reminders_are_adopted_not_duplicated(herd):
+    await _add_bessie(
+        herd,
+        next_worming_date=TODAY + timedelta(days=2), worming_frequency_days=10,
+        next_dental_date=TODAY + timedelta(days=2),
+    )
+    async with herd() as db:
+        # What the full-scan job left behind: one matching reminder, and one for another schedule
+        db.add(Task(
+            title="Worming due: Bessie", animal_id=1, category=_enum_value(TaskCategory, "animal_care"),
+            due_date=TODAY + timedelta(days=2), is_completed=False, is_active=True,
+        ))
+        await db.commit()
+
+    generator = CareHorizonGenerator(horizon_days=15, session_factory=herd)
+    result = await generator.run_pass()
+    assert result["created"] == 2  # worming +12 and dental +2
+    assert generator.stats["tasks_adopted"] == 1
+
+    reminders = await _reminders(herd)
+    assert sorted(reminders) == sorted([
+        ("Worming due: Bessie", TODAY + timedelta(days=2), False),
+        ("Dental: Bessie", TODAY + timedelta(days=2), False),
+        ("Worm: Bessie", TODAY + timedelta(days=12), False),
+    ])
+    async with herd() as db:
+        owned = (await db.execute(select(CareOccurrence.task_id))).scalars().all()
+    assert len(owned) == 3 and None not in owned
+
+
+def test_bind_reports_every_missing_schedule_column(monkeypatch):
+    Stale = declarative_base()
+
+    class OldAnimal(Stale):
+        __tablename__ = "animals"
+        id = Column(Integer, primary_key=True)
+        name = Column(String(100))
+        next_worming_date = Column(Date)
+
+    module = types.ModuleType("stale_livestock")
+    module.OldAnimal = OldAnimal
+    monkeypatch.setitem(sys.modules, "stale_livestock", module)
+    monkeypatch.setattr(care, "SOURCES", (("animal", "stale_livestock.OldAnimal", ANIMAL_SCHEDULES, "animal_id", "animal_care"),))
+
+    with pytest.raises(CareHorizonError) as error:
+        care.bind()
+    assert "worming_frequency_days" in str(error.value)
+    assert "next_dental_date" in str(error.value)
@@ -0,0 +1,103 @@
+"""Change feed sequence numbers are never handed out twice"""
+
+import pytest
+
+pytest.importorskip("models.database", reason="needs the full backend models")
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from models.change_log import ChangeLogEntry
+from services import change_feed
+from services.change_feed import _write_entries
+
+
+def _seqs(conn) -> list[int]:
+    return list(conn.execute(select(ChangeLogEntry.seq).order_by(ChangeLogEntry.seq)).scalars())
+
+
+def test_rewriting_the_newest_entry_gets_a_new_seq(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'feed.db'}")
+    ChangeLogEntry.__table__.create(engine)
+    with engine.begin() as conn:
+        _write_entries(conn, {("tasks", 1): "upsert", ("tasks", 2): "upsert"})
+        assert _seqs(conn) == [1, 2]
+        # Task 2 changes again: its entry at seq 2 is replaced, and the client that saw 2 must see 3
+        _write_entries(conn, {("tasks", 2): "upsert"})
+        assert _seqs(conn) == [1, 3]
+
+
+async def test_legacy_table_is_rebuilt_with_autoincrement(tmp_path):
+    path = tmp_path / "legacy.db"
+    legacy = create_engine(f"sqlite:///{path}")
+    with legacy.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE change_log (seq INTEGER PRIMARY KEY, entity VARCHAR(50) NOT NULL, row_id INTEGER, "
+            "op VARCHAR(10) NOT NULL, changed_at DATETIME NOT NULL)"
+        )
+        conn.exec_driver_sql("INSERT INTO change_log VALUES (7, 'plants', 3, 'upsert', '2026-01-01 00:00:00')")
+    legacy.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await change_feed.ensure_autoincrement(conn)
+        await change_feed.ensure_autoincrement(conn)
+        ddl = (await conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'change_log'")).scalar()
+        await conn.run_sync(lambda sync_conn: _write_entries(sync_conn, {("plants", 3): "upsert"}))
+        seqs = await conn.run_sync(_seqs)
+    await engine.dispose()
+
+    assert "AUTOINCREMENT" in ddl
+    assert seqs == [8]
+
+
+async def test_newly_tracked_entity_is_backfilled(tmp_path, monkeypatch):
+    from sqlalchemy import Column, Integer
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import declarative_base
+
+    from models.change_log import ChangeFeedState
+
+    Local = declarative_base()
+
+    class Widget(Local):
+        __tablename__ = "widgets"
+        id = Column(Integer, primary_key=True)
+
+    class Gadget(Local):
+        __tablename__ = "gadgets"
+        id = Column(Integer, primary_key=True)
+
+    monkeypatch.setattr(change_feed, "TRACKED", {Widget: "widgets"})
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'feed.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Local.metadata.create_all)
+        await conn.run_sync(ChangeLogEntry.__table__.create)
+        await conn.run_sync(ChangeFeedState.__table__.create)
+        await conn.exec_driver_sql("INSERT INTO widgets (id) VALUES (1), (2)")
+        await conn.exec_driver_sql("INSERT INTO gadgets (id) VALUES (5)")
+
+    async with AsyncSession(engine) as db:
+        await change_feed.ensure_backfilled(db)
+        # An upgrade starts tracking gadgets: only they are backfilled, widgets keep their seqs
+        change_feed.track(Gadget, "gadgets")
+        await change_feed.ensure_backfilled(db)
+        await change_feed.ensure_backfilled(db)
+        rows = (await db.execute(
+            select(ChangeLogEntry.seq, ChangeLogEntry.entity, ChangeLogEntry.row_id).order_by(ChangeLogEntry.seq)
+        )).all()
+    await engine.dispose()
+
+    assert [tuple(r) for r in rows] == [(1, "widgets", 1), (2, "widgets", 2), (3, "gadgets", 5)]
+
+
+def test_track_rejects_models_without_an_id():
+    from sqlalchemy import Column, Integer
+    from sqlalchemy.orm import declarative_base
+
+    class Keyless(declarative_base()):
+        __tablename__ = "keyless"
+        code = Column(Integer, primary_key=True)
+
+    with pytest.raises(ValueError, match="no id column"):
+        change_feed.track(Keyless, "keyless")
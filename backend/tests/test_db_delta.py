@@ -0,0 +1,110 @@
+"""Page-delta pull between two local SQLite files"""
+
+import sqlite3
+
+import pytest
+
+from services import db_delta
+from services.db_delta import DeltaError, SnapshotChanged
+
+
+def _write(path, rows: range, blob: int = 2000) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS plants (id INTEGER PRIMARY KEY, name TEXT, notes BLOB)")
+        conn.executemany(
+            "INSERT OR REPLACE INTO plants VALUES (?, ?, ?)",
+            [(i, f"plant {i}", bytes([i % 256]) * blob) for i in rows],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _names(path) -> list[str]:
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT name FROM plants ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def test_first_pull_copies_everything_then_only_changed_pages(tmp_path):
+    prod, dev, state = tmp_path / "prod.db", tmp_path / "dev.db", tmp_path / "state"
+    state.mkdir()
+    _write(prod, range(500))
+
+    first = db_delta.pull_local(prod, dev, state)
+    assert first["full_copy"] is True
+    assert first["pages_transferred"] == first["page_count"]
+    assert _names(dev) == _names(prod)
+
+    conn = sqlite3.connect(prod)
+    conn.execute("UPDATE plants SET name = 'renamed' WHERE id = 250")
+    conn.commit()
+    conn.close()
+
+    second = db_delta.pull_local(prod, dev, state)
+    assert second["full_copy"] is False
+    assert 0 < second["pages_transferred"] < second["page_count"] // 10
+    assert _names(dev)[250] == "renamed"
+
+
+def test_unchanged_source_transfers_nothing(tmp_path):
+    prod, dev = tmp_path / "prod.db", tmp_path / "dev.db"
+    _write(prod, range(50))
+    db_delta.pull_local(prod, dev)
+    assert db_delta.pull_local(prod, dev)["pages_transferred"] == 0
+
+
+def test_grown_source_is_pulled(tmp_path):
+    prod, dev = tmp_path / "prod.db", tmp_path / "dev.db"
+    _write(prod, range(50))
+    db_delta.pull_local(prod, dev)
+    _write(prod, range(50, 400))
+
+    stats = db_delta.pull_local(prod, dev)
+    assert len(_names(dev)) == 400
+    assert stats["pages_transferred"] < stats["page_count"]
+
+
+def test_corrupt_page_stream_leaves_dev_untouched(tmp_path):
+    prod, dev, mirror = tmp_path / "prod.db", tmp_path / "dev.db", tmp_path / "mirror.db"
+    _write(prod, range(50))
+    _write(dev, range(3))
+
+    class Tampered(db_delta.SnapshotSource):
+        def pages(self, snapshot_id, pages):
+            for page, data in super().pages(snapshot_id, pages):
+                yield page, b"\x00" * len(data)
+
+    with pytest.raises(DeltaError):
+        db_delta.pull(Tampered(prod, tmp_path / "snap.db"), dev, mirror)
+    assert _names(dev) == ["plant 0", "plant 1", "plant 2"]
+    assert not mirror.exists()
+
+
+def test_snapshot_replaced_mid_pull_is_retried(tmp_path):
+    prod, dev = tmp_path / "prod.db", tmp_path / "dev.db"
+    _write(prod, range(50))
+
+    class Racing(db_delta.SnapshotSource):
+        fetches = 0
+
+        def pages(self, snapshot_id, pages):
+            Racing.fetches += 1
+            if Racing.fetches == 1:
+                raise SnapshotChanged("replaced")
+            return super().pages(snapshot_id, pages)
+
+    stats = db_delta.pull(Racing(prod, tmp_path / "snap.db"), dev, tmp_path / "mirror.db")
+    assert Racing.fetches == 2
+    assert stats["full_copy"] is True
+    assert len(_names(dev)) == 50
+
+
+def test_frames_round_trip():
+    frames = [(3, b"a" * 512), (9, b"b" * 512)]
+    assert list(db_delta.decode_frames(db_delta.encode_frames(frames), 512)) == frames
+    assert db_delta.to_ranges([1, 2, 3, 7]) == [[1, 3], [7, 1]]
+    assert list(db_delta.from_ranges([[1, 3], [7, 1]])) == [1, 2, 3, 7]
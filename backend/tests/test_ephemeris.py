@@ -0,0 +1,87 @@
+"""Ephemeris table lookups: day offsets, missing events and moon phase names"""
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+pytest.importorskip("models.settings", reason="needs the full backend models")
+
+from services.ephemeris import MISSING, SUN_EVENTS, EphemerisCache, EphemerisTable, _build, moon_phase_name
+
+
+TZ = "America/New_York"
+START = date(2026, 6, 20)
+
+
+def _table() -> EphemerisTable:
+    """Three days; the second has no dusk (as on a polar summer night)"""
+    tz = ZoneInfo(TZ)
+    hours = {"dawn": 5, "sunrise": 6, "noon": 13, "sunset": 20, "dusk": 21}
+    events = {
+        event: np.array(
+            [int(datetime(2026, 6, 20 + i, hour, 30, tzinfo=tz).timestamp()) for i in range(3)], dtype=np.int64,
+        )
+        for event, hour in hours.items()
+    }
+    events["dusk"][1] = MISSING
+    return EphemerisTable((40.0, -75.0, TZ), START, events, np.array([13.5, 14.5, 15.5], dtype=np.float32))
+
+
+def test_day_is_looked_up_by_offset_from_the_start():
+    table = _table()
+    assert table.days == 3 and table.end == date(2026, 6, 22)
+
+    values = table.day(date(2026, 6, 21))
+    assert values["sunrise"] == datetime(2026, 6, 21, 6, 30, tzinfo=ZoneInfo(TZ))
+    assert values["sunrise"].utcoffset() is not None
+    assert values["dusk"] is None
+    assert values["moon_phase"] == pytest.approx(14.5)
+
+    assert table.day(date(2026, 6, 19)) is None
+    assert table.day(date(2026, 6, 23)) is None
+    assert not table.covers(date(2026, 6, 23))
+
+
+@pytest.mark.parametrize("phase, name", [
+    (0.0, "New Moon"),
+    (3.0, "Waxing Crescent"),
+    (7.0, "First Quarter"),
+    (10.0, "Waxing Gibbous"),
+    (14.0, "Full Moon"),
+    (17.0, "Waning Gibbous"),
+    (21.0, "Last Quarter"),
+    (24.0, "Waning Crescent"),
+    (27.5, "New Moon"),
+    (28.0, "New Moon"),
+])
+def test_moon_phase_name(phase, name):
+    assert moon_phase_name(phase)[0] == name
+
+
+async def test_sun_moon_is_today_in_the_widget_shape(monkeypatch):
+    table = _table()
+    cache = EphemerisCache()
+
+    async def fixed_table(db):
+        return table
+
+    monkeypatch.setattr(cache, "table", fixed_table)
+    noon = datetime(2026, 6, 20, 12, 0, tzinfo=ZoneInfo(TZ))
+    values = await cache.sun_moon(None, now=noon)
+    assert values["sunrise"] == "6:30 AM" and values["sunset"] == "8:30 PM"
+    assert values["day_length_minutes"] == 14 * 60
+    assert values["is_daytime"] is True
+    assert values["moon_phase"] == "Full Moon"
+
+    assert await cache.sun_moon(None, now=datetime(2026, 7, 1, tzinfo=ZoneInfo(TZ))) is None
+
+
+def test_built_table_has_every_event_for_a_temperate_location():
+    pytest.importorskip("astral")
+    table = _build(40.0, -75.0, TZ, START, 2)
+    values = table.day(START)
+    assert set(SUN_EVENTS) <= set(values)
+    assert values["dawn"] < values["sunrise"] < values["noon"] < values["sunset"] < values["dusk"]
+    assert 5 <= values["sunrise"].hour <= 6
@@ -0,0 +1,81 @@
+"""Finance aggregates bind to explicit models and sign each source's amounts"""
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip("models.database", reason="needs the full backend models")
+
+from sqlalchemy import Column, Date, Float, Integer, String, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from models.finance_aggregate import FinanceMonthlyAggregate
+from services import finance_aggregates
+from services.finance_aggregates import AggregateSource, FinanceAggregateError
+
+Ledger = declarative_base()
+
+
+class Expense(Ledger):
+    __tablename__ = "test_expenses"
+
+    id = Column(Integer, primary_key=True)
+    expense_date = Column(Date, nullable=False)
+    amount = Column(Float, nullable=False)
+    category = Column(String(30))
+
+
+class Sale(Ledger):
+    __tablename__ = "test_sales"
+
+    id = Column(Integer, primary_key=True)
+    sale_date = Column(Date, nullable=False)
+    total_price = Column(Float, nullable=False)
+
+
+SOURCES = (
+    AggregateSource("expenses", f"{__name__}.Expense", "expense_date", ("amount",), "out", category="category"),
+    AggregateSource("sales", f"{__name__}.Sale", "sale_date", ("total_price",), "in"),
+)
+
+
+def test_bind_reports_every_missing_model_and_column(monkeypatch):
+    monkeypatch.setattr(finance_aggregates, "SOURCES", (
+        AggregateSource("expenses", f"{__name__}.Expense", "spent_on", ("amount",), "out"),
+        AggregateSource("orders", f"{__name__}.Order", "order_date", ("total",), "in"),
+    ))
+    with pytest.raises(FinanceAggregateError) as error:
+        finance_aggregates.bind()
+    assert "expenses: " in str(error.value) and "spent_on" in str(error.value)
+    assert "orders: no model" in str(error.value)
+
+
+async def test_writes_roll_up_with_each_source_sign(tmp_path, monkeypatch):
+    monkeypatch.setattr(finance_aggregates, "SOURCES", SOURCES)
+    monkeypatch.setattr(finance_aggregates, "_bound", {})
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'finance.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Ledger.metadata.create_all)
+        await conn.run_sync(FinanceMonthlyAggregate.__table__.create)
+    finance_aggregates.bind()
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as db:
+        feed = Expense(expense_date=date(2026, 3, 4), amount=40.0, category="feed")
+        db.add_all([feed, Sale(sale_date=date(2026, 3, 9), total_price=100.0)])
+        await db.commit()
+        assert await finance_aggregates.month_totals(db, "2026-03") == {
+            "month": "2026-03",
+            "farm": {"income": 100.0, "spending": 40.0, "net": 60.0},
+            "budget": {"income": 0, "spending": 0, "net": 0},
+        }
+
+        feed.expense_date = date(2026, 4, 1)
+        await db.commit()
+        rows = (await db.execute(
+            select(FinanceMonthlyAggregate.month, FinanceMonthlyAggregate.outflow)
+            .where(FinanceMonthlyAggregate.source == "expenses")
+        )).all()
+    await engine.dispose()
+
+    assert [tuple(row) for row in rows] == [("2026-04", -40.0)]
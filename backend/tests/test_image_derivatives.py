@@ -0,0 +1,56 @@
+"""Variant pruning leaves files whose rows may not have committed yet; receipt content stays private"""
+
+import os
+import time
+
+import pytest
+
+pytest.importorskip("models.database", reason="needs the full backend models")
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from models.image_derivative import ImageDerivative
+from services import image_derivatives
+
+
+def _variant(content_hash: str, age: float):
+    path = image_derivatives.derived_path(content_hash, "thumb")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"webp")
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_prune_skips_files_inside_the_grace_period():
+    kept = _variant("a" * 32, age=0)
+    referenced = _variant("b" * 32, age=2 * image_derivatives.PRUNE_GRACE)
+    orphan = _variant("c" * 32, age=2 * image_derivatives.PRUNE_GRACE)
+
+    assert image_derivatives._remove_unreferenced({"b" * 32}) == 1
+    assert kept.exists() and referenced.exists()
+    assert not orphan.exists()
+
+
+async def test_receipt_only_content_is_private(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'images.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(ImageDerivative.__table__.create)
+    try:
+        async with AsyncSession(engine) as db:
+            for kind, filename, content_hash in (
+                ("receipts", "feed.jpg", "d" * 32),
+                ("receipts", "gate.jpg", "e" * 32),
+                ("plants", "gate.jpg", "e" * 32),
+            ):
+                db.add(ImageDerivative(
+                    kind=kind, filename=filename, source_size=1, source_mtime=0.0, content_hash=content_hash,
+                ))
+            await db.commit()
+
+            assert await image_derivatives.is_private(db, "d" * 32)
+            # The same bytes uploaded as a plant photo are public through the photo
+            assert not await image_derivatives.is_private(db, "e" * 32)
+            assert await image_derivatives.is_private(db, "f" * 32)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,57 @@
+"""Log tail and search over indexed, block-read log files"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import log_query
+
+
+@pytest.fixture
+def logs(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_query, "LOGS_DIR", tmp_path)
+    monkeypatch.setattr(log_query, "INDEX_DIR", tmp_path / ".index")
+    # Small blocks so a few dozen lines span many index blocks
+    monkeypatch.setattr(log_query, "BLOCK_SIZE", 256)
+    return tmp_path
+
+
+def _write(path, start: datetime, count: int, error_every: int = 10) -> None:
+    with open(path, "w") as f:
+        for i in range(count):
+            stamp = (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S")
+            level = "ERROR" if i % error_every == 0 else "INFO"
+            f.write(f"{stamp} | {level: <8} | services.poller:run:42 - message {i}\n")
+
+
+def _messages(result) -> list[str]:
+    return [entry["message"] for entry in result["entries"]]
+
+
+def test_since_and_level_read_every_matching_block(logs):
+    _write(logs / "isaac.log", datetime(2026, 3, 1, 10, 0), 60)
+    result = log_query.query_logs(level="ERROR", since=datetime(2026, 3, 1, 10, 5))
+    assert _messages(result) == ["message 10", "message 20", "message 30", "message 40", "message 50"]
+
+
+def test_since_stops_before_older_rotated_files(logs):
+    _write(logs / "isaac.2026-02-28.log", datetime(2026, 2, 28, 10, 0), 30)
+    _write(logs / "isaac.log", datetime(2026, 3, 1, 10, 0), 30)
+    result = log_query.query_logs(level="ERROR", since=datetime(2026, 3, 1, 9, 0))
+    assert _messages(result) == ["message 0", "message 10", "message 20"]
+    assert {entry["file"] for entry in result["entries"]} == {"isaac.log"}
+
+
+def test_tail_spans_rotated_files_oldest_first(logs):
+    _write(logs / "isaac.2026-02-28.log", datetime(2026, 2, 28, 10, 0), 5)
+    _write(logs / "isaac.log", datetime(2026, 3, 1, 10, 0), 3)
+    os.utime(logs / "isaac.2026-02-28.log", (0, 0))
+    result = log_query.query_logs(lines=5)
+    assert _messages(result) == ["message 3", "message 4", "message 0", "message 1", "message 2"]
+
+
+def test_until_and_search(logs):
+    _write(logs / "isaac.log", datetime(2026, 3, 1, 10, 0), 60)
+    result = log_query.query_logs(search="MESSAGE 1", until=datetime(2026, 3, 1, 10, 15))
+    assert _messages(result) == ["message 1"] + [f"message {i}" for i in range(10, 16)]
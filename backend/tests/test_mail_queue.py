@@ -0,0 +1,219 @@
+"""Mail queue delivery, retries and digests against a stub SMTP session and a local SMTP sink"""
+
+import asyncio
+from datetime import datetime, timedelta
+from email import message_from_bytes
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("models.database", reason="needs the full backend models")
+pytest.importorskip("services.email", reason="needs the full backend services")
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models.mail_queue import OutboundEmail
+from services import mail_queue
+from services.mail_queue import MailQueueWorker, MAX_ATTEMPTS, enqueue_email
+
+CONFIG = {"host": "localhost", "port": 1025, "user": None, "password": None, "sender": "isaac@farm.test"}
+
+
+class StubSMTP:
+    """Stands in for the pooled aiosmtplib session"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.is_connected = True
+        self.sent = []
+
+    async def send_message(self, message):
+        if self.fail:
+            raise OSError("connection refused")
+        self.sent.append(message)
+
+    async def quit(self):
+        self.is_connected = False
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'mail.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(OutboundEmail.__table__.create)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _worker(session_factory, smtp: StubSMTP) -> MailQueueWorker:
+    worker = MailQueueWorker(session_factory=session_factory)
+
+    async def config(db):
+        return CONFIG
+
+    async def connection(config):
+        if not smtp.is_connected:
+            raise OSError("connection refused")
+        return smtp
+
+    worker._smtp_config = config
+    worker._connection = connection
+    return worker
+
+
+async def _queue(session_factory, **fields):
+    async with session_factory() as db:
+        db.add(OutboundEmail(to="admin@farm.test", body="body", **fields))
+        await db.commit()
+
+
+async def test_sent_message_has_date_and_message_id(session_factory):
+    smtp = StubSMTP()
+    await _queue(session_factory, subject="Frost tonight")
+
+    assert await _worker(session_factory, smtp).process_due() == 1
+    message = smtp.sent[0]
+    assert message["Subject"] == "[Isaac] Frost tonight"
+    assert message["Date"]
+    assert message["Message-ID"].endswith("@farm.test>")
+
+
+async def test_coalesced_alerts_go_out_as_one_digest(session_factory):
+    smtp = StubSMTP()
+    stale = datetime.utcnow() - mail_queue.COALESCE_WINDOW - timedelta(seconds=1)
+    for subject in ("Frost Warning", "High Wind Warning"):
+        await _queue(session_factory, subject=subject, coalesce_key="weather_alert", created_at=stale)
+
+    assert await _worker(session_factory, smtp).process_due() == 1
+    assert smtp.sent[0]["Subject"].startswith("[Isaac] 2 alerts:")
+    async with session_factory() as db:
+        statuses = (await db.execute(select(OutboundEmail.status))).scalars().all()
+    assert statuses == ["sent", "sent"]
+
+
+async def test_failed_send_backs_off_then_gives_up(session_factory):
+    smtp = StubSMTP(fail=True)
+    await _queue(session_factory, subject="Task due")
+    worker = _worker(session_factory, smtp)
+
+    for _ in range(MAX_ATTEMPTS):
+        async with session_factory() as db:
+            row = (await db.execute(select(OutboundEmail))).scalar_one()
+            row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+            await db.commit()
+        assert await worker.process_due() == 0
+
+    async with session_factory() as db:
+        row = (await db.execute(select(OutboundEmail))).scalar_one()
+    assert row.status == "failed"
+    assert row.attempts == MAX_ATTEMPTS
+
+
+async def test_unconfigured_email_fails_queued_rows(session_factory):
+    await _queue(session_factory, subject="Task due")
+    worker = MailQueueWorker(session_factory=session_factory)
+
+    async def unconfigured(db):
+        return None
+
+    worker._smtp_config = unconfigured
+    assert await worker.process_due() == 0
+    async with session_factory() as db:
+        row = (await db.execute(select(OutboundEmail))).scalar_one()
+    assert (row.status, row.last_error) == ("failed", "SMTP not configured")
+
+
+async def test_config_comes_from_email_service(monkeypatch):
+    service = SimpleNamespace(
+        smtp_host="smtp.test", smtp_port="587", smtp_user="farm@test", smtp_password="pw", smtp_from=None,
+    )
+
+    async def configured(db):
+        return service
+
+    monkeypatch.setattr(mail_queue.EmailService, "get_configured_service", configured)
+    config = await MailQueueWorker()._smtp_config(None)
+    assert config == {"host": "smtp.test", "port": 587, "user": "farm@test", "password": "pw", "sender": "farm@test"}
+
+
+class SMTPSink:
+    """Just enough of an SMTP server on 127.0.0.1 to accept mail and record it"""
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.port = None
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._session, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _session(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 sink ESMTP\r\n")
+        while line := await reader.readline():
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                writer.write(b"250 sink\r\n")
+            elif command == "DATA":
+                writer.write(b"354 end with .\r\n")
+                await writer.drain()
+                data = await reader.readuntil(b"\r\n.\r\n")
+                self.messages.append(message_from_bytes(data[:-5].replace(b"\r\n..", b"\r\n.")))
+                writer.write(b"250 queued\r\n")
+            elif command == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:  # MAIL FROM, RCPT TO, RSET, NOOP
+                writer.write(b"250 ok\r\n")
+            await writer.drain()
+        writer.close()
+
+
+async def test_queued_mail_is_delivered_to_a_local_sink_over_one_connection(session_factory):
+    async with SMTPSink() as sink:
+        worker = MailQueueWorker(session_factory=session_factory)
+
+        async def config(db):
+            return {**CONFIG, "host": "127.0.0.1", "port": sink.port}
+
+        worker._smtp_config = config
+        await _queue(session_factory, subject="Frost tonight")
+        await _queue(session_factory, subject="Task due")
+        try:
+            assert await worker.process_due() == 2
+        finally:
+            await worker._disconnect()
+
+    assert sink.connections == 1 and worker.stats["connections"] == 1
+    assert [m["Subject"] for m in sink.messages] == ["[Isaac] Frost tonight", "[Isaac] Task due"]
+    assert sink.messages[0]["To"] == "admin@farm.test"
+    assert sink.messages[0]["Message-ID"].endswith("@farm.test>")
+
+
+async def test_enqueue_joins_the_callers_transaction(session_factory, monkeypatch):
+    woken = []
+    monkeypatch.setattr(mail_queue.mail_worker, "wake", lambda: woken.append(True))
+
+    async with session_factory() as db:
+        await enqueue_email(db, subject="Rolled back", body="body", to="admin@farm.test")
+        await db.rollback()
+    assert woken == []
+
+    async with session_factory() as db:
+        await enqueue_email(db, subject="Frost tonight", body="body", to="admin@farm.test")
+        assert woken == []  # flushed, not committed: the worker couldn't see it yet
+        await db.commit()
+    assert woken == [True]
+
+    async with session_factory() as db:
+        subjects = (await db.execute(select(OutboundEmail.subject))).scalars().all()
+    assert subjects == ["Frost tonight"]
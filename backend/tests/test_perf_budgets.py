@@ -0,0 +1,38 @@
+"""
+Performance budgets for the hot dashboard handlers (benchmarks.py, perf_baseline.json).
+Runs `admin bench` in its own process so the fixture gets a fresh database; a handler that
+issues more SQL statements than its budget or doubles its latency ratio fails the build.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks import BenchResult, check_budgets
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def test_missing_baseline_values_fail():
+    results = [BenchResult("get_dashboard", statements=3, median_ms=1.0, ratio=1.5)]
+    baseline = {"handlers": {"get_dashboard": {"max_statements": None, "latency_ratio": None}}}
+    assert len(check_budgets(results, baseline)) == 2
+
+
+def test_regressions_fail():
+    baseline = {"latency_tolerance": 2.0, "handlers": {"h": {"max_statements": 3, "latency_ratio": 1.0}}}
+    assert check_budgets([BenchResult("h", statements=3, median_ms=1.0, ratio=1.9)], baseline) == []
+    failures = check_budgets([BenchResult("h", statements=4, median_ms=1.0, ratio=2.1)], baseline)
+    assert len(failures) == 2
+
+
+@pytest.mark.perf
+def test_dashboard_handlers_within_budgets():
+    pytest.importorskip("models.database", reason="needs the full app models")
+    result = subprocess.run(
+        [sys.executable, "-m", "admin", "bench", "--runs", "9"],
+        cwd=BACKEND, capture_output=True, text=True, timeout=600,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,94 @@
+"""Plant import client against recorded PFAF / Permapeople pages"""
+
+from pathlib import Path
+
+import httpx
+import pytest
+
+from services.plant_import_client import PlantImportClient, recorded_transport
+
+FIXTURES = Path(__file__).parent / "fixtures" / "plant_import"
+PFAF = "https://pfaf.org/user/Plant.aspx?LatinName=Symphytum+officinale"
+PERMAPEOPLE = "https://permapeople.org/plants/russian-comfrey-symphytum-x-uplandicum"
+
+
+class Counting(httpx.AsyncBaseTransport):
+    """Recorded transport that remembers what was asked of it"""
+
+    def __init__(self):
+        self.inner = recorded_transport(FIXTURES)
+        self.requests: list[httpx.Request] = []
+
+    async def handle_async_request(self, request):
+        self.requests.append(request)
+        return await self.inner.handle_async_request(request)
+
+
+@pytest.fixture
+async def client(tmp_path):
+    client = PlantImportClient(cache_dir=tmp_path, transport=Counting())
+    yield client
+    await client.close()
+
+
+async def test_pfaf_record_is_parsed(client):
+    record = await client.record(PFAF)
+    assert record["name"] == "Comfrey"
+    assert record["latin_name"] == "Symphytum officinale"
+    assert record["family"] == "Boraginaceae"
+    assert record["hardiness_zones"] == "4-8"
+    assert record["description"] == "Comfrey is a vigorous perennial herb valued as a dynamic accumulator."
+    assert record["propagation"].startswith("Root cuttings")
+
+
+async def test_permapeople_record_is_parsed(client):
+    record = await client.record(PERMAPEOPLE)
+    assert record["name"] == "Russian Comfrey"
+    assert record["latin_name"] == "Symphytum x uplandicum"
+    assert record["hardiness_zones"] == "3-9"
+    assert record["sun"] == "Full sun, partial shade"
+    assert record["water"] == "Moderate"
+    assert record["edible_uses"] == "Leaves"
+
+
+async def test_fresh_page_is_served_from_disk(client):
+    await client.record(PFAF)
+    await client.record(PFAF)
+    assert len(client.transport.requests) == 1
+    assert client.stats["fresh"] == 1
+    assert client.stats["records_cached"] == 1
+
+
+async def test_stale_page_is_revalidated_with_its_etag(tmp_path):
+    transport = Counting()
+    client = PlantImportClient(cache_dir=tmp_path, transport=transport, fresh_for=0)
+    try:
+        first = await client.record(PFAF)
+        second = await client.record(PFAF)
+    finally:
+        await client.close()
+    assert second == first
+    assert transport.requests[1].headers["if-none-match"] == '"pfaf-symphytum-1"'
+    assert client.stats["revalidated"] == 1
+    assert client.stats["records_parsed"] == 1
+
+
+async def test_search_skips_a_failing_source(client):
+    results = await client.search("comfrey")
+    assert [r["latin_name"] for r in results] == ["Symphytum officinale", "Symphytum x uplandicum"]
+    assert results[0]["url"] == PFAF
+
+
+async def test_bulk_reports_failures_per_url(client):
+    results = await client.records([
+        PFAF,
+        PFAF,
+        "https://pfaf.org/user/Plant.aspx?LatinName=Nonexistent",
+        "https://pfaf.org/user/Plant.aspx?LatinName=Unrecorded",
+        "https://example.com/plants/comfrey",
+    ])
+    assert len(results) == 4  # the repeated URL is fetched once
+    assert results[0]["record"]["name"] == "Comfrey"
+    assert results[1]["error"] == "Not a PFAF plant page"
+    assert results[2]["error"] == "pfaf.org returned 404"
+    assert results[3]["error"] == "Unsupported plant database: example.com"
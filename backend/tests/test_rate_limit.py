@@ -0,0 +1,30 @@
+"""Shared SQLite rate-limit store"""
+
+import sqlite3
+
+from services.rate_limit import SQLiteRateLimitStore
+
+
+def test_limits_are_shared_between_store_instances(tmp_path):
+    path = tmp_path / "ratelimit.db"
+    first, second = SQLiteRateLimitStore(60, path), SQLiteRateLimitStore(60, path)
+    assert first.check_and_record("10.0.0.2", True, global_limit=3, write_limit=2) is None
+    assert second.check_and_record("10.0.0.2", True, global_limit=3, write_limit=2) is None
+    assert first.check_and_record("10.0.0.2", True, global_limit=3, write_limit=2) == "write"
+    assert second.check_and_record("10.0.0.2", False, global_limit=3, write_limit=2) is None
+    assert first.check_and_record("10.0.0.2", False, global_limit=3, write_limit=2) == "global"
+
+
+def test_locked_store_lets_requests_through(tmp_path):
+    path = tmp_path / "ratelimit.db"
+    store = SQLiteRateLimitStore(60, path)
+    holder = sqlite3.connect(str(path), isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        assert store.check_and_record("10.0.0.2", False, global_limit=1, write_limit=1) is None
+        assert store.failures == 1
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert store.check_and_record("10.0.0.2", False, global_limit=1, write_limit=1) is None
+    assert store.check_and_record("10.0.0.2", False, global_limit=1, write_limit=1) == "global"
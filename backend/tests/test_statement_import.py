@@ -0,0 +1,183 @@
+"""Statement import jobs: upload checks, per-page extraction in the pool, memoized text and bulk insert"""
+
+import pytest
+
+pytest.importorskip("models.database", reason="needs the full backend models")
+
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, String, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from config import settings
+from models.statement_import import StatementTextCache
+from services import statement_import
+from services.statement_import import StatementPool, build_preview, extract_pages
+
+
+PAGE_ONE = [
+    "Opening/Closing Date 12/15/25 - 01/14/26",
+    "12/20 Card Purchase 12/19 Tractor Supply #123 -45.67",
+    "12/20 Card Purchase 12/19 Tractor Supply #123 -45.67",
+]
+PAGE_TWO = [
+    "01/03 Payroll Deposit 1,250.00",
+    "01/09 Costco Whse #0012 -210.50",
+]
+
+
+def _pdf(pages: list[list[str]]) -> bytes:
+    """A minimal text PDF, one Helvetica line per entry"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        body = "BT /F1 10 Tf 14 TL 40 750 Td " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(body), body.encode()))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % (len(objects))
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+async def _events(data: bytes) -> list[dict]:
+    return [event async for event in statement_import.parse_statement(None, data, 1)]
+
+
+async def test_non_pdf_is_rejected_before_the_pool():
+    assert await _events(b"hello") == [{"type": "error", "detail": "Not a PDF file"}]
+
+
+async def test_oversized_upload_is_rejected():
+    events = await _events(b"%PDF" + b"\0" * statement_import.MAX_FILE_SIZE)
+    assert events == [{"type": "error", "detail": "Statement file is too large"}]
+
+
+async def test_pages_are_extracted_in_the_pool(tmp_path):
+    pytest.importorskip("pdfplumber")
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(_pdf([PAGE_ONE, PAGE_TWO]))
+
+    pool = StatementPool(max_workers=1)
+    try:
+        events = [event async for event in extract_pages(str(path), pool)]
+    finally:
+        pool.shutdown()
+
+    assert events[0] == {"type": "started", "pages": 2}
+    assert [(e["done"], e["pages"]) for e in events[1:3]] == [(1, 2), (2, 2)]
+    assert sorted(e["page"] for e in events[1:3]) == [1, 2]
+    texts = events[3]["texts"]
+    assert "Tractor Supply #123 -45.67" in texts[0]
+    assert "Costco Whse #0012 -210.50" in texts[1]
+
+
+def test_preview_resolves_years_categorizes_and_flags_duplicates():
+    texts = ["\n".join(PAGE_ONE), "\n".join(PAGE_TWO)]
+    rules = [("^costco", "regex", 7, "Groceries"), ("tractor", "contains", 3, "Farm Supplies")]
+    clean = build_preview(texts, 1, None, rules, set(), set())
+    txns = clean["transactions"]
+
+    assert [t["date"] for t in txns] == ["2025-12-20", "2025-12-20", "2026-01-03", "2026-01-09"]
+    assert txns[0]["description"] == "Tractor Supply #123"
+    assert txns[0]["original_description"] == "Card Purchase 12/19 Tractor Supply #123"
+    assert [t["suggested_category_name"] for t in txns] == ["Farm Supplies", "Farm Supplies", None, "Groceries"]
+    assert [t["transaction_type"] for t in txns] == ["debit", "debit", "credit", "debit"]
+    # Two identical purchases on one statement are two transactions, not a duplicate pair
+    assert txns[0]["import_hash"] != txns[1]["import_hash"]
+    assert clean["duplicates"] == 0
+
+    imported = {txns[0]["import_hash"]}
+    entered_by_hand = {("2026-01-09", -210.5, "Costco Whse #0012")}
+    flagged = build_preview(texts, 1, None, rules, imported, entered_by_hand)["transactions"]
+    assert [t["is_duplicate"] for t in flagged] == [True, False, False, True]
+
+
+Budget = declarative_base()
+
+
+class BudgetCategory(Budget):
+    __tablename__ = "budget_categories"
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100))
+
+
+class BudgetRule(Budget):
+    __tablename__ = "budget_rules"
+    id = Column(Integer, primary_key=True)
+    pattern = Column(String(200))
+    match_type = Column(String(20))
+    category_id = Column(Integer, ForeignKey("budget_categories.id"))
+    priority = Column(Integer, default=0)
+
+
+class BudgetTransaction(Budget):
+    __tablename__ = "budget_transactions"
+    id = Column(Integer, primary_key=True)
+    account_id = Column(Integer)
+    transaction_date = Column(Date)
+    description = Column(String(500))
+    original_description = Column(String(500))
+    amount = Column(Float)
+    transaction_type = Column(String(10))
+    category_id = Column(Integer)
+    import_hash = Column(String(64))
+
+
+async def test_reupload_skips_extraction_but_rechecks_rules_and_duplicates(tmp_path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    monkeypatch.setattr(settings, "data_dir", tmp_path)
+    monkeypatch.setattr(statement_import, "_models", {
+        "transaction": BudgetTransaction, "rule": BudgetRule, "category": BudgetCategory,
+    })
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'budget.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Budget.metadata.create_all)
+        await conn.run_sync(StatementTextCache.__table__.create)
+    data = _pdf([PAGE_ONE, PAGE_TWO])
+
+    try:
+        async with AsyncSession(engine) as db:
+            first = [event async for event in statement_import.parse_statement(db, data, 1)]
+            done = first[-1]
+            assert [e["type"] for e in first] == ["started", "progress", "progress", "done"]
+            assert done["cached"] is False and done["total"] == 4 and done["duplicates"] == 0
+
+            picked = [t for t in done["transactions"] if t["amount"] < 0]
+            rows = [{**t, "category_id": t["suggested_category_id"]} for t in picked]
+            result = await statement_import.insert_transactions(db, 1, rows)
+            assert result == {"imported": 3, "skipped_duplicates": 0, "errors": 0}
+            # A double submit inserts nothing
+            result = await statement_import.insert_transactions(db, 1, rows)
+            assert result == {"imported": 0, "skipped_duplicates": 3, "errors": 0}
+
+            db.add(BudgetCategory(id=9, name="Income"))
+            db.add(BudgetRule(pattern="payroll", match_type="starts_with", category_id=9, priority=1))
+            await db.commit()
+
+            def no_pool(*args):
+                raise AssertionError("a memoized statement must not be extracted again")
+
+            monkeypatch.setattr(statement_import.statement_pool, "submit", no_pool)
+            second = [event async for event in statement_import.parse_statement(db, data, 1)]
+            done = second[-1]
+            assert [e["type"] for e in second] == ["started", "done"]
+            assert done["cached"] is True
+            assert [t["is_duplicate"] for t in done["transactions"]] == [True, True, False, True]
+            assert done["transactions"][2]["suggested_category_name"] == "Income"
+
+            stored = (await db.execute(select(BudgetTransaction.import_hash))).scalars().all()
+            assert len(set(stored)) == 3
+    finally:
+        statement_import.statement_pool.shutdown()
+        await engine.dispose()
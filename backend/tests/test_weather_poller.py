@@ -0,0 +1,105 @@
+"""Adaptive weather poller against a stub Ambient Weather server"""
+
+from datetime import datetime
+
+import httpx
+import pytest
+
+from services.weather_poller import AdaptiveWeatherPoller, alert_conditions, DEVICES_PATH
+
+THRESHOLDS = {
+    "frost_warning_temp": 35.0,
+    "freeze_warning_temp": 32.0,
+    "heat_warning_temp": 95.0,
+    "wind_warning_speed": 25.0,
+    "rain_warning_inches": 2.0,
+}
+
+
+class StubStation:
+    """Serves lastData with ETag revalidation, like the real devices endpoint"""
+
+    def __init__(self):
+        self.samples = [{"dateutc": 1_760_000_000_000, "tempf": 50.0}]
+        self.requests: list[httpx.Request] = []
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.samples[-1]["dateutc"]}"'
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        assert request.url.path == DEVICES_PATH
+        if request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304)
+        return httpx.Response(200, json=[{"lastData": self.samples[-1]}], headers={"ETag": self.etag})
+
+
+def _poller(station: StubStation, **kwargs) -> AdaptiveWeatherPoller:
+    poller = AdaptiveWeatherPoller(
+        base_url="http://stub", api_key="api", app_key="app",
+        base_interval=300, min_interval=60, max_interval=900, **kwargs,
+    )
+    poller._client = httpx.AsyncClient(base_url="http://stub", transport=httpx.MockTransport(station))
+    return poller
+
+
+async def test_conditional_requests_skip_unchanged_samples():
+    station = StubStation()
+    poller = _poller(station)
+
+    reading = await poller.fetch()
+    assert reading["temp_outdoor"] == 50.0
+    assert reading["reading_time"] == datetime(2025, 10, 9, 8, 53, 20)
+
+    assert await poller.fetch() is None
+    assert station.requests[-1].headers["If-None-Match"] == station.etag
+    assert poller.stats["not_modified"] == 1
+
+    station.samples.append({"dateutc": 1_760_000_060_000, "tempf": 49.0})
+    assert (await poller.fetch())["temp_outdoor"] == 49.0
+    assert poller.stats["polls"] == 3
+
+
+async def _no_flush():
+    return 0
+
+
+async def test_polls_faster_near_frost():
+    station = StubStation()
+    station.samples = [{"dateutc": 1_760_000_000_000, "tempf": 36.0}]
+    poller = _poller(station)
+    poller.flush = _no_flush
+
+    await poller.poll_once()
+    assert poller.interval == 60
+
+
+async def test_failed_flush_keeps_readings_buffered():
+    pytest.importorskip("models.weather", reason="needs the full backend models")
+
+    class BrokenSession:
+        async def __aenter__(self):
+            raise RuntimeError("database is locked")
+
+        async def __aexit__(self, *exc):
+            return False
+
+    poller = _poller(StubStation(), session_factory=BrokenSession)
+    reading = await poller.fetch()
+    poller._buffer.append(reading)
+
+    with pytest.raises(RuntimeError):
+        await poller.flush()
+    assert poller._buffer == [reading]
+    assert poller.stats["written"] == 0
+
+
+def test_freeze_supersedes_frost():
+    alerts = alert_conditions({"temp_outdoor": 30.0, "wind_gust": 31.0}, THRESHOLDS)
+    assert [a["alert_type"] for a in alerts] == ["freeze", "wind"]
+    assert alert_conditions({"temp_outdoor": 34.0}, THRESHOLDS)[0]["alert_type"] == "frost"
+
+
+def test_mild_reading_raises_nothing():
+    assert alert_conditions({"temp_outdoor": 60.0, "wind_speed": 5.0, "rain_daily": 0.1}, THRESHOLDS) == []
@@ -0,0 +1,56 @@
+"""
+Weather History API Routes
+Server-side downsampled series for the trend charts, so a year of 5-minute readings
+arrives as a few hundred points instead of ~100k
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import get_db
+from services import weather_downsample
+
+
+router = APIRouter(prefix="/weather/history", tags=["Weather"])
+
+MAX_RANGE_DAYS = 3 * 366
+
+
+def _naive_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+@router.get("/series")
+async def get_history_series(
+    start: Optional[datetime] = Query(None, description="UTC; defaults to 24 hours before end"),
+    end: Optional[datetime] = Query(None, description="UTC; defaults to now"),
+    points: int = Query(500, ge=weather_downsample.MIN_POINTS, le=weather_downsample.MAX_POINTS,
+                        description="Target points per series, roughly the chart width in pixels"),
+    metrics: str = Query("temp_outdoor", description="Comma-separated columns, e.g. temp_outdoor,humidity_outdoor"),
+    method: Literal["lttb", "minmax"] = Query("lttb", description="lttb for lines, minmax for min/max/avg bands"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Get downsampled weather series for a time range.
+
+    `lttb` keeps the peaks and troughs that plain averaging flattens; `minmax` returns
+    per-bucket min, max and avg for envelope charts.
+    """
+    end = _naive_utc(end) if end else datetime.utcnow()
+    start = _naive_utc(start) if start else end - timedelta(hours=24)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > timedelta(days=MAX_RANGE_DAYS):
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+
+    available = weather_downsample.available_metrics()
+    wanted = list(dict.fromkeys(m.strip() for m in metrics.split(",") if m.strip()))
+    unknown = [m for m in wanted if m not in available]
+    if not wanted or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown metrics: {', '.join(unknown) or '(none given)'}; available: {', '.join(available)}",
+        )
+    return await weather_downsample.downsampled_history(db, start, end, points, wanted, method)
@@ -0,0 +1,54 @@
+import React, { useState, useEffect } from 'react'
+import { getDashboardFinance } from '../services/api'
+import { useNavigate } from 'react-router-dom'
+
+function FinanceWidget({ className = '' }) {
+  const [data, setData] = useState(null)
+  const navigate = useNavigate()
+
+  useEffect(() => {
+    const fetchData = async () => {
+      try {
+        const res = await getDashboardFinance()
+        setData(res.data)
+      } catch (error) {
+        console.error('Failed to fetch farm finances:', error)
+      }
+    }
+    fetchData()
+
+    const handleRefresh = () => fetchData()
+    window.addEventListener('dashboard-refresh', handleRefresh)
+    return () => window.removeEventListener('dashboard-refresh', handleRefresh)
+  }, [])
+
+  if (!data || (!data.farm.income && !data.farm.spending)) return null
+
+  const fmt = (n) => {
+    const abs = Math.abs(n)
+    return abs >= 1000
+      ? '$' + abs.toLocaleString('en-US', { minimumFractionDigits: 0, maximumFractionDigits: 0 })
+      : '$' + abs.toFixed(2)
+  }
+
+  const { income, spending, net } = data.farm
+
+  return (
+    <div
+      className={`flex flex-col gap-0.5 cursor-pointer max-h-[4.5rem] overflow-hidden ${className}`}
+      onClick={() => navigate('/farm-finances')}
+      title="View Farm Finances"
+    >
+      <div className="text-xs font-sans font-semibold leading-tight whitespace-nowrap" style={{ color: 'var(--color-text-secondary)' }}>
+        Farm this month
+      </div>
+      <div className="flex items-center gap-2 text-xs font-mono font-bold leading-tight whitespace-nowrap">
+        <span style={{ color: '#22c55e' }}>+{fmt(income)}</span>
+        <span style={{ color: '#ef4444' }}>-{fmt(spending)}</span>
+        <span style={{ color: net < 0 ? '#ef4444' : '#22c55e' }}>= {net < 0 ? '-' : ''}{fmt(net)}</span>
+      </div>
+    </div>
+  )
+}
+
+export default FinanceWidget
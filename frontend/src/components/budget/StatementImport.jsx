@@ -1,6 +1,6 @@
 import React, { useState, useRef } from 'react'
 import { Upload, FileText, CheckCircle2, AlertTriangle, X, Check, Edit, CheckSquare, Square } from 'lucide-react'
-import { importChaseStatement, confirmBudgetImport, getBudgetAccounts, getBudgetCategories } from '../../services/api'
+import { parseStatement, commitStatementImport, getBudgetAccounts, getBudgetCategories } from '../../services/api'
 
 function StatementImport() {
   const [accounts, setAccounts] = useState([])
@@ -11,6 +11,7 @@ function StatementImport() {
   const [preview, setPreview] = useState(null)
   const [importing, setImporting] = useState(false)
   const [parsing, setParsing] = useState(false)
+  const [parseProgress, setParseProgress] = useState(null)
   const [result, setResult] = useState(null)
   const [error, setError] = useState('')
   const [editingIdx, setEditingIdx] = useState(null)
@@ -65,22 +66,55 @@ function StatementImport() {
   const handleParse = async () => {
     if (!file || !selectedAccountId) return
     setParsing(true)
+    setParseProgress(null)
     setError('')
     try {
-      const res = await importChaseStatement(
+      const response = await parseStatement(
         file,
         parseInt(selectedAccountId),
         statementYear ? parseInt(statementYear) : null
       )
+      if (!response.ok) {
+        const body = await response.json().catch(() => ({}))
+        throw new Error(body.detail || `HTTP ${response.status}`)
+      }
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      let data = null
+
+      while (!data) {
+        const { done, value } = await reader.read()
+        if (done) break
+
+        buffer += decoder.decode(value, { stream: true })
+
+        // Process complete SSE events from buffer
+        const lines = buffer.split('\n')
+        // Keep last potentially incomplete line in buffer
+        buffer = lines.pop() || ''
+
+        for (const line of lines) {
+          if (!line.startsWith('data: ')) continue
+          const event = JSON.parse(line.slice(6))
+          if (event.type === 'started' || event.type === 'progress') {
+            setParseProgress({ done: event.done || 0, pages: event.pages })
+          }
+          if (event.type === 'error') throw new Error(event.detail)
+          if (event.type === 'done') data = event
+        }
+      }
+      if (!data) throw new Error('Statement import stopped before finishing')
+
       // Add 'selected' flag to each transaction (default: selected if not duplicate)
-      const data = res.data
       data.transactions = data.transactions.map(t => ({
         ...t,
         selected: !t.is_duplicate,
       }))
       setPreview(data)
     } catch (err) {
-      setError(err.response?.data?.detail || 'Failed to parse statement')
+      setError(err.message || 'Failed to parse statement')
     } finally {
       setParsing(false)
     }
@@ -134,10 +168,9 @@ function StatementImport() {
           transaction_type: t.transaction_type,
           import_hash: t.import_hash,
           category_id: t.suggested_category_id,
-          account_id: parseInt(selectedAccountId),
         }))
 
-      const res = await confirmBudgetImport({ transactions })
+      const res = await commitStatementImport({ account_id: parseInt(selectedAccountId), transactions })
       setResult(res.data)
       setPreview(null)
       setFile(null)
@@ -239,7 +272,7 @@ function StatementImport() {
             disabled={parsing || !selectedAccountId}
             className="mt-3 w-full py-2 bg-farm-green text-white rounded-lg text-sm font-medium hover:bg-green-700 transition-colors disabled:opacity-50"
           >
-            {parsing ? 'Parsing...' : 'Parse Statement'}
+            {parsing ? `Parsing...${parseProgress ? ` page ${parseProgress.done} of ${parseProgress.pages}` : ''}` : 'Parse Statement'}
           </button>
         )}
 
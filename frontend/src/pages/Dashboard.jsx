@@ -9,6 +9,7 @@ import StorageAlertWidget from '../components/StorageAlertWidget'
 import ColdProtectionWidget from '../components/ColdProtectionWidget'
 import AnimalFeedWidget from '../components/AnimalFeedWidget'
 import BudgetWidget from '../components/BudgetWidget'
+import FinanceWidget from '../components/FinanceWidget'
 import BibleVerse from '../components/BibleVerse'
 import MottoDisplay from '../components/MottoDisplay'
 import { useSettings } from '../contexts/SettingsContext'
@@ -273,7 +274,8 @@ function Dashboard() {
         {/* Motto - fills remaining space, wraps if needed */}
         <MottoDisplay className="py-1" />
 
-        {/* Right - Budget Ticker */}
+        {/* Right - Farm finances and Budget Ticker */}
+        <FinanceWidget className="flex-shrink-0 hidden md:flex" />
         <BudgetWidget className="flex-shrink-0 hidden md:flex" />
       </div>
 
@@ -839,10 +839,10 @@ function Settings() {
     }
   }
 
-  const fetchStorageStats = async () => {
+  const fetchStorageStats = async (refresh = false) => {
     setLoadingStorage(true)
     try {
-      const response = await getStorageStats()
+      const response = await getStorageStats(refresh)
       setStorageStats(response.data)
     } catch (error) {
       console.error('Failed to fetch storage stats:', error)
@@ -884,7 +884,7 @@ function Settings() {
     setLoadingLogs(true)
     try {
       const response = await getAppLogs(logFilter.lines, logFilter.level || null, logFilter.search || null, logFile)
-      setAppLogs(response.data.logs || [])
+      setAppLogs(response.data.entries || [])
     } catch (error) {
       console.error('Failed to fetch logs:', error)
       setMessage({ type: 'error', text: 'Failed to fetch logs' })
@@ -2975,6 +2975,16 @@ function Settings() {
                         <span className="text-muted">Log Files</span>
                         <span>{storageStats.logs_human}</span>
                       </div>
+                      <div className="flex justify-between">
+                        <span className="text-muted">Photos & Uploads</span>
+                        <span>{storageStats.uploads_human}</span>
+                      </div>
+                      {storageStats.days_until_full != null && (
+                        <div className="flex justify-between">
+                          <span className="text-muted">Disk full in</span>
+                          <span>~{Math.round(storageStats.days_until_full)} days</span>
+                        </div>
+                      )}
                     </div>
                   </div>
 
@@ -2989,7 +2999,7 @@ function Settings() {
                       {clearingLogs ? 'Clearing...' : 'Clear Logs'}
                     </button>
                     <button
-                      onClick={fetchStorageStats}
+                      onClick={() => fetchStorageStats(true)}
                       disabled={loadingStorage}
                       className="flex items-center gap-2 px-4 py-2 bg-surface-hover hover:bg-surface-muted rounded-lg transition-colors text-sm"
                     >
@@ -52,11 +52,26 @@ api.interceptors.response.use(
   }
 )
 
+// Global search - title/snippet are HTML-escaped with <mark> around matches
+export const globalSearch = (q, { entities, limit } = {}) =>
+  api.get('/search/', { params: { q, entities: entities?.join(','), limit } })
+
 // Dashboard - longer timeout for complex queries
 export const getDashboard = () => api.get('/dashboard/', { timeout: 20000 })
 export const getQuickStats = () => api.get('/dashboard/quick-stats/')
+export const getDashboardFinance = (month) => api.get('/dashboard/finance/', { params: month ? { month } : {} })
+// Several widgets in one round trip: { widgets: { name: { status, data | error } } }
+export const getDashboardBatch = (widgets) =>
+  api.get('/dashboard/batch', { params: widgets ? { widgets: widgets.join(',') } : {}, timeout: 20000 })
 export const getCalendarMonth = (year, month) =>
   api.get(`/dashboard/calendar/${year}/${month}`)
+// Per-day buckets for any span; pass month ETags already held to skip unchanged months (304 when none changed)
+export const getCalendarRange = (start, end, etags = []) =>
+  api.get('/dashboard/calendar/range', {
+    params: { start, end },
+    headers: etags.length ? { 'If-None-Match': etags.join(', ') } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+  })
 export const getCalendarWeek = (year, month, day) =>
   api.get(`/dashboard/calendar/week/${year}/${month}/${day}`)
 export const getColdProtection = () => api.get('/dashboard/cold-protection/')
@@ -68,6 +83,9 @@ export const refreshWeather = () => api.post('/weather/refresh/')
 export const getWeatherAlerts = () => api.get('/weather/alerts/')
 export const getWeatherForecast = () => api.get('/weather/forecast/')
 export const getRainForecast = () => api.get('/weather/rain-forecast/')
+export const getWeatherHistorySeries = (params) => api.get('/weather/history/series', { params })
+export const getSunMoon = () => api.get('/weather/sun-moon/')
+export const getSunMoonDays = (start, end) => api.get('/weather/sun-moon/days/', { params: { start, end } })
 export const acknowledgeAlert = (id) => api.post(`/weather/alerts/${id}/acknowledge/`)
 export const dismissAlert = (id) => api.post(`/weather/alerts/${id}/dismiss/`)
 
@@ -91,6 +109,7 @@ export const getWaterOverview = (days = 7) => api.get('/plants/water-overview/',
 export const searchPlantImport = (q) => api.get('/plants/import/search/', { params: { q } })
 export const previewPlantImport = (url) => api.post('/plants/import/preview/', { url })
 export const importPlant = (url) => api.post('/plants/import/', { url })
+export const previewBulkPlantImport = (urls) => api.post('/plants/import/bulk/preview/', { urls }, { timeout: 120000 })
 export const waterPlant = (plantId, notes = null) =>
   api.post(`/plants/${plantId}/water/`, null, { params: { notes } })
 export const skipWatering = (plantId, reason, notes = null) =>
@@ -104,6 +123,9 @@ export const uploadPlantPhoto = (id, formData) =>
 export const deletePlantPhoto = (id) => api.delete(`/plants/${id}/photo/`)
 export const getPlantPhotoUrl = (path) =>
   path ? `${api.defaults.baseURL}/plants/photos/${path.split('/').pop()}` : null
+// Resized WebP variant ('thumb' or 'medium') of any upload kind: plants, animals, seeds, journal, team, receipts
+export const getImageVariantUrl = (kind, path, variant = 'thumb') =>
+  path ? `${api.defaults.baseURL}/images/${kind}/${path.split('/').pop()}/${variant}/` : null
 
 // Animals
 export const getAnimals = (params) => api.get('/animals/', { params })
@@ -292,13 +314,16 @@ export const toggleKeyboard = () => api.post('/settings/keyboard/toggle/')
 export const updateApplication = () => api.post('/settings/update/')
 export const pushToProduction = () => api.post('/settings/push-to-prod/', {}, { timeout: 300000 }) // 5 min for build
 export const pullFromProduction = () => api.post('/settings/pull-from-prod/', {}, { timeout: 60000 }) // 1 min for db copy
+export const pullFromProductionIncremental = () => api.post('/db-sync/pull/', {}, { timeout: 300000 }) // changed pages only
 export const getRecentCommits = () => api.get('/settings/recent-commits/')
 export const getLogFiles = () => api.get('/settings/admin-logs/files/')
-export const getAppLogs = (lines = 100, level = null, search = null, logFile = 'app') => {
-  const params = new URLSearchParams({ lines: lines.toString(), log_file: logFile })
-  if (level) params.append('level', level)
-  if (search) params.append('search', search)
-  return api.get(`/settings/admin-logs/?${params.toString()}`)
+export const getAppLogs = (lines = 100, level = null, search = null, logFile = 'app', since = null, until = null) => {
+  const params = { lines, log_file: logFile }
+  if (level) params.level = level
+  if (search) params.search = search
+  if (since) params.since = since
+  if (until) params.until = until
+  return api.get('/logs/', { params })
 }
 export const clearAppLogs = () => api.post('/settings/admin-logs/clear/')
 
@@ -314,7 +339,8 @@ export const clearHealthLogs = (olderThanDays = 7) =>
   api.delete(`/settings/health-logs/`, { params: { older_than_days: olderThanDays } })
 
 // Storage
-export const getStorageStats = () => api.get('/dashboard/storage/')
+export const getStorageStats = (refresh = false) =>
+  api.get('/dashboard/storage/', { params: refresh ? { refresh: true } : {} })
 export const clearLogs = () => api.post('/dashboard/storage/clear-logs/')
 
 // Home Maintenance
@@ -887,6 +913,10 @@ export const getBudgetPeriodSummary = (startDate, endDate) =>
 export const getBudgetMonthlySummary = (year, month) =>
   api.get('/budget/summary/monthly/', { params: { year, month } })
 export const getBudgetDashboard = () => api.get('/budget/summary/dashboard/')
+// Monthly totals from the materialized aggregates; groupBy is any of month, account_id, category, enterprise
+export const getFinanceAggregates = ({ start, end, sources, groupBy = ['month'] } = {}) =>
+  api.get('/finance/aggregates/', { params: { start, end, sources: sources?.join(','), group_by: groupBy.join(',') } })
+export const rebuildFinanceAggregates = () => api.post('/finance/aggregates/rebuild/', null, { timeout: 120000 })
 export const getBudgetPayPeriods = (year, month) =>
   api.get('/budget/pay-periods/', { params: { year, month } })
 export const getBudgetPeriodReference = () => api.get('/budget/period-reference/')
@@ -903,6 +933,19 @@ export const importChaseStatement = (file, accountId, statementYear) => {
   })
 }
 export const confirmBudgetImport = (data) => api.post('/budget/import/confirm/', data)
+// parseStatement returns a fetch() Response streaming SSE per-page progress events (not axios);
+// the final `done` event carries the same preview as importChaseStatement
+export const parseStatement = async (file, accountId, statementYear = null) => {
+  const formData = new FormData()
+  formData.append('file', file)
+  const query = `?account_id=${accountId}${statementYear ? `&statement_year=${statementYear}` : ''}`
+  return fetch(`/api/budget/import/statement/parse/${query}`, {
+    method: 'POST',
+    credentials: 'include',
+    body: formData,
+  })
+}
+export const commitStatementImport = (data) => api.post('/budget/import/statement/commit/', data)
 export const runBudgetCategorize = () => api.post('/budget/categorize/')
 
 // Setup Wizard (first-time setup)